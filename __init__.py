@@ -4,5 +4,5 @@ from data.repo.MongoDbRepo import MongoDBRepo
 from data.database.MongoDbClient import MongoDbClient
 from data.database.Neo4jClient import Neo4jClient
 
-from scripts.import_csv_to_mongo import import_lastfm_file
-from scripts.import_csv_to_graph import import_lastfm_like_file
\ No newline at end of file
+from scripts.import_csv_to_mongo import import_lastfm_file, import_lastfm_file_aggregated
+from scripts.import_csv_to_graph import import_lastfm_like_file, import_lastfm_like_file_bulk
\ No newline at end of file
@@ -0,0 +1,2 @@
+from .synthetic import generate_relation_file
+from .fakes import FakeNeo4jDriver, FakeAsyncNeo4jDriver, FakeAsyncMongoClient
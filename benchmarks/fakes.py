@@ -0,0 +1,370 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class FakeRecord:
+    def __init__(self, row: Dict[str, Any]):
+        self._row = row
+
+    def data(self) -> Dict[str, Any]:
+        return dict(self._row)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._row[key]
+
+
+class FakeResult:
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self._rows = rows
+
+    def __iter__(self):
+        return (FakeRecord(row) for row in self._rows)
+
+    def single(self) -> Optional[FakeRecord]:
+        return FakeRecord(self._rows[0]) if self._rows else None
+
+    def consume(self):
+        return None
+
+
+class FakeTransaction:
+    def __init__(self, driver: "FakeNeo4jDriver"):
+        self._driver = driver
+
+    def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> FakeResult:
+        return self._driver._record(query, {**(parameters or {}), **kwargs})
+
+
+class FakeSession:
+    def __init__(self, driver: "FakeNeo4jDriver", **config):
+        self._driver = driver
+        self.config = config
+
+    def __enter__(self) -> "FakeSession":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def close(self):
+        pass
+
+    def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> FakeResult:
+        # an auto-commit statement is one round trip
+        self._driver.round_trips += 1
+        return self._driver._record(query, {**(parameters or {}), **kwargs})
+
+    def execute_write(self, work: Callable, *args, **kwargs):
+        # a managed transaction ships its statements and the commit as one unit
+        self._driver.round_trips += 1
+        self._driver.transactions += 1
+        return work(FakeTransaction(self._driver), *args, **kwargs)
+
+    execute_read = execute_write
+
+
+class FakeNeo4jDriver:
+    """
+    Stand-in for a neo4j.Driver that records every Cypher statement instead of sending it.
+
+    Counts round trips (auto-commit runs plus managed transactions), transactions, statements and
+    UNWIND rows, and keeps a per-statement histogram so a benchmark can show how many distinct
+    queries and round trips an import path costs. `responder(query, parameters)` may return the
+    rows a statement should yield (default: none).
+    """
+
+    def __init__(self, responder: Optional[Callable[[str, Dict[str, Any]], List[Dict[str, Any]]]] = None,
+                 keep_log: bool = False):
+        self.responder = responder
+        self.keep_log = keep_log
+        self.log: List[Any] = []
+        self.queries: Counter = Counter()
+        self.round_trips = 0
+        self.transactions = 0
+        self.statements = 0
+        self.rows = 0
+        self.sessions = 0
+
+    def session(self, **config) -> FakeSession:
+        self.sessions += 1
+        return FakeSession(self, **config)
+
+    def verify_connectivity(self):
+        return None
+
+    def close(self):
+        pass
+
+    def _record(self, query: str, parameters: Dict[str, Any]) -> FakeResult:
+        self.statements += 1
+        self.queries[query] += 1
+        rows = parameters.get("rows")
+        self.rows += len(rows) if isinstance(rows, list) else 1
+        if self.keep_log:
+            self.log.append((query, parameters))
+        return FakeResult(self.responder(query, parameters) if self.responder else [])
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "round_trips": self.round_trips,
+            "transactions": self.transactions,
+            "statements": self.statements,
+            "distinct_statements": len(self.queries),
+            "rows": self.rows,
+            "sessions": self.sessions,
+        }
+
+
+class FakeAsyncResult(FakeResult):
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for row in self._rows:
+            yield FakeRecord(row)
+
+    async def single(self) -> Optional[FakeRecord]:
+        return FakeResult.single(self)
+
+    async def consume(self):
+        return None
+
+
+class FakeAsyncTransaction:
+    def __init__(self, driver: "FakeAsyncNeo4jDriver"):
+        self._driver = driver
+
+    async def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> FakeAsyncResult:
+        return FakeAsyncResult(self._driver._record(query, {**(parameters or {}), **kwargs})._rows)
+
+
+class FakeAsyncSession:
+    def __init__(self, driver: "FakeAsyncNeo4jDriver", **config):
+        self._driver = driver
+        self.config = config
+
+    async def __aenter__(self) -> "FakeAsyncSession":
+        self._driver._enter()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._driver.in_flight -= 1
+        return False
+
+    async def close(self):
+        pass
+
+    async def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> FakeAsyncResult:
+        self._driver.round_trips += 1
+        await asyncio.sleep(self._driver.latency)
+        return FakeAsyncResult(self._driver._record(query, {**(parameters or {}), **kwargs})._rows)
+
+    async def execute_write(self, work: Callable, *args, **kwargs):
+        self._driver.round_trips += 1
+        self._driver.transactions += 1
+        await asyncio.sleep(self._driver.latency)
+        return await work(FakeAsyncTransaction(self._driver), *args, **kwargs)
+
+    execute_read = execute_write
+
+
+class FakeAsyncNeo4jDriver(FakeNeo4jDriver):
+    """
+    Stand-in for a neo4j.AsyncDriver with the bookkeeping of FakeNeo4jDriver.
+
+    Every round trip awaits `latency` seconds, so statements issued concurrently (asyncio.gather)
+    overlap the way they would against a server; `peak_sessions` is the most sessions that were
+    open at the same time.
+    """
+
+    def __init__(self, responder: Optional[Callable[[str, Dict[str, Any]], List[Dict[str, Any]]]] = None,
+                 keep_log: bool = False, latency: float = 0.0):
+        super().__init__(responder, keep_log)
+        self.latency = latency
+        self.in_flight = 0
+        self.peak_sessions = 0
+
+    def session(self, **config) -> FakeAsyncSession:
+        self.sessions += 1
+        return FakeAsyncSession(self, **config)
+
+    def _enter(self):
+        self.in_flight += 1
+        self.peak_sessions = max(self.peak_sessions, self.in_flight)
+
+    async def verify_connectivity(self):
+        return None
+
+    async def close(self):
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {**super().stats(), "peak_sessions": self.peak_sessions}
+
+
+class FakeAsyncCursor:
+    """Motor-style cursor over a (mongomock) cursor: `await to_list(length)` or `async for`."""
+
+    def __init__(self, cursor, client: "FakeAsyncMongoClient"):
+        self._cursor = iter(cursor)
+        self._client = client
+
+    def _take(self, length: Optional[int]) -> List[Dict[str, Any]]:
+        documents = []
+        for document in self._cursor:
+            documents.append(document)
+            if length is not None and len(documents) >= length:
+                break
+        return documents
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        return await self._client._round_trip(self._take, length)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        # one round trip per batch, like getMore
+        while True:
+            documents = await self._client._round_trip(self._take, FakeAsyncMongoClient.BATCH_SIZE)
+            for document in documents:
+                yield document
+            if len(documents) < FakeAsyncMongoClient.BATCH_SIZE:
+                return
+
+    async def close(self):
+        pass
+
+
+class FakeAsyncCollection:
+    # pymongo collection methods Motor turns into coroutines
+    COROUTINES = ("insert_one", "insert_many", "bulk_write", "create_index", "create_indexes", "index_information",
+                  "count_documents", "find_one", "update_one", "delete_one")
+
+    def __init__(self, collection, client: "FakeAsyncMongoClient"):
+        self._collection = collection
+        self._client = client
+
+    def __getattr__(self, name: str):
+        if name not in self.COROUTINES:
+            raise AttributeError(name)
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return await self._client._round_trip(method, *args, **kwargs)
+        return call
+
+    def find(self, *args, batch_size: int = 0, **kwargs) -> FakeAsyncCursor:
+        return FakeAsyncCursor(self._collection.find(*args, **kwargs), self._client)
+
+    def aggregate(self, pipeline: List[Dict[str, Any]], **kwargs) -> FakeAsyncCursor:
+        return FakeAsyncCursor(self._collection.aggregate(pipeline, **kwargs), self._client)
+
+
+class FakeAsyncDatabase:
+    def __init__(self, database, client: "FakeAsyncMongoClient"):
+        self._database = database
+        self._client = client
+
+    def __getitem__(self, name: str) -> FakeAsyncCollection:
+        return FakeAsyncCollection(self._database[name], self._client)
+
+    async def list_collection_names(self) -> List[str]:
+        return await self._client._round_trip(self._database.list_collection_names)
+
+    async def create_collection(self, name: str):
+        return await self._client._round_trip(self._database.create_collection, name)
+
+    async def drop_collection(self, name: str):
+        return await self._client._round_trip(self._database.drop_collection, name)
+
+
+class FakeAsyncMongoClient:
+    """
+    Motor-shaped coroutine wrapper around a synchronous client (mongomock for the benchmarks).
+
+    The wrapped call runs inline; every round trip first awaits `latency` seconds so concurrent
+    requests overlap like network waits do. Counts round trips and the peak number in flight.
+    """
+    # documents per round trip when a cursor is iterated with `async for`
+    BATCH_SIZE = 1000
+
+    def __init__(self, client, latency: float = 0.0):
+        self._client = client
+        self.latency = latency
+        self.round_trips = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def __getitem__(self, name: str) -> FakeAsyncDatabase:
+        return FakeAsyncDatabase(self._client[name], self)
+
+    get_database = __getitem__
+
+    async def server_info(self) -> Dict[str, Any]:
+        return await self._round_trip(self._client.server_info)
+
+    def close(self):
+        pass
+
+    async def _round_trip(self, method: Callable, *args, **kwargs):
+        self.round_trips += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            return method(*args, **kwargs)
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"round_trips": self.round_trips, "peak_in_flight": self.peak_in_flight}
+
+
+class FakeSinkRepo:
+    """
+    Stand-in for both repos as pipeline sinks (upsert_add_to_set for Mongo, write_batch for Neo4j).
+
+    Batch writes are counted (1-based `writes`); `delay(n)` returns how long write n takes and
+    writes listed in `fail` report failure. With `peer` set, `peak_lead` records how many batches
+    the peer sink had written beyond this one after each of its writes.
+    """
+
+    def __init__(self, delay: Optional[Callable[[int], float]] = None, fail: Sequence[int] = (),
+                 peer: Optional["FakeSinkRepo"] = None):
+        self.delay = delay
+        self.fail = set(fail)
+        self.peer = peer
+        self.writes = 0
+        self.rows = 0
+        self.peak_lead = 0
+
+    def add_collection(self, collection_name: str):
+        pass
+
+    def ensure_indexes(self, collection_name: str, indexes: List[Any]) -> List[str]:
+        return []
+
+    def ensure_constraints(self, labels: List[str], key: str = "id") -> int:
+        return 0
+
+    def _write(self, rows: int) -> bool:
+        self.writes += 1
+        if self.delay:
+            time.sleep(self.delay(self.writes))
+        if self.peer is not None:
+            self.peak_lead = max(self.peak_lead, self.peer.writes - self.writes)
+        if self.writes in self.fail:
+            return False
+        self.rows += rows
+        return True
+
+    def upsert_add_to_set(self, collection_name: str, key_field: str,
+                          documents: Dict[str, Dict[str, List[str]]]) -> Optional[Dict[str, int]]:
+        rows = sum(len(targets) for fields in documents.values() for targets in fields.values())
+        return {"upserted": len(documents), "modified": 0} if self._write(rows) else None
+
+    def write_batch(self, statements: List[Tuple[str, Dict[str, Any]]]) -> bool:
+        return self._write(sum(len(parameters["rows"]) for _, parameters in statements))
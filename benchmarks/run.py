@@ -0,0 +1,870 @@
+"""
+Benchmark suite for the ingestion and query paths, runnable without any database server.
+
+    python -m benchmarks.run --rows 200000 --skew 1.0 --output results.json
+    python -m benchmarks.run --only neo4j,analytics --compare results.json
+
+Mongo benchmarks run against mongomock (skipped when it is not installed), Neo4j benchmarks against
+benchmarks.fakes.FakeNeo4jDriver, which also reports round trips and statements per import path.
+mongomock's cost grows with the collection, not the way a server's does, so the benchmarks bound
+by it are correctness-only: they load a small file (--mongo-rows, or --legacy-rows for the
+row-at-a-time importer) and their times are reported but never compared.
+
+Results are written as JSON; --compare flags every other benchmark that got slower than
+--threshold and exits with status 1 if any did. Some benchmarks also check what they measured
+(results equal a reference, backpressure engaged, ...); a failed check is reported as FAILED and
+also exits with 1.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .fakes import FakeAsyncMongoClient, FakeAsyncNeo4jDriver, FakeNeo4jDriver, FakeSinkRepo
+from .synthetic import generate_item_genres, generate_relation_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROWS = 200000
+# Row-at-a-time importers are timed on a smaller file so a run stays in the minute range
+DEFAULT_LEGACY_ROWS = 20000
+# Rows loaded by the mongomock-bound (correctness-only) benchmarks
+DEFAULT_MONGO_ROWS = 2000
+DEFAULT_THRESHOLD = 0.10
+# Users (and one event of each) probed by the per-id use-case questions
+USE_CASE_SAMPLE = 20
+# Simulated round trip of the async stand-ins, so gathered calls overlap like network waits
+ASYNC_LATENCY = 0.002
+# Rows loaded into the async benchmark's users collection
+ASYNC_ROWS = 5000
+# Rows of the relation file whose profiles the write check round-trips through mongomock
+PROFILE_WRITE_ROWS = 500
+# Users whose trait scores the write check round-trips through mongomock
+TRAIT_WRITE_USERS = 2000
+# Rows per batch and per-write latency of the slow fake sink in the pipeline checks
+PIPELINE_CHECK_BATCH = 200
+SLOW_WRITE_SECONDS = 0.002
+# Seconds a pipeline check waits for import_dual before calling it hung
+PIPELINE_CHECK_TIMEOUT = 10
+TOP_EVENT_USERS = [{"$match": {"events.0": {"$exists": True}}},
+                   {"$project": {"_id": 0, "user_id": 1, "n": {"$size": "$events"}}},
+                   {"$sort": {"n": -1, "user_id": 1}}, {"$limit": 5}]
+
+# name -> (group, function(context) -> {"rows": int, ...extra}, untimed setup(context) or None,
+#          whether --compare checks its time)
+BENCHMARKS: Dict[str, Any] = {}
+
+
+class BenchmarkSkipped(Exception):
+    pass
+
+
+class CheckFailed(AssertionError):
+    pass
+
+
+def check(condition: Any, message: str):
+    """Fail the running benchmark (reported as FAILED, exit status 1) unless `condition` holds."""
+    if not condition:
+        raise CheckFailed(message)
+
+
+def benchmark(name: str, group: str, setup: Optional[Callable] = None, compared: bool = True) -> Callable:
+    """Register a benchmark; `compared=False` marks it correctness-only (timed, but kept out of --compare)."""
+    def register(fn: Callable) -> Callable:
+        BENCHMARKS[name] = (group, fn, setup, compared)
+        return fn
+    return register
+
+
+def _mongomock_repo():
+    try:
+        import mongomock
+    except ImportError:
+        raise BenchmarkSkipped("mongomock is not installed")
+    from data.repo.MongoDbRepo import MongoDBRepo
+    return MongoDBRepo.from_driver(mongomock.MongoClient(), "benchmark")
+
+
+def _fake_neo4j_repo():
+    from data.repo.Neo4jRepo import Neo4jRepo
+    driver = FakeNeo4jDriver()
+    return Neo4jRepo.from_driver(driver, "neo4j"), driver
+
+
+@benchmark("mongo.import_lastfm_file", "mongo", compared=False)
+def bench_mongo_legacy(context: Dict[str, Any]) -> Dict[str, Any]:
+    from scripts.import_csv_to_mongo import import_lastfm_file
+    repo = _mongomock_repo()
+    stats = import_lastfm_file(repo, context["legacy_file"], "users")
+    return {"rows": stats["rows"], "errors": stats["errors"], "documents": repo._driver["benchmark"]["users"].count_documents({})}
+
+
+@benchmark("mongo.import_lastfm_file_aggregated", "mongo", compared=False)
+def bench_mongo_aggregated(context: Dict[str, Any]) -> Dict[str, Any]:
+    from scripts.import_csv_to_mongo import import_lastfm_file_aggregated
+    repo = _mongomock_repo()
+    stats = import_lastfm_file_aggregated(repo, context["mongo_file"], "users", context["batch_size"])
+    documents = repo._driver["benchmark"]["users"].count_documents({})
+    check(not stats.get("failed_batches"), f"{stats.get('failed_batches')} batches failed")
+    check(stats["rows"] == context["mongo_rows"], f"imported {stats['rows']} of {context['mongo_rows']} rows")
+    return {"rows": stats["rows"], "flushes": stats["flushes"], "documents": documents}
+
+
+def _use_case_repo(context: Dict[str, Any]):
+    """Aggregated users collection (with its indexes) plus sample ids, loaded once per run."""
+    if "use_case_repo" not in context:
+        from scripts.import_csv_to_mongo import import_lastfm_file_aggregated
+        repo = _mongomock_repo()
+        import_lastfm_file_aggregated(repo, context["mongo_file"], "users", context["batch_size"])
+        sample = repo.find_many("users", {"events.0": {"$exists": True}})[:USE_CASE_SAMPLE]
+        context["use_case_repo"] = repo
+        context["use_case_users"] = [document["user_id"] for document in sample]
+        context["use_case_events"] = [document["events"][0] for document in sample]
+    return context["use_case_repo"]
+
+
+def _use_case_answers(context: Dict[str, Any], count_users, count_for_user, count_users_of, top_targets, top_users):
+    return {
+        "users": count_users(),
+        "per_user": [count_for_user(user_id) for user_id in context["use_case_users"]],
+        "per_event": [count_users_of(event_id) for event_id in context["use_case_events"]],
+        "top_events": top_targets(),
+        "top_users": top_users(),
+    }
+
+
+def _answered(answer: Any) -> Any:
+    check(answer is not None, "a use-case query failed (None)")
+    return answer
+
+
+@benchmark("mongo.use_cases.pushdown", "usecases", setup=_use_case_repo, compared=False)
+def bench_use_cases_pushdown(context: Dict[str, Any]) -> Dict[str, Any]:
+    from src.analytics import use_cases
+    repo = context["use_case_repo"]
+    answers = _use_case_answers(
+        context,
+        lambda: _answered(use_cases.count_users(repo)),
+        lambda user_id: _answered(use_cases.count_for_user(repo, user_id, "events")),
+        lambda event_id: _answered(use_cases.count_users_of(repo, "events", event_id)),
+        lambda: [(row["id"], row["users"]) for row in _answered(use_cases.top_targets(repo, "events", 10))],
+        lambda: [(row["user_id"], row["count"]) for row in _answered(use_cases.top_users(repo, "events", 10))],
+    )
+    context["use_case_pushdown"] = answers
+    return {"rows": answers["users"], "queries": 3 + 2 * len(context["use_case_users"])}
+
+
+@benchmark("mongo.use_cases.client_side", "usecases", setup=_use_case_repo, compared=False)
+def bench_use_cases_client_side(context: Dict[str, Any]) -> Dict[str, Any]:
+    """The same questions answered the pre-index way: pull documents and count in Python."""
+    from collections import Counter
+    repo = context["use_case_repo"]
+
+    def top_targets():
+        counts = Counter(event for document in repo.find_many("users", {}) for event in document.get("events", ()))
+        return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:10]
+
+    def top_users():
+        sizes = [(document["user_id"], len(document.get("events", ()))) for document in repo.find_many("users", {})]
+        return sorted((item for item in sizes if item[1]), key=lambda item: (-item[1], item[0]))[:10]
+
+    answers = _use_case_answers(
+        context,
+        lambda: len(repo.find_many("users", {})),
+        lambda user_id: len(repo.find_one("users", {"user_id": user_id}).get("events", ())),
+        lambda event_id: sum(event_id in document.get("events", ()) for document in repo.find_many("users", {})),
+        top_targets,
+        top_users,
+    )
+    pushdown = context.get("use_case_pushdown")
+    check(pushdown is None or answers == pushdown, "client-side answers differ from the pushdown ones")
+    return {"rows": answers["users"], "queries": 3 + 2 * len(context["use_case_users"]),
+            "matches_pushdown": answers == pushdown if pushdown else None}
+
+
+def _async_mongo_fixture(context: Dict[str, Any]):
+    """A small users collection (built with one insert_many from the head of the file) for the async benchmark."""
+    if "async_mongo" not in context:
+        from scripts.import_csv_to_mongo import RELATION_MAP, group_by_user
+        from scripts.relation_reader import iter_relation_batches
+        repo = _mongomock_repo()
+        batch = next(iter_relation_batches(context["file"], RELATION_MAP, ASYNC_ROWS), None)
+        documents = group_by_user(batch.rows() if batch else ())
+        repo.insert_many("users", [{"user_id": user_id, **fields} for user_id, fields in documents.items()])
+        context["async_mongo"] = repo
+        context["async_users"] = sorted(documents)[:USE_CASE_SAMPLE]
+    return context["async_mongo"]
+
+
+def _async_answers(context: Dict[str, Any], repo, gathered: bool):
+    """One find_many per sampled user, awaited in turn or gathered."""
+    import asyncio
+
+    async def answers():
+        requests = [("users", {"user_id": user_id}) for user_id in context["async_users"]]
+        if gathered:
+            return await repo.find_many_all(requests)
+        return [await repo.find_many(collection_name, query) for collection_name, query in requests]
+    started = time.perf_counter()
+    result = asyncio.run(answers())
+    return result, time.perf_counter() - started
+
+
+@benchmark("async.mongo.gather", "async", setup=_async_mongo_fixture)
+def bench_async_mongo(context: Dict[str, Any]) -> Dict[str, Any]:
+    """AsyncMongoDBRepo over mongomock with a simulated round trip: sequential awaits vs gather."""
+    import asyncio
+    try:
+        from data.repo.AsyncMongoDbRepo import AsyncMongoDBRepo
+    except ImportError:
+        raise BenchmarkSkipped("motor is not installed")
+    from src.features.profile_store import get_profiles
+    sync_repo = context["async_mongo"]
+    client = FakeAsyncMongoClient(sync_repo._driver, latency=ASYNC_LATENCY)
+    repo = AsyncMongoDBRepo.from_driver(client, "benchmark")
+    users = context["async_users"]
+
+    sequential, sequential_seconds = _async_answers(context, repo, gathered=False)
+    peak_before = client.peak_in_flight
+    gathered, gathered_seconds = _async_answers(context, repo, gathered=True)
+    expected = [sync_repo.find_many("users", {"user_id": user_id}) for user_id in users]
+    check(gathered == sequential == expected, "async find_many results differ from MongoDBRepo.find_many")
+    check(peak_before == 1 and client.peak_in_flight > 1, "gathered finds did not overlap")
+
+    async def other_calls():
+        profiles = await get_profiles(repo, users, "users")
+        streamed = [document async for chunk in repo.iter_many("users", {}, {"_id": 0, "user_id": 1}, chunk_size=500)
+                    for document in chunk]
+        count = await repo.count_documents("users", {})
+        top = await repo.aggregate("users", TOP_EVENT_USERS)
+        return profiles, streamed, count, top
+    profiles, streamed, count, top = asyncio.run(other_calls())
+    check([profiles[user_id] for user_id in users] == [documents[0] for documents in expected],
+          "get_profiles differs from find_one")
+    check(len(streamed) == count == sync_repo.count_documents("users", {}), "iter_many / count_documents disagree")
+    check(top and top == sync_repo.aggregate("users", TOP_EVENT_USERS), "async aggregate differs from MongoDBRepo.aggregate")
+    return {"rows": len(users), "sequential_ms": round(sequential_seconds * 1000, 1),
+            "gathered_ms": round(gathered_seconds * 1000, 1), **client.stats()}
+
+
+async def _collect(items) -> List[Any]:
+    return [item async for item in items]
+
+
+def _activity_responder(query: str, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # deterministic rows per (statement, user), enough to tell the fan-out results apart
+    if "filters" in parameters:
+        return [{"n": dict(parameters["filters"])}]
+    user_id = parameters.get("user_id", "")
+    return [{"id": f"{user_id}:{len(query)}:{i}"} for i in range(len(query) % 4)]
+
+
+@benchmark("async.neo4j.gather", "async")
+def bench_async_neo4j(context: Dict[str, Any]) -> Dict[str, Any]:
+    """fetch_activity (four relationship queries per user) awaited in turn vs gathered across users."""
+    import asyncio
+    from data.repo.AsyncNeo4jRepo import AsyncNeo4jRepo
+    from data.repo.Neo4jRepo import Neo4jRepo
+    from src.features.profile_store import PROFILE_RELATIONS, activity_queries, fetch_activity
+    driver = FakeAsyncNeo4jDriver(_activity_responder, latency=ASYNC_LATENCY)
+    repo = AsyncNeo4jRepo.from_driver(driver, "neo4j")
+    users = [str(user) for user in range(USE_CASE_SAMPLE)]
+
+    async def sequential():
+        # one statement at a time, the way the synchronous repo runs them
+        return [await repo.execute_query(query, parameters)
+                for user_id in users for query, parameters in activity_queries(user_id)]
+
+    async def gathered():
+        return await asyncio.gather(*(fetch_activity(repo, user_id) for user_id in users))
+
+    started = time.perf_counter()
+    rows = asyncio.run(sequential())
+    sequential_seconds = time.perf_counter() - started
+    check(driver.peak_sessions == 1, "sequential awaits overlapped")
+    started = time.perf_counter()
+    activity = asyncio.run(gathered())
+    gathered_seconds = time.perf_counter() - started
+    check(driver.peak_sessions >= 4, f"fetch_activity did not fan out (peak {driver.peak_sessions} sessions)")
+
+    sync_repo = Neo4jRepo.from_driver(FakeNeo4jDriver(_activity_responder), "neo4j")
+    expected = [sync_repo.execute_query(query, parameters, use_cache=False)
+                for user_id in users for query, parameters in activity_queries(user_id)]
+    check(rows == expected, "AsyncNeo4jRepo.execute_query differs from Neo4jRepo.execute_query")
+    check([ids for user in activity for ids in user.values()] == [[row["id"] for row in r] for r in expected],
+          "fetch_activity differs from the per-query results")
+    nodes = asyncio.run(repo.find_nodes("User", {"id": "7"}))
+    check(nodes == sync_repo.find_nodes("User", {"id": "7"}) == [{"id": "7"}], "async find_nodes differs")
+    streamed = asyncio.run(_collect(repo.stream_query(*activity_queries("7")[0], chunk_size=2)))
+    check([row for chunk in streamed for row in chunk] == sync_repo.execute_query(*activity_queries("7")[0]),
+          "async stream_query differs from execute_query")
+    return {**driver.stats(), "rows": len(users) * len(PROFILE_RELATIONS),
+            "sequential_ms": round(sequential_seconds * 1000, 1), "gathered_ms": round(gathered_seconds * 1000, 1)}
+
+
+@benchmark("neo4j.import_lastfm_like_file", "neo4j")
+def bench_neo4j_legacy(context: Dict[str, Any]) -> Dict[str, Any]:
+    from scripts.import_csv_to_graph import import_lastfm_like_file
+    repo, driver = _fake_neo4j_repo()
+    stats = import_lastfm_like_file(repo, context["legacy_file"])
+    return {**driver.stats(), "rows": stats["rows"], "errors": stats["errors"]}
+
+
+@benchmark("neo4j.import_lastfm_like_file_bulk", "neo4j")
+def bench_neo4j_bulk(context: Dict[str, Any]) -> Dict[str, Any]:
+    from scripts.import_csv_to_graph import import_lastfm_like_file_bulk
+    repo, driver = _fake_neo4j_repo()
+    stats = import_lastfm_like_file_bulk(repo, context["file"], context["batch_size"])
+    return {"rows": stats["rows"], **driver.stats()}
+
+
+@benchmark("pipeline.import_dual", "pipeline", compared=False)
+def bench_pipeline(context: Dict[str, Any]) -> Dict[str, Any]:
+    from scripts.pipeline import import_dual
+    mongo_repo = _mongomock_repo()
+    neo4j_repo, driver = _fake_neo4j_repo()
+    stats = import_dual(context["mongo_file"], mongo_repo, neo4j_repo, "users", context["batch_size"])
+    check(not stats.get("error"), stats.get("error"))
+    check(stats["rows"] == context["mongo_rows"], f"imported {stats['rows']} of {context['mongo_rows']} rows")
+    return {"rows": stats["rows"], "parse_seconds": round(stats["parse_seconds"], 3),
+            **{f"{name}_rows_per_sec": round(sink["rows_per_sec"]) for name, sink in stats["sinks"].items()},
+            **{f"{name}_blocked_seconds": round(sink["blocked_seconds"], 3) for name, sink in stats["sinks"].items()}}
+
+
+def _pipeline_rows(context: Dict[str, Any]) -> List[Any]:
+    from scripts.schema import RELATION_MAP
+    from scripts.relation_reader import iter_relation_batches
+    return [row for batch in iter_relation_batches(context["legacy_file"], RELATION_MAP, PIPELINE_CHECK_BATCH)
+            for row in batch.rows()]
+
+
+@benchmark("pipeline.backpressure", "pipeline")
+def bench_pipeline_backpressure(context: Dict[str, Any]) -> Dict[str, Any]:
+    from scripts.pipeline import import_dual
+    queue_size = 2
+    neo4j_repo = FakeSinkRepo()
+    mongo_repo = FakeSinkRepo(delay=lambda n: SLOW_WRITE_SECONDS, peer=neo4j_repo)
+    stats = import_dual(context["legacy_file"], mongo_repo, neo4j_repo, batch_size=PIPELINE_CHECK_BATCH,
+                        queue_size=queue_size)
+    blocked = stats["sinks"]["mongo"]["blocked_seconds"]
+    check("error" not in stats, f"import failed: {stats.get('error')}")
+    check(blocked > 0, "the reader never blocked on the slow sink")
+    # the fast sink only gets a batch once the slow sink's queue took it
+    check(mongo_repo.peak_lead <= queue_size,
+          f"the fast sink ran {mongo_repo.peak_lead} batches ahead of the slow one (queue size {queue_size})")
+    return {"rows": stats["rows"], "batches": stats["batches"], "mongo_blocked_seconds": round(blocked, 3),
+            "peak_lead": mongo_repo.peak_lead}
+
+
+@benchmark("pipeline.in_order_ack", "pipeline")
+def bench_pipeline_in_order_ack(context: Dict[str, Any]) -> Dict[str, Any]:
+    from scripts.pipeline import import_dual
+    # the sinks are slow on alternate batches, so every batch finishes first on a different sink
+    mongo_repo = FakeSinkRepo(delay=lambda n: SLOW_WRITE_SECONDS if n % 2 else 0.0)
+    neo4j_repo = FakeSinkRepo(delay=lambda n: 0.0 if n % 2 else SLOW_WRITE_SECONDS)
+    acknowledged: List[Any] = []
+    checkpoint_path = os.path.join(os.path.dirname(context["legacy_file"]), "in-order.checkpoint")
+    stats = import_dual(context["legacy_file"], mongo_repo, neo4j_repo, batch_size=PIPELINE_CHECK_BATCH,
+                        on_change=acknowledged.extend, checkpoint_path=checkpoint_path)
+    check("error" not in stats, f"import failed: {stats.get('error')}")
+    check(acknowledged == _pipeline_rows(context), "rows were acknowledged out of file order")
+    return {"rows": stats["rows"], "batches": stats["batches"]}
+
+
+@benchmark("pipeline.failed_batch", "pipeline")
+def bench_pipeline_failed_batch(context: Dict[str, Any]) -> Dict[str, Any]:
+    from scripts.checkpoint import ImportCheckpoint
+    from scripts.pipeline import import_dual
+    failed_batch = 3
+    mongo_repo = FakeSinkRepo()
+    neo4j_repo = FakeSinkRepo(fail=[failed_batch])
+    acknowledged: List[Any] = []
+    checkpoint_path = os.path.join(os.path.dirname(context["legacy_file"]), "failed-batch.checkpoint")
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    stats = import_dual(context["legacy_file"], mongo_repo, neo4j_repo, batch_size=PIPELINE_CHECK_BATCH,
+                        on_change=acknowledged.extend, checkpoint_path=checkpoint_path)
+    point = ImportCheckpoint(checkpoint_path, context["legacy_file"]).resume_point()
+    check("error" in stats, "a failed batch with a checkpoint did not stop the import")
+    check(point["batch_id"] == failed_batch - 1,
+          f"the checkpoint advanced to batch {point['batch_id']} past failed batch {failed_batch}")
+    check(acknowledged == _pipeline_rows(context)[:point["rows"]], "rows after the failed batch were acknowledged")
+    check(stats["rows"] == point["rows"], f"reported {stats['rows']} rows, {point['rows']} were committed")
+    return {"rows": point["rows"], "batches": stats["batches"], "mongo_batches": mongo_repo.writes}
+
+
+@benchmark("pipeline.on_change_error", "pipeline")
+def bench_pipeline_on_change_error(context: Dict[str, Any]) -> Dict[str, Any]:
+    import threading
+    from scripts.pipeline import import_dual
+    calls = []
+
+    def on_change(rows: List[Any]):
+        calls.append(len(rows))
+        if len(calls) == 2:
+            raise ValueError("on_change failed")
+
+    result: Dict[str, Any] = {}
+    # run on a daemon thread so a hung import fails the check instead of the whole run
+    worker = threading.Thread(target=lambda: result.update(import_dual(
+        context["legacy_file"], FakeSinkRepo(), FakeSinkRepo(), batch_size=PIPELINE_CHECK_BATCH,
+        queue_size=1, on_change=on_change)), daemon=True)
+    worker.start()
+    worker.join(PIPELINE_CHECK_TIMEOUT)
+    check(not worker.is_alive(), f"import_dual still running {PIPELINE_CHECK_TIMEOUT}s after on_change raised")
+    check("error" in result, "an on_change exception did not surface as an import error")
+    return {"rows": result["rows"], "batches": result["batches"]}
+
+
+@benchmark("reader.iter_relation_batches", "reader")
+def bench_reader(context: Dict[str, Any]) -> Dict[str, Any]:
+    from scripts.schema import RELATION_MAP
+    from scripts.relation_reader import iter_relation_batches
+    rows = sum(len(batch) for batch in iter_relation_batches(context["file"], RELATION_MAP, context["batch_size"]))
+    return {"rows": rows}
+
+
+def _graph(context: Dict[str, Any]):
+    if "graph" not in context:
+        from src.analytics.graph import load_relation_file
+        context["graph"] = load_relation_file(context["file"])
+    return context["graph"]
+
+
+@benchmark("analytics.load_relation_file", "analytics")
+def bench_load_graph(context: Dict[str, Any]) -> Dict[str, Any]:
+    from src.analytics.graph import load_relation_file
+    graph = context["graph"] = load_relation_file(context["file"])
+    return {"rows": graph.num_edges, "nodes": graph.num_nodes}
+
+
+@benchmark("analytics.degree", "analytics", setup=_graph)
+def bench_degree(context: Dict[str, Any]) -> Dict[str, Any]:
+    from src.analytics.algorithms import top_degree
+    graph = _graph(context)
+    top_degree(graph, "User", 20)
+    return {"rows": graph.num_edges}
+
+
+@benchmark("analytics.weakly_connected_components", "analytics", setup=_graph)
+def bench_wcc(context: Dict[str, Any]) -> Dict[str, Any]:
+    from src.analytics.algorithms import component_sizes, weakly_connected_components
+    graph = _graph(context)
+    sizes = component_sizes(weakly_connected_components(graph))
+    return {"rows": graph.num_edges, "components": len(sizes)}
+
+
+@benchmark("analytics.node_similarity", "analytics", setup=_graph)
+def bench_node_similarity(context: Dict[str, Any]) -> Dict[str, Any]:
+    from src.analytics.algorithms import node_similarity
+    graph = _graph(context)
+    pairs = node_similarity(graph, "User", "Event", k=10)
+    return {"rows": graph.num_edges, "pairs": len(pairs)}
+
+
+@benchmark("analytics.similarity_index", "analytics", setup=_graph)
+def bench_similarity_index(context: Dict[str, Any]) -> Dict[str, Any]:
+    from src.analytics.similarity import SimilarityIndex, compare_with_brute_force
+    graph = _graph(context)
+    index = SimilarityIndex.from_graph(graph)
+    sample = random.Random(context["seed"]).sample(index.entity_ids, min(200, len(index.entity_ids)))
+    report = compare_with_brute_force(index, sample)
+    return {"rows": graph.num_edges, "recall": report["recall"], "lsh_ms": report["lsh_ms"],
+            "brute_force_ms": report["brute_force_ms"]}
+
+
+@benchmark("analytics.build_profiles", "analytics", setup=_graph)
+def bench_profiles(context: Dict[str, Any]) -> Dict[str, Any]:
+    from src.features.profile_store import build_profiles
+    graph = _graph(context)
+    store = build_profiles(graph)
+    return {"rows": graph.num_edges, "profiles": len(store)}
+
+
+@benchmark("features.write_profiles", "analytics")
+def bench_write_profiles(context: Dict[str, Any]) -> Dict[str, Any]:
+    from data.repo.MongoDbRepo import MongoDBRepo
+    from src.analytics.graph import load_relation_file
+    from src.features.profile_store import build_profiles
+    # mongomock upserts slow down with the collection size, so the check writes a small file's profiles
+    path = os.path.join(os.path.dirname(context["legacy_file"]), "profiles.csv")
+    if not os.path.exists(path):
+        generate_relation_file(path, PROFILE_WRITE_ROWS, **context["shape"])
+    store = build_profiles(load_relation_file(path))
+    chunk_size = max(1, len(store) // 4)
+    repo = _mongomock_repo()
+    written = store.write_to_mongo(repo, chunk_size=chunk_size)
+    check(written == len(store), f"only {written}/{len(store)} profiles were written")
+
+    # a failed chunk must show up as a short count, not as every profile written
+    calls = []
+
+    def failing_replace_many(collection_name: str, key_field: str, documents: List[Dict[str, Any]]):
+        calls.append(collection_name)
+        return None if len(calls) == 2 else MongoDBRepo.replace_many(repo, collection_name, key_field, documents)
+
+    repo.replace_many = failing_replace_many
+    failed = store.write_to_mongo(repo, "profiles_retry", chunk_size=chunk_size)
+    check(failed == chunk_size, f"a failed chunk reported {failed} profiles written, {chunk_size} were")
+    return {"rows": written}
+
+
+def _incremental_files(context: Dict[str, Any]):
+    """Two small delta files (other seeds, same shape) applied on top of the legacy file."""
+    if "delta_files" not in context:
+        directory = os.path.dirname(context["legacy_file"])
+        rows = max(1, context["legacy_rows"] // 10)
+        context["delta_files"] = []
+        for offset in (1, 2):
+            path = os.path.join(directory, f"delta-{offset}.csv")
+            generate_relation_file(path, rows, **{**context["shape"], "seed": context["seed"] + offset})
+            context["delta_files"].append(path)
+    return context["delta_files"]
+
+
+@benchmark("features.verify_incremental", "incremental", setup=_incremental_files)
+def bench_verify_incremental(context: Dict[str, Any]) -> Dict[str, Any]:
+    from src.features.incremental import verify_incremental
+    # with genres, so the incremental genre histograms are compared with the rebuild too
+    item_genres = generate_item_genres(context["shape"]["events"], context["shape"]["groups"], seed=context["seed"])
+    report = verify_incremental(context["legacy_file"], context["delta_files"], item_genres)
+    for key in ("mismatched_profiles", "mismatched_signatures", "mismatched_top_k"):
+        check(report[key] == 0, f"{report[key]} {key.split('_', 1)[1].replace('_', ' ')} differ from the rebuild")
+    return {"rows": context["legacy_rows"], **report}
+
+
+def _trait_features(context: Dict[str, Any]):
+    if "trait_features" not in context:
+        from src.features.traits import baseline_trait_model, build_trait_features
+        features = context["trait_features"] = build_trait_features(_graph(context))
+        context["trait_model"] = baseline_trait_model(features)
+    return context["trait_features"]
+
+
+def _score_traits(context: Dict[str, Any], batch_size: int, workers: int) -> Dict[str, Any]:
+    import numpy as np
+    from src.features.traits import score_features
+    features = context["trait_features"]
+    started = time.perf_counter()
+    scores = score_features(features, context["trait_model"], batch_size, workers)
+    seconds = time.perf_counter() - started
+    reference = context.setdefault("trait_scores", scores)
+    return {"rows": len(features), "features": len(features.names),
+            "users_per_sec": round(len(features) / seconds) if seconds else 0,
+            "matches_batched": bool(np.allclose(scores, reference, atol=1e-5))}
+
+
+@benchmark("features.score_traits", "traits", setup=_trait_features)
+def bench_score_traits(context: Dict[str, Any]) -> Dict[str, Any]:
+    from src.features.traits import DEFAULT_SCORE_BATCH_SIZE
+    return _score_traits(context, DEFAULT_SCORE_BATCH_SIZE, 1)
+
+
+@benchmark("features.score_traits.parallel", "traits", setup=_trait_features)
+def bench_score_traits_parallel(context: Dict[str, Any]) -> Dict[str, Any]:
+    from src.features.traits import DEFAULT_SCORE_BATCH_SIZE
+    # small batches so the synthetic users are spread over both workers
+    return _score_traits(context, min(DEFAULT_SCORE_BATCH_SIZE, max(1, len(context["trait_features"]) // 8)), 2)
+
+
+@benchmark("features.score_traits.per_user", "traits", setup=_trait_features)
+def bench_score_traits_per_user(context: Dict[str, Any]) -> Dict[str, Any]:
+    # one model call per user: the baseline the batched scorer replaces
+    return _score_traits(context, 1, 1)
+
+
+@benchmark("features.write_trait_scores", "traits", setup=_trait_features)
+def bench_write_trait_scores(context: Dict[str, Any]) -> Dict[str, Any]:
+    from data.repo.MongoDbRepo import MongoDBRepo
+    from src.features.traits import score_features, write_trait_scores
+    features = context["trait_features"]
+    user_ids = features.user_ids[:TRAIT_WRITE_USERS]
+    scores = score_features(features, context["trait_model"])[:len(user_ids)]
+    chunk_size = max(1, len(user_ids) // 4)
+    repo = _mongomock_repo()
+    written = write_trait_scores(repo, user_ids, scores, chunk_size=chunk_size)
+    check(written == len(user_ids), f"only {written}/{len(user_ids)} trait scores were written")
+
+    # a failed chunk must leave the previous run's scores in place
+    calls = []
+
+    def failing_insert_many(collection_name: str, documents: List[Dict[str, Any]]):
+        calls.append(collection_name)
+        return None if len(calls) == 2 else MongoDBRepo.insert_many(repo, collection_name, documents)
+
+    repo.insert_many = failing_insert_many
+    failed = write_trait_scores(repo, user_ids[:chunk_size * 2], scores, model_name="partial", chunk_size=chunk_size)
+    check(failed == 0, f"a failed chunk still reported {failed} trait scores written")
+    check(repo.count_documents("traits", {"model": "baseline"}) == len(user_ids),
+          "a failed run replaced the previous trait scores")
+    check("traits_staging" not in repo.list_collections(), "the staging collection of a failed run was left behind")
+    return {"rows": written}
+
+
+# Recorded PROFILE reports of the same catalog queries before and after an index was dropped
+PLANS_BASELINE = os.path.join(os.path.dirname(__file__), "data", "plans-baseline.json")
+PLANS_REGRESSED = os.path.join(os.path.dirname(__file__), "data", "plans-regressed.json")
+EXPECTED_PLAN_FINDINGS = {
+    ("usecase.event.users", "missing_operator"),
+    ("usecase.event.users", "plan_regression"),
+    ("usecase.event.users", "db_hits_regression"),
+    ("usecase.activity.users", "forbidden_operator"),
+    ("usecase.activity.users", "plan_regression"),
+    ("usecase.activity.users", "db_hits_regression"),
+    ("usecase.activity.per_user", "db_hits_regression"),
+}
+
+
+@benchmark("plans.check_recorded", "plans")
+def bench_check_plans(context: Dict[str, Any]) -> Dict[str, Any]:
+    from scripts.query_plans import check_plans, load_report
+    baseline, regressed = load_report(PLANS_BASELINE), load_report(PLANS_REGRESSED)
+    clean = check_plans(baseline)
+    check(not clean, f"the recorded baseline has findings: {clean}")
+    findings = check_plans(regressed, baseline)
+    found = {(finding["query"], finding["issue"]) for finding in findings}
+    check(found == EXPECTED_PLAN_FINDINGS, f"unexpected findings {sorted(found - EXPECTED_PLAN_FINDINGS)}, "
+                                           f"missed {sorted(EXPECTED_PLAN_FINDINGS - found)}")
+    check(all(finding["severity"] == "error" for finding in findings), "a regression was reported as a warning")
+    return {"rows": len(regressed["queries"]), "findings": len(findings)}
+
+
+LOG_RECORDS = 50000
+# Per-write latency of the simulated slow sink (a busy terminal, a network filesystem)
+SLOW_SINK_SECONDS = 0.00005
+
+
+class _SlowFileHandler(logging.FileHandler):
+    def emit(self, record: logging.LogRecord):
+        time.sleep(SLOW_SINK_SECONDS)
+        super().emit(record)
+
+
+def _log_rows(queued: bool, every: int = 1, records: int = LOG_RECORDS, slow: bool = False) -> Dict[str, Any]:
+    """
+    Log one INFO record per row to a file and time the calling thread (and the drain, when queued).
+    Rows are logged on a child of the sampled logger, like a repo module under "data.repo".
+    """
+    from logs.init_logger import queue_handlers, sample_logger, stop_logging
+    target = logging.getLogger("benchmarks.logging")
+    source = logging.getLogger("benchmarks.logging.rows")
+    target.propagate = False
+    target.setLevel(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        handler = (_SlowFileHandler if slow else logging.FileHandler)(os.path.join(directory, "rows.log"),
+                                                                     encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s | %(levelname)-8s | %(name)s | %(funcName)s | "
+                                               "Line %(lineno)d | %(message)s"))
+        target.addHandler(handler)
+        if queued:
+            queue_handlers(target)
+        sample_logger(target.name, every)
+        # the runner disables INFO logging around the benchmarks; this one measures it
+        disabled = logging.root.manager.disable
+        logging.disable(logging.NOTSET)
+        try:
+            started = time.perf_counter()
+            for row in range(records):
+                source.info("Updated %d document(s) in '%s'.", row, "users")
+            caller_seconds = time.perf_counter() - started
+            stop_logging(target)
+            drained_seconds = time.perf_counter() - started
+        finally:
+            logging.disable(disabled)
+        for handler in list(target.handlers):
+            target.removeHandler(handler)
+            handler.close()
+        with open(os.path.join(directory, "rows.log"), "r", encoding="utf-8") as f:
+            written = sum(1 for _ in f)
+    expected = -(-records // every)
+    check(written == expected, f"{written} of {records} records were written, expected {expected} (one in {every})")
+    return {"rows": records, "caller_ms": round(caller_seconds * 1000, 1),
+            "drained_ms": round(drained_seconds * 1000, 1)}
+
+
+@benchmark("logging.sync", "logging")
+def bench_logging_sync(context: Dict[str, Any]) -> Dict[str, Any]:
+    return _log_rows(queued=False)
+
+
+@benchmark("logging.queued", "logging")
+def bench_logging_queued(context: Dict[str, Any]) -> Dict[str, Any]:
+    return _log_rows(queued=True)
+
+
+@benchmark("logging.queued_sampled", "logging")
+def bench_logging_queued_sampled(context: Dict[str, Any]) -> Dict[str, Any]:
+    return _log_rows(queued=True, every=100)
+
+
+@benchmark("logging.sync_slow_sink", "logging")
+def bench_logging_sync_slow_sink(context: Dict[str, Any]) -> Dict[str, Any]:
+    return _log_rows(queued=False, records=LOG_RECORDS // 10, slow=True)
+
+
+@benchmark("logging.queued_slow_sink", "logging")
+def bench_logging_queued_slow_sink(context: Dict[str, Any]) -> Dict[str, Any]:
+    # the caller only enqueues; the sink's latency is paid by the listener thread (see drained_ms)
+    return _log_rows(queued=True, records=LOG_RECORDS // 10, slow=True)
+
+
+def run_benchmarks(context: Dict[str, Any], only: Optional[List[str]] = None, repeat: int = 1) -> List[Dict[str, Any]]:
+    """Run the selected benchmarks (by name or group) and return one result per benchmark (best of `repeat`)."""
+    results = []
+    for name, (group, fn, setup, compared) in BENCHMARKS.items():
+        if only and name not in only and group not in only:
+            continue
+        result: Dict[str, Any] = {"name": name, "group": group}
+        if not compared:
+            result["compared"] = False
+        try:
+            if setup:
+                setup(context)
+            best = None
+            for _ in range(max(1, repeat)):
+                started = time.perf_counter()
+                extra = fn(context)
+                seconds = time.perf_counter() - started
+                if best is None or seconds < best[0]:
+                    best = (seconds, extra)
+            seconds, extra = best
+            result.update(seconds=seconds, rows_per_sec=extra.get("rows", 0) / seconds if seconds else 0.0, **extra)
+        except BenchmarkSkipped as e:
+            result["skipped"] = str(e)
+        except CheckFailed as e:
+            result["failed"] = str(e)
+        except Exception as e:
+            logger.exception(f"Benchmark '{name}' failed: {e}")
+            result["error"] = str(e)
+        results.append(result)
+        print(_format_result(result), flush=True)
+    return results
+
+
+def compare_results(previous: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Benchmarks whose time grew by more than `threshold` (a fraction) between two result files.
+    Correctness-only results (`"compared": false`) are skipped.
+    """
+    before = {r["name"]: r for r in previous.get("results", []) if "seconds" in r}
+    regressions = []
+    for result in current.get("results", []):
+        old = before.get(result["name"])
+        if old is None or "seconds" not in result or not old["seconds"] or result.get("compared") is False:
+            continue
+        change = result["seconds"] / old["seconds"] - 1
+        if change > threshold:
+            regressions.append({"name": result["name"], "before": old["seconds"],
+                                "after": result["seconds"], "change": change})
+    return regressions
+
+
+def _format_result(result: Dict[str, Any]) -> str:
+    if "skipped" in result:
+        return f"{result['name']:<42} skipped ({result['skipped']})"
+    if "error" in result:
+        return f"{result['name']:<42} error ({result['error']})"
+    if "failed" in result:
+        return f"{result['name']:<42} FAILED ({result['failed']})"
+    line = f"{result['name']:<42} {result['seconds']:>9.3f}s {result['rows_per_sec']:>12.0f} rows/s"
+    if "statements" in result:
+        line += f"  round_trips={result['round_trips']} statements={result['statements']}"
+    if result.get("compared") is False:
+        line += "  (correctness only)"
+    return line
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="benchmarks", description="Time the ingestion and analytics paths.")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="rows in the synthetic file")
+    parser.add_argument("--legacy-rows", type=int, default=DEFAULT_LEGACY_ROWS,
+                        help="rows for the row-at-a-time importers")
+    parser.add_argument("--mongo-rows", type=int, default=DEFAULT_MONGO_ROWS,
+                        help="rows for the mongomock-bound, correctness-only benchmarks")
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--groups", type=int, default=5000)
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of users and targets (0 = uniform)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=1, help="keep the best of N runs")
+    parser.add_argument("--only", default="", help="comma separated benchmark names or groups")
+    parser.add_argument("--input", help="use an existing relation file instead of a synthetic one")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="previous results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.list:
+        for name, (group, _, _, compared) in BENCHMARKS.items():
+            print(f"{group:<10} {name}" + ("" if compared else "  (correctness only)"))
+        return 0
+
+    # keep importer progress logs out of the timings
+    logging.disable(logging.INFO)
+    try:
+        with tempfile.TemporaryDirectory(prefix="redeye-bench-") as workdir:
+            shape = dict(users=args.users, events=args.events, groups=args.groups, skew=args.skew, seed=args.seed)
+            if args.input:
+                input_file, rows = args.input, None
+            else:
+                input_file, rows = os.path.join(workdir, "relations.csv"), args.rows
+                generate_relation_file(input_file, rows, **shape)
+            legacy_file = os.path.join(workdir, "legacy.csv")
+            generate_relation_file(legacy_file, args.legacy_rows, **shape)
+            mongo_file = os.path.join(workdir, "mongo.csv")
+            generate_relation_file(mongo_file, args.mongo_rows, **shape)
+
+            context = {"file": input_file, "legacy_file": legacy_file, "legacy_rows": args.legacy_rows,
+                       "mongo_file": mongo_file, "mongo_rows": args.mongo_rows,
+                       "batch_size": args.batch_size, "seed": args.seed, "shape": shape}
+            only = [item for item in args.only.split(",") if item]
+            results = run_benchmarks(context, only, args.repeat)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "input": args.input, "rows": rows, "legacy_rows": args.legacy_rows, "mongo_rows": args.mongo_rows,
+            "batch_size": args.batch_size, "repeat": args.repeat, **shape,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to '{args.output}'.")
+
+    failed = [result["name"] for result in results if "failed" in result]
+    if failed:
+        print(f"FAILED checks: {', '.join(failed)}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        regressions = compare_results(previous, report, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['name']}: {regression['before']:.3f}s -> "
+                  f"{regression['after']:.3f}s (+{regression['change']:.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions above {args.threshold:.0%}.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import logging
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Share of rows per relation type, roughly the mix of the LastFM multigraph
+DEFAULT_RELATION_WEIGHTS = {"event": 0.45, "friend": 0.2, "group": 0.25, "neighbor": 0.1}
+DEFAULT_GENRES = ("rock", "pop", "jazz", "electronic", "hip-hop", "classical", "metal", "folk")
+
+
+def _zipf_draw(rng: np.random.Generator, n: int, size: int, skew: float) -> np.ndarray:
+    """`size` draws from range(n) with P(rank r) proportional to 1 / r**skew (uniform for skew 0)."""
+    if skew <= 0:
+        return rng.integers(0, n, size=size)
+    weights = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** skew
+    cumulative = np.cumsum(weights)
+    draws = np.searchsorted(cumulative, rng.random(size) * cumulative[-1])
+    # scatter popular ranks across the id space so popularity is not ordered by id
+    return rng.permutation(n)[np.minimum(draws, n - 1)]
+
+
+def generate_relation_file(path: str, rows: int, users: int = 50000, events: int = 20000, groups: int = 5000,
+                           skew: float = 1.0, relation_weights: Optional[Dict[str, float]] = None,
+                           unknown_fraction: float = 0.0, seed: int = 7, chunk_rows: int = 1_000_000) -> Dict[str, float]:
+    """
+    Write a synthetic LastFM-style `user|relation|target` file.
+
+    Users and targets follow a Zipf distribution with exponent `skew`, so a few users and events
+    carry most of the edges like in the real data. `unknown_fraction` of the rows use a relation
+    the importers skip. Returns a small summary of the generated file.
+    """
+    rng = np.random.default_rng(seed)
+    weights = relation_weights or DEFAULT_RELATION_WEIGHTS
+    relations = list(weights)
+    probabilities = np.array([weights[r] for r in relations], dtype=np.float64)
+    probabilities /= probabilities.sum()
+    target_space = {"event": events, "group": groups, "friend": users, "neighbor": users}
+
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < rows:
+            size = min(chunk_rows, rows - written)
+            user_ids = _zipf_draw(rng, users, size, skew)
+            kinds = rng.choice(len(relations), size=size, p=probabilities)
+            targets = np.empty(size, dtype=np.int64)
+            for k, relation in enumerate(relations):
+                mask = kinds == k
+                targets[mask] = _zipf_draw(rng, target_space.get(relation, users), int(mask.sum()), skew)
+            names = np.array(relations, dtype=object)[kinds]
+            if unknown_fraction > 0:
+                names[rng.random(size) < unknown_fraction] = "unknown"
+            f.write("".join(f"{u}|{r}|{t}\n" for u, r, t in zip(user_ids.tolist(), names.tolist(), targets.tolist())))
+            written += size
+
+    summary = {"rows": rows, "users": users, "events": events, "groups": groups, "skew": skew, "seed": seed}
+    logger.info(f"Generated synthetic relation file '{path}': {summary}")
+    return summary
+
+
+def generate_item_genres(events: int = 20000, groups: int = 5000, genres: Sequence[str] = DEFAULT_GENRES,
+                         coverage: float = 0.8, seed: int = 7) -> Dict[Tuple[str, str], str]:
+    """
+    (label, id) -> genre for the Event and Group ids generate_relation_file draws, like
+    load_item_genres_from_neo4j returns. Only a `coverage` share of the items has a genre.
+    """
+    rng = np.random.default_rng(seed)
+    item_genres = {}
+    for label, count in (("Event", events), ("Group", groups)):
+        tagged = np.flatnonzero(rng.random(count) < coverage)
+        picks = rng.integers(0, len(genres), size=len(tagged))
+        item_genres.update({(label, str(item)): genres[pick] for item, pick in zip(tagged.tolist(), picks.tolist())})
+    return item_genres
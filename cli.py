@@ -1,8 +1,12 @@
 import logging
-from scripts.import_csv_to_mongo import import_lastfm_file
-from scripts.import_csv_to_graph import import_lastfm_like_file
+from scripts.import_csv_to_mongo import import_lastfm_file, import_lastfm_file_aggregated, DEFAULT_CHUNK_SIZE
+from scripts.import_csv_to_graph import import_lastfm_like_file, import_lastfm_like_file_bulk, DEFAULT_BATCH_SIZE
+from scripts.parallel_import import import_parallel
+from scripts.checkpoint import default_checkpoint_path
 from data.repo.MongoDbRepo import MongoDBRepo
 from data.repo.Neo4jRepo import Neo4jRepo
+from data.database.DriverRegistry import registry, DEFAULT_MAX_POOL_SIZE
+from logs.metrics import metrics
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
@@ -15,21 +19,78 @@ class Cli:
     """
 
     @staticmethod
-    def import_to_mongo(uri: str, port: str, db: str, input_file: str, collection_name: str = "users"):
-        repo = MongoDBRepo(uri, port, db)
-        logger.info(f"Importing '{input_file}' into MongoDB collection '{collection_name}'...")
-        import_lastfm_file(repo, input_file, collection_name)
-        repo.close()
+    def import_to_mongo(uri: str, port: str, db: str, input_file: str, collection_name: str = "users",
+                        chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1,
+                        pool_size: int = DEFAULT_MAX_POOL_SIZE, resume: bool = False):
+        # batched imports always checkpoint, so any interrupted run can be resumed
+        checkpoint_path = default_checkpoint_path(input_file, f"mongo-{collection_name}")
+        if workers > 1:
+            logger.info(f"Importing '{input_file}' into MongoDB collection '{collection_name}' with {workers} workers...")
+            import_parallel(input_file, workers, mongo={"uri": uri, "port": port, "db": db},
+                            collection_name=collection_name, batch_size=chunk_size or DEFAULT_BATCH_SIZE,
+                            checkpoint_path=checkpoint_path, resume=resume)
+            return
+        with MongoDBRepo.shared(uri, port, db, pool_size) as repo:
+            logger.info(f"Importing '{input_file}' into MongoDB collection '{collection_name}'...")
+            if chunk_size > 0:
+                import_lastfm_file_aggregated(repo, input_file, collection_name, chunk_size,
+                                              checkpoint_path=checkpoint_path, resume=resume)
+            else:
+                # chunk_size 0 keeps the original one-document-per-row import
+                if resume:
+                    print("--resume needs a chunk_size > 0; the row-by-row import always starts over.")
+                import_lastfm_file(repo, input_file, collection_name)
 
     @staticmethod
-    def import_to_neo4j(uri: str, user: str, db: str, password: str, input_file: str):
-        repo = Neo4jRepo(db, uri, user, password)
-        logger.info(f"Importing '{input_file}' into Neo4j...")
-        import_lastfm_like_file(repo, input_file)
-        repo.close()
-    
+    def import_to_neo4j(uri: str, user: str, db: str, password: str, input_file: str,
+                        batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 1,
+                        pool_size: int = DEFAULT_MAX_POOL_SIZE, resume: bool = False):
+        checkpoint_path = default_checkpoint_path(input_file, f"neo4j-{db}")
+        if workers > 1:
+            logger.info(f"Importing '{input_file}' into Neo4j with {workers} workers...")
+            import_parallel(input_file, workers,
+                            neo4j={"uri": uri, "user": user, "password": password, "db": db},
+                            batch_size=batch_size or DEFAULT_BATCH_SIZE,
+                            checkpoint_path=checkpoint_path, resume=resume)
+            return
+        with Neo4jRepo.shared(db, uri, user, password, pool_size) as repo:
+            logger.info(f"Importing '{input_file}' into Neo4j (batch size {batch_size})...")
+            if batch_size > 0:
+                import_lastfm_like_file_bulk(repo, input_file, batch_size,
+                                             checkpoint_path=checkpoint_path, resume=resume)
+            else:
+                # batch_size 0 keeps the original row-by-row import
+                if resume:
+                    print("--resume needs a batch_size > 0; the row-by-row import always starts over.")
+                import_lastfm_like_file(repo, input_file)
+
+    @staticmethod
+    def _pop_option(args: list, name: str, default: int) -> int:
+        """Remove `name <value>` from args (wherever it appears) and return the value as int."""
+        if name in args:
+            index = args.index(name)
+            value = int(args[index + 1])
+            del args[index:index + 2]
+            return value
+        return default
+
+    @staticmethod
+    def _pop_flag(args: list, name: str) -> bool:
+        """Remove every occurrence of the flag `name` from args and report whether it was present."""
+        present = name in args
+        args[:] = [arg for arg in args if arg != name]
+        return present
+
     @staticmethod
     def start():
+        """Run the command loop; pooled drivers stay warm across commands and are closed on exit."""
+        try:
+            Cli._loop()
+        finally:
+            registry.close_all()
+
+    @staticmethod
+    def _loop():
         print("=== Interactive CLI Started ===")
         print("Type 'help' for available commands, 'exit' to quit.\n")
 
@@ -46,29 +107,53 @@ class Cli:
                 elif command.lower() == "help":
                     print("""
                             Available commands:
-                            import_mongo <uri> <port> <db> <input_file> [collection_name]
-                            import_neo4j <uri> <user> <password> <input_file>
+                            import_mongo <uri> <port> <db> <input_file> [collection_name] [chunk_size] [--workers N]
+                            import_neo4j <uri> <user> <password> <db> <input_file> [batch_size] [--workers N]
+                            health
+                            metrics [json|prometheus] [output_file]
+                            (import commands also accept --pool-size N and --resume)
                             exit
                         """)
                 else:
                     parts = command.split()
                     cmd = parts[0]
                     args = parts[1:]
+                    workers = Cli._pop_option(args, "--workers", 1)
+                    pool_size = Cli._pop_option(args, "--pool-size", DEFAULT_MAX_POOL_SIZE)
+                    resume = Cli._pop_flag(args, "--resume")
 
                     if cmd == "import_mongo": #MongoDB csv import
-                        if len(args) < 5:
-                            print("Usage: import_mongo <uri> <port> <db> <input_file> [collection_name]")
+                        if len(args) < 4:
+                            print("Usage: import_mongo <uri> <port> <db> <input_file> [collection_name] [chunk_size] [--workers N]")
                         else:
-                            uri, port, db, input_file = args[:5]
+                            uri, port, db, input_file = args[:4]
                             collection = args[4] if len(args) > 4 else "users"
-                            Cli.import_to_mongo(uri, int(port), db, input_file, collection)
+                            chunk_size = int(args[5]) if len(args) > 5 else DEFAULT_CHUNK_SIZE
+                            Cli.import_to_mongo(uri, int(port), db, input_file, collection, chunk_size, workers, pool_size,
+                                                resume)
 
                     elif cmd == "import_neo4j": # Neo4j csv import
                         if len(args) < 5:
-                            print("Usage: import_neo4j <uri> <user> <password> <db> <input_file>")
+                            print("Usage: import_neo4j <uri> <user> <password> <db> <input_file> [batch_size] [--workers N]")
                         else:
                             uri, user, password, db, input_file = args[:5]
-                            Cli.import_to_neo4j(uri, user, db, password, input_file)
+                            batch_size = int(args[5]) if len(args) > 5 else DEFAULT_BATCH_SIZE
+                            Cli.import_to_neo4j(uri, user, db, password, input_file, batch_size, workers, pool_size,
+                                                resume)
+
+                    elif cmd == "health": # ping every pooled driver
+                        for target, healthy in registry.health_check().items():
+                            print(f"{target}: {'ok' if healthy else 'unreachable'}")
+
+                    elif cmd == "metrics": # latency histograms, import throughput and error counters
+                        fmt = args[0] if args else "json"
+                        text = metrics.to_prometheus() if fmt == "prometheus" else metrics.to_json(indent=2)
+                        if len(args) > 1:
+                            with open(args[1], "w", encoding="utf-8") as f:
+                                f.write(text)
+                            print(f"Metrics written to '{args[1]}'.")
+                        else:
+                            print(text)
 
                     else:
                         print(f"Unknown command: {cmd}. Type 'help' for help.")
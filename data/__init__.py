@@ -1,5 +1,6 @@
 from .database.MongoDbClient import MongoDbClient
 from .database.Neo4jClient import Neo4jClient
+from .database.DriverRegistry import DriverRegistry, registry
 
 from .repo.MongoDbRepo import MongoDBRepo
 from .repo.Neo4jRepo import Neo4jRepo
\ No newline at end of file
@@ -0,0 +1,31 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AsyncMongoDbClient:
+    def __init__(self, uri: str, port: int):
+        self._uri = uri
+        self._port = port
+        self._driver = None
+
+    def connect(self):
+        try:
+            driver = AsyncIOMotorClient(self._uri, port=self._port)
+            self._driver = driver
+
+            logger.info("Async Mongo db driver Instantiated succesfully and is waiting to verify Connection ...")
+            return driver
+
+        except ConnectionError as e:
+            logger.exception(f"Async Mongo db driver failed to Instantiate: {e}")
+
+    def close(self):
+        try:
+            if self._driver is None:
+                logger.error("No async Mongo DB driver is created")
+                return
+            self._driver.close()
+
+        except ConnectionError as e:
+            logger.exception(f"Failed to close the connection: {e}")
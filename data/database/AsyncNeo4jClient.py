@@ -0,0 +1,30 @@
+from neo4j import AsyncGraphDatabase
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AsyncNeo4jClient:
+    def __init__(self, connection_uri):
+        self._uri = connection_uri
+        self._driver = None
+
+    def connect(self, username, password, db):
+        try:
+            AUTH = (username, password)
+            driver = AsyncGraphDatabase.driver(self._uri, auth=AUTH, database=db)
+            self._driver = driver
+            logger.info("Async Neo4j Client Instantiated and waiting to verify connection ...")
+            return driver
+        except Exception as e:
+            logger.exception(f"Async Neo4j client failed to connect with exception: {e}")
+
+    async def close(self):
+        try:
+            if self._driver is None:
+                logger.error("Async Neo4j Client already does not exist")
+                return
+            await self._driver.close()
+            logger.info("Async Neo4j client channel closed successfully")
+
+        except Exception as e:
+            logger.exception(f"Async Neo4j client failed to close the channel: {e}")
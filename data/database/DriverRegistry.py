@@ -0,0 +1,134 @@
+import atexit
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .MongoDbClient import MongoDbClient
+from .Neo4jClient import Neo4jClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_POOL_SIZE = 100
+# Seconds a pooled driver is trusted before the next checkout pings it again
+DEFAULT_HEALTH_CHECK_INTERVAL = 30.0
+
+
+class DriverRegistry:
+    """
+    Process-wide cache of database drivers keyed by connection target.
+
+    Each distinct Mongo (uri, port) and Neo4j (uri, user, credentials, db) gets a single pooled driver
+    that is reused by every repo asking for it, so the TCP/auth handshake is paid once per process instead
+    of once per command. Drivers idle for longer than `health_check_interval` are pinged on checkout
+    and rebuilt if the ping fails. Use `registry` (the module-level instance) rather than creating
+    new registries, and call `close_all()` (also registered with atexit) on shutdown.
+    """
+
+    def __init__(self, health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL):
+        self._health_check_interval = health_check_interval
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple, Any] = {}
+        self._drivers: Dict[Tuple, Any] = {}
+        self._checked_at: Dict[Tuple, float] = {}
+        # keys a credential fingerprint, so the password itself never sits in a key or a log line
+        self._secret = os.urandom(16)
+
+    def __enter__(self) -> "DriverRegistry":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close_all()
+
+    def get_mongo(self, uri: str, port: int, max_pool_size: int = DEFAULT_MAX_POOL_SIZE):
+        """Return the pooled MongoClient for (uri, port), creating it on first use."""
+        key = ("mongo", uri, int(port))
+        with self._lock:
+            driver = self._checkout(key)
+            if driver is None:
+                client = MongoDbClient(uri, int(port), maxPoolSize=max_pool_size)
+                driver = self._register(key, client, client.connect())
+            return driver
+
+    def get_neo4j(self, uri: str, user: str, password: str, db: str,
+                  max_pool_size: int = DEFAULT_MAX_POOL_SIZE):
+        """
+        Return the pooled Neo4j driver for (uri, user, password, db), creating it on first use. Asking
+        with other credentials for the same user opens a separate driver instead of reusing this one.
+        """
+        key = ("neo4j", uri, user, self._fingerprint(user, password), db)
+        with self._lock:
+            driver = self._checkout(key)
+            if driver is None:
+                client = Neo4jClient(uri)
+                driver = self._register(key, client, client.connect(user, password, db,
+                                                                    max_connection_pool_size=max_pool_size))
+            return driver
+
+    def health_check(self) -> Dict[str, bool]:
+        """Ping every pooled driver and return {target: healthy}."""
+        with self._lock:
+            return {" ".join(map(str, key)): self._ping(key, driver) for key, driver in self._drivers.items()}
+
+    def close(self, key: Tuple):
+        """Close and forget a single pooled driver."""
+        with self._lock:
+            self._evict(key)
+
+    def close_all(self):
+        """Close every pooled driver."""
+        with self._lock:
+            for key in list(self._drivers):
+                self._evict(key)
+
+    def _fingerprint(self, user: str, password: Optional[str]) -> str:
+        credentials = f"{user}\0{'' if password is None else password}".encode("utf-8")
+        return hmac.new(self._secret, credentials, hashlib.sha256).hexdigest()[:16]
+
+    def _checkout(self, key: Tuple) -> Optional[Any]:
+        driver = self._drivers.get(key)
+        if driver is None:
+            return None
+        if time.monotonic() - self._checked_at[key] < self._health_check_interval:
+            return driver
+        if self._ping(key, driver):
+            return driver
+        logger.warning(f"Pooled driver for {key} failed its health check; reconnecting.")
+        self._evict(key)
+        return None
+
+    def _register(self, key: Tuple, client: Any, driver: Any) -> Any:
+        if driver is None:
+            raise ConnectionError(f"Failed to create driver for {key}")
+        self._clients[key] = client
+        self._drivers[key] = driver
+        self._checked_at[key] = time.monotonic()
+        logger.info(f"Registered pooled driver for {key}.")
+        return driver
+
+    def _ping(self, key: Tuple, driver: Any) -> bool:
+        try:
+            if key[0] == "mongo":
+                driver.admin.command("ping")
+            else:
+                driver.verify_connectivity()
+            self._checked_at[key] = time.monotonic()
+            return True
+        except Exception as e:
+            logger.warning(f"Health check failed for {key}: {e}")
+            return False
+
+    def _evict(self, key: Tuple):
+        client = self._clients.pop(key, None)
+        self._drivers.pop(key, None)
+        self._checked_at.pop(key, None)
+        if client is not None:
+            client.close()
+            logger.info(f"Closed pooled driver for {key}.")
+
+
+registry = DriverRegistry()
+atexit.register(registry.close_all)
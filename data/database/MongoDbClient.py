@@ -4,13 +4,16 @@ import logging
 logger = logging.getLogger(__name__)
 
 class MongoDbClient:
-    def __init__(self, uri: str, port:int):
+    def __init__(self, uri: str, port:int, **options):
+        """`options` are passed through to MongoClient (e.g. maxPoolSize, minPoolSize)."""
         self._uri = uri
         self._port = port
+        self._options = options
+        self._driver = None
 
     def connect(self):
         try:
-            driver = MongoClient(self._uri, port = self._port)
+            driver = MongoClient(self._uri, port = self._port, **self._options)
             self._driver = driver
             
             logger.info("Mongo db driver Instantiated succesfully and is waiting to verify Connection ...")
@@ -23,8 +26,9 @@ class MongoDbClient:
         try:
             if self._driver is None:
                 logger.error("No Mongo DB driver is created")
-                assert "No Mongo DB driver is created"
+                return
             self._driver.close()
+            self._driver = None
 
         except ConnectionError as e:
-            logger.exception(f"Failed to close the connection: {e}")
\ No newline at end of file
+            logger.exception(f"Failed to close the connection: {e}")
@@ -1,32 +1,32 @@
 from neo4j import GraphDatabase
-import logging;
+import logging
 
 logger = logging.getLogger(__name__)
 
 class Neo4jClient:
     def __init__(self, connection_uri):
         self._uri = connection_uri
+        self._driver = None
 
-    # Need to make the logger 
-    def connect(self, username, password, db):
+    def connect(self, username, password, db, **options):
+        """Create the driver; `options` are passed through as driver config (e.g. max_connection_pool_size)."""
         try:
             AUTH = (username, password)
-            print(username, password)
-            driver = GraphDatabase.driver(self._uri, auth=AUTH, database=db)
+            driver = GraphDatabase.driver(self._uri, auth=AUTH, database=db, **options)
             self._driver = driver
             logger.info("Neo4j Client Instantiated and waiting to verify connection ...")
             return driver
         except Exception as e:
             logger.exception(f"Neo 4j client failed to connect with exception: {e}")
 
-        def close(self):
-            try:
-                if self._driver.close() is None:
-                    logger.error("Neo4j Client already does not exist")
-                    assert "Neo4j Client already does not exist"
-                self._driver.close()
-                logger.info("Neo4j client channel closed successfully")
-                
-            except Exception as e:
-                logger.exception(f"Neo4j client failed to close the channel: {e}")
-                
\ No newline at end of file
+    def close(self):
+        try:
+            if self._driver is None:
+                logger.error("Neo4j Client already does not exist")
+                return
+            self._driver.close()
+            self._driver = None
+            logger.info("Neo4j client channel closed successfully")
+
+        except Exception as e:
+            logger.exception(f"Neo4j client failed to close the channel: {e}")
@@ -1,2 +1,3 @@
 from .MongoDbClient import MongoDbClient
-from .Neo4jClient import Neo4jClient
\ No newline at end of file
+from .Neo4jClient import Neo4jClient
+from .DriverRegistry import DriverRegistry, registry
\ No newline at end of file
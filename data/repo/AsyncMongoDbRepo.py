@@ -0,0 +1,364 @@
+from ..database.AsyncMongoDbClient import AsyncMongoDbClient
+from logs.metrics import timed, record_error
+from pymongo import IndexModel, ReplaceOne, UpdateOne
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+class AsyncMongoDBRepo:
+    """
+    asyncio counterpart of MongoDBRepo built on Motor.
+    Methods mirror MongoDBRepo one to one but are coroutines, so independent
+    reads can be scheduled together with asyncio.gather.
+    """
+    def __init__(self, uri: str, port: int, db: str):
+        self._client = AsyncMongoDbClient(uri, port)
+        self._driver = self._client.connect()
+        self._db = db
+        logger.info("AsyncMongoDBRepo initialized.")
+
+    @classmethod
+    def from_driver(cls, driver, db: str) -> "AsyncMongoDBRepo":
+        """Wrap an already constructed Motor client (or an in-process stand-in with the same surface)."""
+        repo = cls.__new__(cls)
+        repo._client = None
+        repo._driver = driver
+        repo._db = db
+        return repo
+
+    async def __aenter__(self) -> "AsyncMongoDBRepo":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    @timed("mongo")
+    async def verify_connection(self) -> bool:
+        """Round trip to the server to make sure the connection works."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return False
+            logger.info(await self._driver.server_info())
+            logger.info("AsyncMongoDBRepo connection verified successfully.")
+            return True
+        except Exception as e:
+            record_error("mongo", "verify_connection")
+            logger.exception(f"Failed to verify MongoDB connection: {e}")
+            return False
+
+    @timed("mongo")
+    async def add_collection(self, collection_name: str):
+        """Create a new collection inside the database."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            if collection_name not in await db.list_collection_names():
+                await db.create_collection(collection_name)
+                logger.info(f"Collection '{collection_name}' created successfully.")
+            else:
+                logger.warning(f"Collection '{collection_name}' already exists.")
+        except Exception as e:
+            record_error("mongo", "add_collection")
+            logger.exception(f"Failed to create collection '{collection_name}': {e}")
+
+    @timed("mongo")
+    async def insert_one(self, collection_name: str, document: Dict[str, Any]) -> Optional[str]:
+        """Insert a single document and return its ID."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            result = await db[collection_name].insert_one(document)
+            logger.debug(f"Inserted one document into '{collection_name}' with ID: {result.inserted_id}")
+            return str(result.inserted_id)
+        except Exception as e:
+            record_error("mongo", "insert_one")
+            logger.exception(f"Failed to insert document into '{collection_name}': {e}")
+
+    @timed("mongo")
+    async def insert_many(self, collection_name: str, documents: List[Dict[str, Any]]) -> List[str]:
+        """Insert multiple documents and return their IDs."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            result = await db[collection_name].insert_many(documents)
+            logger.info(f"Inserted {len(result.inserted_ids)} documents into '{collection_name}'.")
+            return [str(_id) for _id in result.inserted_ids]
+        except Exception as e:
+            record_error("mongo", "insert_many")
+            logger.exception(f"Failed to insert documents into '{collection_name}': {e}")
+
+    @timed("mongo")
+    async def bulk_write(self, collection_name: str, operations: List[Any], ordered: bool = False) -> Dict[str, int]:
+        """Send a list of write operations in one round trip and return the write counts."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            if not operations:
+                return {"matched": 0, "modified": 0, "upserted": 0, "inserted": 0}
+            db = self._driver[self._db]
+            result = await db[collection_name].bulk_write(operations, ordered=ordered)
+            counts = {
+                "matched": result.matched_count,
+                "modified": result.modified_count,
+                "upserted": result.upserted_count,
+                "inserted": result.inserted_count,
+            }
+            logger.debug(f"bulk_write of {len(operations)} operation(s) into '{collection_name}': {counts}")
+            return counts
+        except Exception as e:
+            record_error("mongo", "bulk_write")
+            logger.exception(f"Failed to bulk write into '{collection_name}': {e}")
+
+    async def upsert_add_to_set(self, collection_name: str, key_field: str,
+                                documents: Dict[Any, Dict[str, List[Any]]]) -> Dict[str, int]:
+        """
+        Upsert one document per key, appending the given array values with $addToSet.
+        `documents` maps a key value to {array_field: [values, ...]}.
+        """
+        operations = [
+            UpdateOne(
+                {key_field: key},
+                {"$addToSet": {field: {"$each": values} for field, values in fields.items()}},
+                upsert=True,
+            )
+            for key, fields in documents.items()
+        ]
+        return await self.bulk_write(collection_name, operations, ordered=False)
+
+    async def replace_many(self, collection_name: str, key_field: str,
+                           documents: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Upsert whole documents keyed by `key_field` (insert new keys, replace existing ones) in one round trip."""
+        operations = [ReplaceOne({key_field: document[key_field]}, document, upsert=True) for document in documents]
+        return await self.bulk_write(collection_name, operations, ordered=False)
+
+    @timed("mongo")
+    async def create_index(self, collection_name: str, keys: List[Any], unique: bool = False) -> Optional[str]:
+        """Create an index (no-op if it already exists) and return its name."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            name = await db[collection_name].create_index(keys, unique=unique)
+            logger.info(f"Index '{name}' ensured on '{collection_name}'.")
+            return name
+        except Exception as e:
+            record_error("mongo", "create_index")
+            logger.exception(f"Failed to create index on '{collection_name}': {e}")
+
+    @timed("mongo")
+    async def ensure_indexes(self, collection_name: str,
+                             indexes: List[Tuple[List[Any], Dict[str, Any]]]) -> List[str]:
+        """Create every (keys, options) index that is missing in one round trip and return their names."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            if not indexes:
+                return []
+            db = self._driver[self._db]
+            names = await db[collection_name].create_indexes([IndexModel(keys, **options) for keys, options in indexes])
+            logger.info(f"Indexes {names} ensured on '{collection_name}'.")
+            return names
+        except Exception as e:
+            record_error("mongo", "ensure_indexes")
+            logger.exception(f"Failed to create indexes on '{collection_name}': {e}")
+
+    @timed("mongo")
+    async def list_indexes(self, collection_name: str) -> Dict[str, Dict[str, Any]]:
+        """Return {index name: index information} for a collection."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            return await db[collection_name].index_information()
+        except Exception as e:
+            record_error("mongo", "list_indexes")
+            logger.exception(f"Failed to list indexes of '{collection_name}': {e}")
+
+    @timed("mongo")
+    async def count_documents(self, collection_name: str, query: Dict[str, Any]) -> Optional[int]:
+        """Count matching documents on the server."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            return await db[collection_name].count_documents(query)
+        except Exception as e:
+            record_error("mongo", "count_documents")
+            logger.exception(f"Failed to count documents in '{collection_name}': {e}")
+
+    @timed("mongo")
+    async def aggregate(self, collection_name: str, pipeline: List[Dict[str, Any]], batch_size: int = 1000,
+                        allow_disk_use: bool = False) -> List[Dict[str, Any]]:
+        """Run an aggregation pipeline on the server and return its (usually small) result."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            options = {"allowDiskUse": True} if allow_disk_use else {}
+            cursor = db[collection_name].aggregate(pipeline, batchSize=batch_size, **options)
+            results = await cursor.to_list(length=None)
+            logger.debug(f"aggregate on '{collection_name}' returned {len(results)} documents.")
+            return results
+        except Exception as e:
+            record_error("mongo", "aggregate")
+            logger.exception(f"Failed to aggregate '{collection_name}': {e}")
+
+    @timed("mongo")
+    async def find_one(self, collection_name: str, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Find a single document by query."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            result = await db[collection_name].find_one(query)
+            logger.debug(f"find_one in '{collection_name}' with query {query} returned {result}")
+            return result
+        except Exception as e:
+            record_error("mongo", "find_one")
+            logger.exception(f"Failed to find document in '{collection_name}': {e}")
+
+    @timed("mongo")
+    async def find_many(self, collection_name: str, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Find multiple documents matching query."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            results = await db[collection_name].find(query).to_list(length=None)
+            logger.debug(f"find_many in '{collection_name}' returned {len(results)} documents.")
+            return results
+        except Exception as e:
+            record_error("mongo", "find_many")
+            logger.exception(f"Failed to find documents in '{collection_name}': {e}")
+
+    async def find_many_all(self, requests: List[Tuple[str, Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
+        """
+        Run independent (collection_name, query) finds concurrently and return their results in the same order.
+        """
+        return await asyncio.gather(*(self.find_many(collection_name, query) for collection_name, query in requests))
+
+    @timed("mongo")
+    async def iter_many(self, collection_name: str, query: Dict[str, Any],
+                        projection: Optional[Dict[str, Any]] = None, batch_size: int = 1000,
+                        limit: int = 0, chunk_size: Optional[int] = None
+                        ) -> AsyncIterator[Union[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Lazily iterate documents matching query (`async for`) instead of materialising them like
+        find_many; same options as MongoDBRepo.iter_many.
+        """
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            cursor = db[collection_name].find(query, projection, batch_size=batch_size, limit=limit)
+            count = 0
+            try:
+                chunk = []
+                async for document in cursor:
+                    count += 1
+                    if not chunk_size:
+                        yield document
+                        continue
+                    chunk.append(document)
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+                if chunk:
+                    yield chunk
+            finally:
+                await cursor.close()
+            logger.debug(f"iter_many in '{collection_name}' streamed {count} documents.")
+        except Exception as e:
+            record_error("mongo", "iter_many")
+            logger.exception(f"Failed to stream documents from '{collection_name}': {e}")
+
+    @timed("mongo")
+    async def update_one(self, collection_name: str, query: Dict[str, Any], update: Dict[str, Any]) -> int:
+        """Update a single document and return number of modified documents."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            result = await db[collection_name].update_one(query, {'$set': update})
+            logger.info(f"Updated {result.modified_count} document(s) in '{collection_name}'.")
+            return result.modified_count
+        except Exception as e:
+            record_error("mongo", "update_one")
+            logger.exception(f"Failed to update document in '{collection_name}': {e}")
+
+    @timed("mongo")
+    async def delete_one(self, collection_name: str, query: Dict[str, Any]) -> int:
+        """Delete a single document and return count of deleted documents."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            result = await db[collection_name].delete_one(query)
+            logger.info(f"Deleted {result.deleted_count} document(s) from '{collection_name}'.")
+            return result.deleted_count
+        except Exception as e:
+            record_error("mongo", "delete_one")
+            logger.exception(f"Failed to delete document from '{collection_name}': {e}")
+
+    @timed("mongo")
+    async def drop_collection(self, collection_name: str):
+        """Drop a collection."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            await db.drop_collection(collection_name)
+            logger.info(f"Collection '{collection_name}' dropped successfully.")
+        except Exception as e:
+            record_error("mongo", "drop_collection")
+            logger.exception(f"Failed to drop collection '{collection_name}': {e}")
+
+    @timed("mongo")
+    async def list_collections(self) -> List[str]:
+        """Return list of all collection names."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            collections = await db.list_collection_names()
+            logger.debug(f"Collections in '{self._db}': {collections}")
+            return collections
+        except Exception as e:
+            record_error("mongo", "list_collections")
+            logger.exception(f"Failed to list collections: {e}")
+
+    def close(self):
+        """Close MongoDB client connection (Motor closes synchronously; a client passed to from_driver is left open)."""
+        try:
+            if self._driver is None:
+                logger.error("No async MongoDB driver is created")
+                return
+            if self._client is None:
+                logger.debug("AsyncMongoDBRepo released; the wrapped client stays open.")
+                return
+            self._driver.close()
+            logger.info("Async MongoDB connection closed.")
+        except Exception as e:
+            logger.exception(f"Failed to close MongoDB connection: {e}")
@@ -0,0 +1,329 @@
+import asyncio
+import logging
+from ..database.AsyncNeo4jClient import AsyncNeo4jClient
+from .Neo4jRepo import Neo4jRepo
+from logs.metrics import timed, record_error
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+class AsyncNeo4jRepo:
+    """
+    asyncio counterpart of Neo4jRepo built on the Neo4j async driver.
+    Every call opens its own session from the driver pool, so independent
+    queries can run concurrently with asyncio.gather (see execute_many).
+    The Cypher text is shared with Neo4jRepo (its *_query builders); the
+    read cache of Neo4jRepo.execute_query has no async counterpart.
+    """
+    def __init__(self, database, uri: str, username: str, password: str):
+        """Initialize the async Neo4j repository (the driver connects lazily)."""
+        self._client = AsyncNeo4jClient(uri)
+        self._driver = self._client.connect(username, password, database)
+        self._database = database
+
+        logger.info("AsyncNeo4jRepo initialized successfully.")
+
+    @classmethod
+    def from_driver(cls, driver, database: Optional[str] = None) -> "AsyncNeo4jRepo":
+        """
+        Wrap an already constructed async driver (or an in-process stand-in with the same surface).
+        """
+        repo = cls.__new__(cls)
+        repo._client = None
+        repo._driver = driver
+        repo._database = database
+        return repo
+
+    async def __aenter__(self) -> "AsyncNeo4jRepo":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @timed("neo4j")
+    async def execute_query(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Execute a Cypher query and return the results as a list of dictionaries.
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            parameters = parameters or {}
+            async with self._driver.session() as session:
+                result = await session.run(query, parameters=parameters)
+                data = [record.data() async for record in result]
+                logger.debug(f"Executed query: {query} with params: {parameters}, returned {len(data)} rows.")
+                return data
+        except Exception as e:
+            record_error("neo4j", "execute_query")
+            logger.exception(f"Failed to execute query: {query}, error: {e}")
+
+    async def execute_many(self, queries: List[Tuple[str, Optional[Dict[str, Any]]]]) -> List[List[Dict[str, Any]]]:
+        """
+        Run independent read queries concurrently and return their results in the same order.
+        """
+        return await asyncio.gather(*(self.execute_query(query, parameters) for query, parameters in queries))
+
+    @timed("neo4j")
+    async def stream_query(self, query: str, parameters: Optional[Dict[str, Any]] = None,
+                           fetch_size: int = 1000, limit: int = 0, chunk_size: Optional[int] = None
+                           ) -> AsyncIterator[Union[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Lazily yield `record.data()` rows (`async for`) instead of building the full list like
+        execute_query; same options as Neo4jRepo.stream_query.
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            parameters = parameters or {}
+            count = 0
+            async with self._driver.session(fetch_size=fetch_size) as session:
+                result = await session.run(query, parameters=parameters)
+                chunk = []
+                async for record in result:
+                    count += 1
+                    if chunk_size:
+                        chunk.append(record.data())
+                        if len(chunk) >= chunk_size:
+                            yield chunk
+                            chunk = []
+                    else:
+                        yield record.data()
+                    if limit and count >= limit:
+                        break
+                if chunk:
+                    yield chunk
+            logger.debug(f"Streamed {count} rows for query: {query}")
+        except Exception as e:
+            record_error("neo4j", "stream_query")
+            logger.exception(f"Failed to stream query: {query}, error: {e}")
+
+    async def stream_nodes(self, label: str, filters: Optional[Dict[str, Any]] = None,
+                           fetch_size: int = 1000, chunk_size: Optional[int] = None) -> AsyncIterator[Any]:
+        """
+        Lazily yield the properties of nodes with `label` matching `filters` (see stream_query).
+        """
+        filters = filters or {}
+        query = f"MATCH (n:{label} {Neo4jRepo._key_pattern('filters', filters)}) RETURN properties(n) AS n"
+        async for item in self.stream_query(query, {"filters": filters}, fetch_size=fetch_size,
+                                            chunk_size=chunk_size):
+            yield [row["n"] for row in item] if chunk_size else item["n"]
+
+    @timed("neo4j")
+    async def create_node(self, label: str, properties: Dict[str, Any]) -> bool:
+        """
+        Create a node with a given label and properties.
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            properties = properties or {}
+            query = f"CREATE (n:{label} $props)"
+            async with self._driver.session() as session:
+                result = await session.run(query, props=properties)
+                await result.consume()
+                logger.debug(f"Node with label '{label}' created successfully.")
+                return True
+        except Exception as e:
+            record_error("neo4j", "create_node")
+            logger.exception(f"Failed to create node with label '{label}': {e}")
+
+    @timed("neo4j")
+    async def create_relationship(self, from_label: str, from_key: Dict[str, Any],
+                                  to_label: str, to_key: Dict[str, Any],
+                                  rel_type: str, rel_props: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Create a relationship between two nodes.
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            rel_props = rel_props or {}
+            query = Neo4jRepo.create_relationship_query(from_label, from_key, to_label, to_key, rel_type)
+            async with self._driver.session() as session:
+                result = await session.run(query, rel_props=rel_props, from_key=from_key, to_key=to_key)
+                await result.consume()
+                logger.debug(f"Relationship '{rel_type}' created between {from_label} and {to_label}.")
+                return True
+        except Exception as e:
+            record_error("neo4j", "create_relationship")
+            logger.exception(f"Failed to create relationship '{rel_type}': {e}")
+
+    @timed("neo4j")
+    async def merge_node(self, label: str, key: Dict[str, Any], properties: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Create a node identified by `key` if it does not exist yet, then set `properties` on it.
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            properties = properties or {}
+            query = Neo4jRepo.merge_node_query(label, key)
+            async with self._driver.session() as session:
+                result = await session.run(query, key=key, props=properties)
+                await result.consume()
+                logger.debug(f"Node with label '{label}' and key {key} merged successfully.")
+                return True
+        except Exception as e:
+            record_error("neo4j", "merge_node")
+            logger.exception(f"Failed to merge node with label '{label}': {e}")
+
+    @timed("neo4j")
+    async def merge_relationship(self, from_label: str, from_key: Dict[str, Any],
+                                 to_label: str, to_key: Dict[str, Any],
+                                 rel_type: str, rel_props: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Upsert both end nodes and the relationship between them in a single statement.
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            rel_props = rel_props or {}
+            query = Neo4jRepo.merge_relationship_query(from_label, from_key, to_label, to_key, rel_type)
+            async with self._driver.session() as session:
+                result = await session.run(query, rel_props=rel_props, from_key=from_key, to_key=to_key)
+                await result.consume()
+                logger.debug(f"Relationship '{rel_type}' merged between {from_label} and {to_label}.")
+                return True
+        except Exception as e:
+            record_error("neo4j", "merge_relationship")
+            logger.exception(f"Failed to merge relationship '{rel_type}': {e}")
+
+    @timed("neo4j")
+    async def ensure_constraints(self, labels: List[str], key: str = "id") -> int:
+        """
+        Create a uniqueness constraint on `key` for every label so MERGE/MATCH on it become index seeks.
+        Returns the number of labels whose constraint exists after the call.
+        """
+        ensured = 0
+        for label in labels:
+            try:
+                assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+                query = (
+                    f"CREATE CONSTRAINT {label.lower()}_{key}_unique IF NOT EXISTS "
+                    f"FOR (n:{label}) REQUIRE n.{key} IS UNIQUE"
+                )
+                async with self._driver.session() as session:
+                    result = await session.run(query)
+                    await result.consume()
+                ensured += 1
+                logger.info(f"Uniqueness constraint on {label}.{key} ensured.")
+            except Exception as e:
+                record_error("neo4j", "ensure_constraints")
+                logger.exception(f"Failed to create uniqueness constraint on {label}.{key}: {e}")
+        return ensured
+
+    @timed("neo4j")
+    async def profile_query(self, query: str, parameters: Optional[Dict[str, Any]] = None,
+                            mode: str = "PROFILE") -> Optional[Dict[str, Any]]:
+        """
+        Run `query` under PROFILE or EXPLAIN and return its plan (see Neo4jRepo.profile_query).
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            mode = mode.upper()
+            if mode not in ("PROFILE", "EXPLAIN"):
+                raise ValueError(f"Unknown plan mode '{mode}' (expected PROFILE or EXPLAIN).")
+            async with self._driver.session() as session:
+                result = await session.run(f"{mode} {query}", parameters=parameters or {})
+                summary = await result.consume()
+                plan = summary.profile if mode == "PROFILE" else summary.plan
+                logger.debug(f"Captured {mode} plan for query: {query}")
+                return {"plan": plan, "available_after": summary.result_available_after,
+                        "consumed_after": summary.result_consumed_after}
+        except Exception as e:
+            record_error("neo4j", "profile_query")
+            logger.exception(f"Failed to capture the {mode} plan of query: {query}, error: {e}")
+
+    @timed("neo4j")
+    async def write_batch(self, statements: List[Tuple[str, Dict[str, Any]]]) -> bool:
+        """
+        Run several parameterised Cypher statements inside a single write transaction.
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            async with self._driver.session() as session:
+                await session.execute_write(self._run_statements, statements)
+                logger.debug(f"Committed batch of {len(statements)} statement(s).")
+                return True
+        except Exception as e:
+            record_error("neo4j", "write_batch")
+            logger.exception(f"Failed to write batch of {len(statements)} statement(s): {e}")
+            return False
+
+    @staticmethod
+    async def _run_statements(tx, statements: List[Tuple[str, Dict[str, Any]]]):
+        for query, parameters in statements:
+            result = await tx.run(query, parameters)
+            await result.consume()
+
+    @timed("neo4j")
+    async def find_nodes(self, label: str, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Find nodes by label and optional filters.
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            filters = filters or {}
+            query = Neo4jRepo.find_nodes_query(label, filters)
+            async with self._driver.session() as session:
+                result = await session.run(query, filters=filters)
+                data = [record["n"] async for record in result]
+                logger.debug(f"Found {len(data)} nodes with label '{label}' and filters {filters}.")
+                return data
+        except Exception as e:
+            record_error("neo4j", "find_nodes")
+            logger.exception(f"Failed to find nodes with label '{label}': {e}")
+
+    @timed("neo4j")
+    async def update_node(self, label: str, match_props: Dict[str, Any], update_props: Dict[str, Any]) -> int:
+        """
+        Update node properties based on a match filter.
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            query = Neo4jRepo.update_node_query(label, match_props)
+            async with self._driver.session() as session:
+                result = await session.run(query, match_props=match_props, update_props=update_props)
+                count = (await result.single())["count"]
+                logger.debug(f"Updated {count} node(s) with label '{label}'.")
+                return count
+        except Exception as e:
+            record_error("neo4j", "update_node")
+            logger.exception(f"Failed to update node with label '{label}': {e}")
+
+    @timed("neo4j")
+    async def delete_node(self, label: str, match_props: Dict[str, Any]) -> int:
+        """
+        Delete nodes matching given properties.
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            query = Neo4jRepo.delete_node_query(label, match_props)
+            async with self._driver.session() as session:
+                result = await session.run(query, match_props=match_props)
+                count = (await result.single())["count"]
+                logger.debug(f"Deleted {count} node(s) with label '{label}'.")
+                return count
+        except Exception as e:
+            record_error("neo4j", "delete_node")
+            logger.exception(f"Failed to delete node with label '{label}': {e}")
+
+    async def close(self):
+        """Close the Neo4j driver connection (a driver passed to from_driver is left to its owner)."""
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            if self._client is None:
+                logger.debug("AsyncNeo4jRepo released; the wrapped driver stays open.")
+                return
+            await self._driver.close()
+            logger.info("Async Neo4j driver closed successfully.")
+        except Exception as e:
+            logger.exception(f"Failed to close Neo4j driver: {e}")
+
+    @timed("neo4j")
+    async def verify_connection(self) -> bool:
+        """Verify the connectivity to the Neo4j database."""
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            await self._driver.verify_connectivity()
+            logger.info("Neo4j connectivity verified.")
+            return True
+        except Exception as e:
+            record_error("neo4j", "verify_connection")
+            logger.exception(f"Failed to verify Neo4j connectivity: {e}")
+            return False
@@ -1,6 +1,9 @@
-from .. import MongoDbClient
+from .. import MongoDbClient, registry
+from ..database.DriverRegistry import DEFAULT_MAX_POOL_SIZE
+from logs.metrics import timed, record_error
+from pymongo import IndexModel, ReplaceOne, UpdateOne
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +19,27 @@ class MongoDBRepo:
         except Exception as e:
             logger.exception(f"Failed to verify MongoDB connection: {e}")
 
+    @classmethod
+    def from_driver(cls, driver, db: str) -> "MongoDBRepo":
+        """Wrap an already constructed client (a shared pool or a local stand-in such as mongomock)."""
+        repo = cls.__new__(cls)
+        repo._client = None
+        repo._driver = driver
+        repo._db = db
+        return repo
+
+    @classmethod
+    def shared(cls, uri: str, port: int, db: str, max_pool_size: int = DEFAULT_MAX_POOL_SIZE) -> "MongoDBRepo":
+        """Repo backed by the process-wide pooled client for (uri, port); close() leaves the pool warm."""
+        return cls.from_driver(registry.get_mongo(uri, port, max_pool_size), db)
+
+    def __enter__(self) -> "MongoDBRepo":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @timed("mongo")
     def add_collection(self, collection_name: str):
         """Create a new collection inside the database."""
         try:
@@ -30,8 +54,10 @@ class MongoDBRepo:
             else:
                 logger.warning(f"Collection '{collection_name}' already exists.")
         except Exception as e:
+            record_error("mongo", "add_collection")
             logger.exception(f"Failed to create collection '{collection_name}': {e}")
 
+    @timed("mongo")
     def insert_one(self, collection_name: str, document: Dict[str, Any]) -> Optional[str]:
         """Insert a single document and return its ID."""
         try:
@@ -41,11 +67,13 @@ class MongoDBRepo:
                 return
             db = self._driver[self._db]
             result = db[collection_name].insert_one(document)
-            logger.info(f"Inserted one document into '{collection_name}' with ID: {result.inserted_id}")
+            logger.debug(f"Inserted one document into '{collection_name}' with ID: {result.inserted_id}")
             return str(result.inserted_id)
         except Exception as e:
+            record_error("mongo", "insert_one")
             logger.exception(f"Failed to insert document into '{collection_name}': {e}")
 
+    @timed("mongo")
     def insert_many(self, collection_name: str, documents: List[Dict[str, Any]]) -> List[str]:
         """Insert multiple documents and return their IDs."""
         try:
@@ -58,8 +86,141 @@ class MongoDBRepo:
             logger.info(f"Inserted {len(result.inserted_ids)} documents into '{collection_name}'.")
             return [str(_id) for _id in result.inserted_ids]
         except Exception as e:
+            record_error("mongo", "insert_many")
             logger.exception(f"Failed to insert documents into '{collection_name}': {e}")
 
+    @timed("mongo")
+    def bulk_write(self, collection_name: str, operations: List[Any], ordered: bool = False) -> Dict[str, int]:
+        """Send a list of write operations in one round trip and return the write counts."""
+        try:
+            if '_driver' not in self.__dict__:
+                logger.error("No MongoDB driver is created")
+                assert RuntimeError("No MongoDB driver is created")
+                return
+            if not operations:
+                return {"matched": 0, "modified": 0, "upserted": 0, "inserted": 0}
+            db = self._driver[self._db]
+            result = db[collection_name].bulk_write(operations, ordered=ordered)
+            counts = {
+                "matched": result.matched_count,
+                "modified": result.modified_count,
+                "upserted": result.upserted_count,
+                "inserted": result.inserted_count,
+            }
+            logger.debug(f"bulk_write of {len(operations)} operation(s) into '{collection_name}': {counts}")
+            return counts
+        except Exception as e:
+            record_error("mongo", "bulk_write")
+            logger.exception(f"Failed to bulk write into '{collection_name}': {e}")
+
+    def upsert_add_to_set(self, collection_name: str, key_field: str,
+                          documents: Dict[Any, Dict[str, List[Any]]]) -> Dict[str, int]:
+        """
+        Upsert one document per key, appending the given array values with $addToSet.
+        `documents` maps a key value to {array_field: [values, ...]}.
+        """
+        operations = [
+            UpdateOne(
+                {key_field: key},
+                {"$addToSet": {field: {"$each": values} for field, values in fields.items()}},
+                upsert=True,
+            )
+            for key, fields in documents.items()
+        ]
+        return self.bulk_write(collection_name, operations, ordered=False)
+
+    def replace_many(self, collection_name: str, key_field: str, documents: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Upsert whole documents keyed by `key_field` (insert new keys, replace existing ones) in one round trip."""
+        operations = [ReplaceOne({key_field: document[key_field]}, document, upsert=True) for document in documents]
+        return self.bulk_write(collection_name, operations, ordered=False)
+
+    @timed("mongo")
+    def create_index(self, collection_name: str, keys: List[Any], unique: bool = False) -> Optional[str]:
+        """Create an index (no-op if it already exists) and return its name."""
+        try:
+            if '_driver' not in self.__dict__:
+                logger.error("No MongoDB driver is created")
+                assert RuntimeError("No MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            name = db[collection_name].create_index(keys, unique=unique)
+            logger.info(f"Index '{name}' ensured on '{collection_name}'.")
+            return name
+        except Exception as e:
+            record_error("mongo", "create_index")
+            logger.exception(f"Failed to create index on '{collection_name}': {e}")
+
+    @timed("mongo")
+    def ensure_indexes(self, collection_name: str, indexes: List[Tuple[List[Any], Dict[str, Any]]]) -> List[str]:
+        """
+        Create every (keys, options) index that is missing in one round trip and return their names.
+        An index on an array field is multikey: one entry per element, so `{events: id}` is an index seek.
+        """
+        try:
+            if '_driver' not in self.__dict__:
+                logger.error("No MongoDB driver is created")
+                assert RuntimeError("No MongoDB driver is created")
+                return
+            if not indexes:
+                return []
+            db = self._driver[self._db]
+            names = db[collection_name].create_indexes([IndexModel(keys, **options) for keys, options in indexes])
+            logger.info(f"Indexes {names} ensured on '{collection_name}'.")
+            return names
+        except Exception as e:
+            record_error("mongo", "ensure_indexes")
+            logger.exception(f"Failed to create indexes on '{collection_name}': {e}")
+
+    @timed("mongo")
+    def list_indexes(self, collection_name: str) -> Dict[str, Dict[str, Any]]:
+        """Return {index name: index information} for a collection."""
+        try:
+            if '_driver' not in self.__dict__:
+                logger.error("No MongoDB driver is created")
+                assert RuntimeError("No MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            return db[collection_name].index_information()
+        except Exception as e:
+            record_error("mongo", "list_indexes")
+            logger.exception(f"Failed to list indexes of '{collection_name}': {e}")
+
+    @timed("mongo")
+    def count_documents(self, collection_name: str, query: Dict[str, Any]) -> Optional[int]:
+        """Count matching documents on the server (an index-only count when `query` is covered by an index)."""
+        try:
+            if '_driver' not in self.__dict__:
+                logger.error("No MongoDB driver is created")
+                assert RuntimeError("No MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            return db[collection_name].count_documents(query)
+        except Exception as e:
+            record_error("mongo", "count_documents")
+            logger.exception(f"Failed to count documents in '{collection_name}': {e}")
+
+    @timed("mongo")
+    def aggregate(self, collection_name: str, pipeline: List[Dict[str, Any]], batch_size: int = 1000,
+                  allow_disk_use: bool = False) -> List[Dict[str, Any]]:
+        """
+        Run an aggregation pipeline on the server and return its (usually small) result.
+        Put $match first so it can use an index; `allow_disk_use` lets large $group/$sort stages spill.
+        """
+        try:
+            if '_driver' not in self.__dict__:
+                logger.error("No MongoDB driver is created")
+                assert RuntimeError("No MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            options = {"allowDiskUse": True} if allow_disk_use else {}
+            results = list(db[collection_name].aggregate(pipeline, batchSize=batch_size, **options))
+            logger.debug(f"aggregate on '{collection_name}' returned {len(results)} documents.")
+            return results
+        except Exception as e:
+            record_error("mongo", "aggregate")
+            logger.exception(f"Failed to aggregate '{collection_name}': {e}")
+
+    @timed("mongo")
     def find_one(self, collection_name: str, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Find a single document by query."""
         try:
@@ -72,8 +233,10 @@ class MongoDBRepo:
             logger.debug(f"find_one in '{collection_name}' with query {query} returned {result}")
             return result
         except Exception as e:
+            record_error("mongo", "find_one")
             logger.exception(f"Failed to find document in '{collection_name}': {e}")
 
+    @timed("mongo")
     def find_many(self, collection_name: str, query: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Find multiple documents matching query."""
         try:
@@ -86,8 +249,53 @@ class MongoDBRepo:
             logger.debug(f"find_many in '{collection_name}' returned {len(results)} documents.")
             return results
         except Exception as e:
+            record_error("mongo", "find_many")
             logger.exception(f"Failed to find documents in '{collection_name}': {e}")
 
+    @timed("mongo")
+    def iter_many(self, collection_name: str, query: Dict[str, Any],
+                  projection: Optional[Dict[str, Any]] = None, batch_size: int = 1000,
+                  limit: int = 0, chunk_size: Optional[int] = None, raise_errors: bool = False
+                  ) -> Iterator[Union[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Lazily iterate documents matching query instead of materialising them like find_many.
+        The server returns `batch_size` documents per round trip and applies `projection` and `limit`
+        (0 means no limit). With `chunk_size` the documents are yielded as lists of that size.
+        A failure is logged and ends the iteration early; with `raise_errors` it is re-raised.
+        """
+        try:
+            if '_driver' not in self.__dict__:
+                logger.error("No MongoDB driver is created")
+                assert RuntimeError("No MongoDB driver is created")
+                return
+            db = self._driver[self._db]
+            cursor = db[collection_name].find(query, projection, batch_size=batch_size, limit=limit)
+            count = 0
+            try:
+                if chunk_size:
+                    chunk = []
+                    for document in cursor:
+                        chunk.append(document)
+                        count += 1
+                        if len(chunk) >= chunk_size:
+                            yield chunk
+                            chunk = []
+                    if chunk:
+                        yield chunk
+                else:
+                    for document in cursor:
+                        count += 1
+                        yield document
+            finally:
+                cursor.close()
+            logger.debug(f"iter_many in '{collection_name}' streamed {count} documents.")
+        except Exception as e:
+            record_error("mongo", "iter_many")
+            logger.exception(f"Failed to stream documents from '{collection_name}': {e}")
+            if raise_errors:
+                raise
+
+    @timed("mongo")
     def update_one(self, collection_name: str, query: Dict[str, Any], update: Dict[str, Any]) -> int:
         """Update a single document and return number of modified documents."""
         try:
@@ -100,8 +308,10 @@ class MongoDBRepo:
             logger.info(f"Updated {result.modified_count} document(s) in '{collection_name}'.")
             return result.modified_count
         except Exception as e:
+            record_error("mongo", "update_one")
             logger.exception(f"Failed to update document in '{collection_name}': {e}")
 
+    @timed("mongo")
     def delete_one(self, collection_name: str, query: Dict[str, Any]) -> int:
         """Delete a single document and return count of deleted documents."""
         try:
@@ -114,8 +324,10 @@ class MongoDBRepo:
             logger.info(f"Deleted {result.deleted_count} document(s) from '{collection_name}'.")
             return result.deleted_count
         except Exception as e:
+            record_error("mongo", "delete_one")
             logger.exception(f"Failed to delete document from '{collection_name}': {e}")
 
+    @timed("mongo")
     def drop_collection(self, collection_name: str):
         """Drop a collection."""
         try:
@@ -127,8 +339,27 @@ class MongoDBRepo:
             db.drop_collection(collection_name)
             logger.info(f"Collection '{collection_name}' dropped successfully.")
         except Exception as e:
+            record_error("mongo", "drop_collection")
             logger.exception(f"Failed to drop collection '{collection_name}': {e}")
 
+    @timed("mongo")
+    def rename_collection(self, collection_name: str, new_name: str, drop_target: bool = True) -> bool:
+        """Rename a collection, replacing an existing `new_name` in the same step with `drop_target`."""
+        try:
+            if '_driver' not in self.__dict__:
+                logger.error("No MongoDB driver is created")
+                assert RuntimeError("No MongoDB driver is created")
+                return False
+            db = self._driver[self._db]
+            db[collection_name].rename(new_name, dropTarget=drop_target)
+            logger.info(f"Collection '{collection_name}' renamed to '{new_name}'.")
+            return True
+        except Exception as e:
+            record_error("mongo", "rename_collection")
+            logger.exception(f"Failed to rename collection '{collection_name}' to '{new_name}': {e}")
+            return False
+
+    @timed("mongo")
     def list_collections(self) -> List[str]:
         """Return list of all collection names."""
         try:
@@ -141,15 +372,19 @@ class MongoDBRepo:
             logger.debug(f"Collections in '{self._db}': {collections}")
             return collections
         except Exception as e:
+            record_error("mongo", "list_collections")
             logger.exception(f"Failed to list collections: {e}")
 
     def close(self):
-        """Close MongoDB client connection."""
+        """Close MongoDB client connection (shared/pooled clients are left to the registry)."""
         try:
             if '_driver' not in self.__dict__:
                 logger.error("No MongoDB driver is created")
                 assert RuntimeError("No MongoDB driver is created")
                 return
+            if self._client is None:
+                logger.debug("MongoDBRepo released; shared client stays open.")
+                return
 
             self._driver.close()
             logger.info("MongoDB connection closed.")
@@ -1,6 +1,9 @@
 import logging
-from .. import Neo4jClient
-from typing import Any, Dict, List, Optional
+from .. import Neo4jClient, registry
+from ..database.DriverRegistry import DEFAULT_MAX_POOL_SIZE
+from .QueryCache import QueryCache, DEFAULT_MAX_ENTRIES, DEFAULT_TTL
+from logs.metrics import timed, record_error
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
@@ -10,24 +13,137 @@ class Neo4jRepo:
         self._client = Neo4jClient(uri)
         self._driver = self._client.connect(username, password, database)
         self._database = database
+        self._cache: Optional[QueryCache] = None
 
         logger.info("Neo4jRepo initialized successfully.")
 
-    def execute_query(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    @classmethod
+    def from_driver(cls, driver, database: Optional[str] = None) -> "Neo4jRepo":
+        """
+        Wrap an already constructed driver (a shared pool or a local stand-in used for benchmarks).
+        """
+        repo = cls.__new__(cls)
+        repo._client = None
+        repo._driver = driver
+        repo._database = database
+        repo._cache = None
+        return repo
+
+    @classmethod
+    def shared(cls, database, uri: str, username: str, password: str,
+               max_pool_size: int = DEFAULT_MAX_POOL_SIZE) -> "Neo4jRepo":
+        """
+        Repo backed by the process-wide pooled driver for (uri, user, password, db); close() leaves the pool warm.
+        """
+        return cls.from_driver(registry.get_neo4j(uri, username, password, database, max_pool_size), database)
+
+    def __enter__(self) -> "Neo4jRepo":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def enable_cache(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL) -> QueryCache:
+        """
+        Put a read-through LRU/TTL cache in front of execute_query. Any write made through this repo
+        clears it; writes made through other connections are only picked up once entries expire.
+        """
+        self._cache = QueryCache(max_entries, ttl)
+        return self._cache
+
+    def disable_cache(self):
+        self._cache = None
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Hit/miss counters of the query cache, or None when caching is off."""
+        return self._cache.stats() if self._cache else None
+
+    def _invalidate_cache(self):
+        if self._cache:
+            self._cache.invalidate()
+
+    @timed("neo4j")
+    def execute_query(self, query: str, parameters: Optional[Dict[str, Any]] = None,
+                      use_cache: bool = True) -> List[Dict[str, Any]]:
         """
         Execute a Cypher query and return the results as a list of dictionaries.
+        With the cache enabled, read queries are answered from it when possible and
+        write queries invalidate it; `use_cache=False` forces a round trip.
         """
         try:
             assert self._driver, RuntimeError("Neo4j driver is not initialized.")
             parameters = parameters or {}
+            key = None
+            write = self._cache is not None and QueryCache.is_write(query)
+            if self._cache and use_cache and not write:
+                key = QueryCache.make_key(query, parameters)
+                cached = self._cache.get(key)
+                if cached is not None:
+                    logger.debug(f"Cache hit for query: {query}")
+                    return cached
             with self._driver.session() as session:
                 result = session.run(query, parameters=parameters)
                 data = [record.data() for record in result]
-                print(f"Executed query: {query} with params: {parameters}, returned {len(data)} rows.")
+                logger.debug(f"Executed query: {query} with params: {parameters}, returned {len(data)} rows.")
+                if write:
+                    self._invalidate_cache()
+                elif key is not None:
+                    self._cache.put(key, data)
                 return data
         except Exception as e:
+            record_error("neo4j", "execute_query")
             logger.exception(f"Failed to execute query: {query}, error: {e}")
 
+    @timed("neo4j")
+    def stream_query(self, query: str, parameters: Optional[Dict[str, Any]] = None,
+                     fetch_size: int = 1000, limit: int = 0, chunk_size: Optional[int] = None,
+                     raise_errors: bool = False) -> Iterator[Union[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Lazily yield `record.data()` rows instead of building the full list like execute_query.
+        Records are pulled from the server `fetch_size` at a time; after `limit` rows (0 means no limit)
+        the session is closed so the rest of the result is never transferred. Put LIMIT in the Cypher
+        itself when the server should not compute the remainder at all.
+        With `chunk_size` the rows are yielded as lists of that size. A failure is logged and ends the
+        stream early; with `raise_errors` it is re-raised so the caller can tell a cut-off result apart.
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            parameters = parameters or {}
+            count = 0
+            with self._driver.session(fetch_size=fetch_size) as session:
+                result = session.run(query, parameters=parameters)
+                chunk = []
+                for record in result:
+                    count += 1
+                    if chunk_size:
+                        chunk.append(record.data())
+                        if len(chunk) >= chunk_size:
+                            yield chunk
+                            chunk = []
+                    else:
+                        yield record.data()
+                    if limit and count >= limit:
+                        break
+                if chunk:
+                    yield chunk
+            logger.debug(f"Streamed {count} rows for query: {query}")
+        except Exception as e:
+            record_error("neo4j", "stream_query")
+            logger.exception(f"Failed to stream query: {query}, error: {e}")
+            if raise_errors:
+                raise
+
+    def stream_nodes(self, label: str, filters: Optional[Dict[str, Any]] = None,
+                     fetch_size: int = 1000, chunk_size: Optional[int] = None) -> Iterator[Any]:
+        """
+        Lazily yield the properties of nodes with `label` matching `filters` (see stream_query).
+        """
+        filters = filters or {}
+        query = f"MATCH (n:{label} {self._key_pattern('filters', filters)}) RETURN properties(n) AS n"
+        for item in self.stream_query(query, {"filters": filters}, fetch_size=fetch_size, chunk_size=chunk_size):
+            yield [row["n"] for row in item] if chunk_size else item["n"]
+
+    @timed("neo4j")
     def create_node(self, label: str, properties: Dict[str, Any]) -> bool:
         """
         Create a node with a given label and properties.
@@ -38,9 +154,11 @@ class Neo4jRepo:
             query = f"CREATE (n:{label} $props)"
             with self._driver.session() as session:
                 session.run(query, props=properties)
-                print(f"Node with label '{label}' created successfully.")
+                self._invalidate_cache()
+                logger.debug(f"Node with label '{label}' created successfully.")
                 return True
         except Exception as e:
+            record_error("neo4j", "create_node")
             logger.exception(f"Failed to create node with label '{label}': {e}")
 
     # def create_nodes(self, labels: List[str], properties_list: List[Dict[str, Any]]) -> bool:
@@ -60,6 +178,7 @@ class Neo4jRepo:
     #     except Exception as e:
     #         logger.exception(f"Failed to create multiple nodes: {e}")
 
+    @timed("neo4j")
     def create_relationship(self, from_label: str, from_key: Dict[str, Any],
                             to_label: str, to_key: Dict[str, Any],
                             rel_type: str, rel_props: Optional[Dict[str, Any]] = None) -> bool:
@@ -69,19 +188,168 @@ class Neo4jRepo:
         try:
             assert self._driver, RuntimeError("Neo4j driver is not initialized.")
             rel_props = rel_props or {}
-            query = (
-                f"MATCH (a:{from_label}), (b:{to_label}) "
-                f"WHERE ALL(k IN keys($from_key) WHERE a[k] = $from_key[k]) "
-                f"AND ALL(k IN keys($to_key) WHERE b[k] = $to_key[k]) "
-                f"CREATE (a)-[r:{rel_type} $rel_props]->(b)"
-            )
+            query = self.create_relationship_query(from_label, from_key, to_label, to_key, rel_type)
             with self._driver.session() as session:
                 session.run(query, rel_props=rel_props, from_key=from_key, to_key=to_key)
-                print(f"Relationship '{rel_type}' created between {from_label} and {to_label}.")
+                self._invalidate_cache()
+                logger.debug(f"Relationship '{rel_type}' created between {from_label} and {to_label}.")
                 return True
         except Exception as e:
+            record_error("neo4j", "create_relationship")
             logger.exception(f"Failed to create relationship '{rel_type}': {e}")
 
+    @timed("neo4j")
+    def merge_node(self, label: str, key: Dict[str, Any], properties: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Create a node identified by `key` if it does not exist yet, then set `properties` on it.
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            properties = properties or {}
+            query = self.merge_node_query(label, key)
+            with self._driver.session() as session:
+                session.run(query, key=key, props=properties)
+                self._invalidate_cache()
+                logger.debug(f"Node with label '{label}' and key {key} merged successfully.")
+                return True
+        except Exception as e:
+            record_error("neo4j", "merge_node")
+            logger.exception(f"Failed to merge node with label '{label}': {e}")
+
+    @timed("neo4j")
+    def merge_relationship(self, from_label: str, from_key: Dict[str, Any],
+                           to_label: str, to_key: Dict[str, Any],
+                           rel_type: str, rel_props: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Upsert both end nodes and the relationship between them in a single statement.
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            rel_props = rel_props or {}
+            query = self.merge_relationship_query(from_label, from_key, to_label, to_key, rel_type)
+            with self._driver.session() as session:
+                session.run(query, rel_props=rel_props, from_key=from_key, to_key=to_key)
+                self._invalidate_cache()
+                logger.debug(f"Relationship '{rel_type}' merged between {from_label} and {to_label}.")
+                return True
+        except Exception as e:
+            record_error("neo4j", "merge_relationship")
+            logger.exception(f"Failed to merge relationship '{rel_type}': {e}")
+
+    @timed("neo4j")
+    def ensure_constraints(self, labels: List[str], key: str = "id") -> int:
+        """
+        Create a uniqueness constraint on `key` for every label so MERGE/MATCH on it become index seeks.
+        Returns the number of labels whose constraint exists after the call.
+        """
+        ensured = 0
+        for label in labels:
+            try:
+                assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+                query = (
+                    f"CREATE CONSTRAINT {label.lower()}_{key}_unique IF NOT EXISTS "
+                    f"FOR (n:{label}) REQUIRE n.{key} IS UNIQUE"
+                )
+                with self._driver.session() as session:
+                    session.run(query).consume()
+                ensured += 1
+                logger.info(f"Uniqueness constraint on {label}.{key} ensured.")
+            except Exception as e:
+                record_error("neo4j", "ensure_constraints")
+                logger.exception(f"Failed to create uniqueness constraint on {label}.{key}: {e}")
+        return ensured
+
+    @staticmethod
+    def _key_pattern(param: str, key: Dict[str, Any]) -> str:
+        """Render `{k: $param.k, ...}` so the planner can use the label/property index for each key."""
+        return "{" + ", ".join(f"`{k}`: ${param}.`{k}`" for k in key) + "}"
+
+    # Query text of the single-entity operations, shared with the query catalog (scripts/query_catalog.py).
+    # Only the key names are rendered into the text; the values are always parameters.
+
+    @classmethod
+    def merge_node_query(cls, label: str, key: Dict[str, Any]) -> str:
+        return f"MERGE (n:{label} {cls._key_pattern('key', key)}) SET n += $props"
+
+    @classmethod
+    def create_relationship_query(cls, from_label: str, from_key: Dict[str, Any], to_label: str,
+                                  to_key: Dict[str, Any], rel_type: str) -> str:
+        return (
+            f"MATCH (a:{from_label} {cls._key_pattern('from_key', from_key)}) "
+            f"MATCH (b:{to_label} {cls._key_pattern('to_key', to_key)}) "
+            f"CREATE (a)-[r:{rel_type} $rel_props]->(b)"
+        )
+
+    @classmethod
+    def merge_relationship_query(cls, from_label: str, from_key: Dict[str, Any], to_label: str,
+                                 to_key: Dict[str, Any], rel_type: str) -> str:
+        return (
+            f"MERGE (a:{from_label} {cls._key_pattern('from_key', from_key)}) "
+            f"MERGE (b:{to_label} {cls._key_pattern('to_key', to_key)}) "
+            f"MERGE (a)-[r:{rel_type}]->(b) "
+            f"SET r += $rel_props"
+        )
+
+    @classmethod
+    def find_nodes_query(cls, label: str, filters: Dict[str, Any]) -> str:
+        return f"MATCH (n:{label} {cls._key_pattern('filters', filters)}) RETURN n"
+
+    @classmethod
+    def update_node_query(cls, label: str, match_props: Dict[str, Any]) -> str:
+        return (f"MATCH (n:{label} {cls._key_pattern('match_props', match_props)}) "
+                f"SET n += $update_props RETURN COUNT(n) AS count")
+
+    @classmethod
+    def delete_node_query(cls, label: str, match_props: Dict[str, Any]) -> str:
+        return (f"MATCH (n:{label} {cls._key_pattern('match_props', match_props)}) "
+                f"DETACH DELETE n RETURN COUNT(n) AS count")
+
+    @timed("neo4j")
+    def profile_query(self, query: str, parameters: Optional[Dict[str, Any]] = None,
+                      mode: str = "PROFILE") -> Optional[Dict[str, Any]]:
+        """
+        Run `query` under PROFILE (executed; the plan carries db hits and rows per operator) or
+        EXPLAIN (planned only, nothing is executed) and return {"plan": the driver's plan dict,
+        "available_after", "consumed_after"} (ms). The result rows are discarded.
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            mode = mode.upper()
+            if mode not in ("PROFILE", "EXPLAIN"):
+                raise ValueError(f"Unknown plan mode '{mode}' (expected PROFILE or EXPLAIN).")
+            with self._driver.session() as session:
+                summary = session.run(f"{mode} {query}", parameters=parameters or {}).consume()
+                plan = summary.profile if mode == "PROFILE" else summary.plan
+                logger.debug(f"Captured {mode} plan for query: {query}")
+                return {"plan": plan, "available_after": summary.result_available_after,
+                        "consumed_after": summary.result_consumed_after}
+        except Exception as e:
+            record_error("neo4j", "profile_query")
+            logger.exception(f"Failed to capture the {mode} plan of query: {query}, error: {e}")
+
+    @timed("neo4j")
+    def write_batch(self, statements: List[Tuple[str, Dict[str, Any]]]) -> bool:
+        """
+        Run several parameterised Cypher statements inside a single write transaction.
+        """
+        try:
+            assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            with self._driver.session() as session:
+                session.execute_write(self._run_statements, statements)
+                self._invalidate_cache()
+                logger.debug(f"Committed batch of {len(statements)} statement(s).")
+                return True
+        except Exception as e:
+            record_error("neo4j", "write_batch")
+            logger.exception(f"Failed to write batch of {len(statements)} statement(s): {e}")
+            return False
+
+    @staticmethod
+    def _run_statements(tx, statements: List[Tuple[str, Dict[str, Any]]]):
+        for query, parameters in statements:
+            tx.run(query, parameters).consume()
+
+    @timed("neo4j")
     def find_nodes(self, label: str, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Find nodes by label and optional filters.
@@ -89,54 +357,65 @@ class Neo4jRepo:
         try:
             assert self._driver, RuntimeError("Neo4j driver is not initialized.")
             filters = filters or {}
-            query = f"MATCH (n:{label} $filters) RETURN n"
+            query = self.find_nodes_query(label, filters)
             with self._driver.session() as session:
                 result = session.run(query, filters=filters)
                 data = [record["n"] for record in result]
-                print(f"Found {len(data)} nodes with label '{label}' and filters {filters}.")
+                logger.debug(f"Found {len(data)} nodes with label '{label}' and filters {filters}.")
                 return data
         except Exception as e:
+            record_error("neo4j", "find_nodes")
             logger.exception(f"Failed to find nodes with label '{label}': {e}")
 
+    @timed("neo4j")
     def update_node(self, label: str, match_props: Dict[str, Any], update_props: Dict[str, Any]) -> int:
         """
         Update node properties based on a match filter.
         """
         try:
             assert self._driver, RuntimeError("Neo4j driver is not initialized.")
-            query = f"MATCH (n:{label} $match_props) SET n += $update_props RETURN COUNT(n) AS count"
+            query = self.update_node_query(label, match_props)
             with self._driver.session() as session:
                 result = session.run(query, match_props=match_props, update_props=update_props)
                 count = result.single()["count"]
-                print(f"Updated {count} node(s) with label '{label}'.")
+                self._invalidate_cache()
+                logger.debug(f"Updated {count} node(s) with label '{label}'.")
                 return count
         except Exception as e:
+            record_error("neo4j", "update_node")
             logger.exception(f"Failed to update node with label '{label}': {e}")
 
+    @timed("neo4j")
     def delete_node(self, label: str, match_props: Dict[str, Any]) -> int:
         """
         Delete nodes matching given properties.
         """
         try:
             assert self._driver, RuntimeError("Neo4j driver is not initialized.")
-            query = f"MATCH (n:{label} $match_props) DETACH DELETE n RETURN COUNT(n) AS count"
+            query = self.delete_node_query(label, match_props)
             with self._driver.session() as session:
-                result = session.run(query)
+                result = session.run(query, match_props=match_props)
                 count = result.single()["count"]
-                print(f"Deleted {count} node(s) with label '{label}'.")
+                self._invalidate_cache()
+                logger.debug(f"Deleted {count} node(s) with label '{label}'.")
                 return count
         except Exception as e:
+            record_error("neo4j", "delete_node")
             logger.exception(f"Failed to delete node with label '{label}': {e}")
 
     def close(self):
-        """Close the Neo4j driver connection."""
+        """Close the Neo4j driver connection (shared/pooled drivers are left to the registry)."""
         try:
             assert self._driver, RuntimeError("Neo4j driver is not initialized.")
+            if self._client is None:
+                logger.debug("Neo4jRepo released; shared driver stays open.")
+                return
             self._driver.close()
             logger.info("Neo4j driver closed successfully.")
         except Exception as e:
             logger.exception(f"Failed to close Neo4j driver: {e}")
 
+    @timed("neo4j")
     def verify_connection(self) -> bool:
         """Verify the connectivity to the Neo4j database."""
         try:
@@ -145,5 +424,6 @@ class Neo4jRepo:
             logger.info(f"Neo4j connectivity verified: {is_connected}")
             return is_connected
         except Exception as e:
+            record_error("neo4j", "verify_connection")
             logger.exception(f"Failed to verify Neo4j connectivity: {e}")
         
\ No newline at end of file
@@ -0,0 +1,93 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL = 300.0
+
+# Cypher clauses that make a statement a write; such statements bypass the cache and invalidate it
+_WRITE_CLAUSES = re.compile(r"\b(CREATE|MERGE|SET|DELETE|REMOVE|DROP|FOREACH|LOAD\s+CSV)\b|\.(write|mutate)\b",
+                            re.IGNORECASE)
+
+
+class QueryCache:
+    """
+    Size-bounded LRU cache with a time-to-live for read query results.
+
+    Keys are (query text with collapsed whitespace, parameters serialised with sorted keys), so the
+    same aggregate asked twice with differently ordered or formatted parameters hits the same entry.
+    Entries older than `ttl` seconds are dropped on access; once `max_entries` is reached the least
+    recently used entry is evicted. `stats()` exposes the hit/miss/eviction counters.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(query: str, parameters: Optional[Dict[str, Any]] = None) -> Hashable:
+        return " ".join(query.split()), json.dumps(parameters or {}, sort_keys=True, default=str)
+
+    @staticmethod
+    def is_write(query: str) -> bool:
+        """True if the statement may modify the graph."""
+        return _WRITE_CLAUSES.search(query) is not None
+
+    def get(self, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        """Cached rows for `key` (a copy), or None on a miss or an expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(row) for row in entry[1]]
+
+    def put(self, key: Hashable, rows: List[Dict[str, Any]]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), [dict(row) for row in rows])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop every entry (called after any write through the repo)."""
+        with self._lock:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+                logger.debug("Query cache invalidated.")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
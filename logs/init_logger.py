@@ -1,8 +1,190 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
-def init_logger():
+# Listeners of the queued mode by logger name, stopped (and drained) on re-init and at exit
+_listeners: Dict[str, Tuple[logging.Logger, logging.handlers.QueueListener]] = {}
+
+
+class _ProcessLocalQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that only queues in the process that started the listener. A forked worker
+    (ProcessPoolExecutor) inherits the handler but not the listener thread, so there it writes
+    through the handlers directly instead of filling a queue nobody drains.
+    """
+
+    def __init__(self, records: "queue.Queue[logging.LogRecord]", handlers: List[logging.Handler]):
+        super().__init__(records)
+        self.handlers = handlers
+        self.pid = os.getpid()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the queue never leaves the process, so nothing has to be pickled: only the arguments are
+        # merged now (they may change later), formatting and tracebacks are left to the listener
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def emit(self, record: logging.LogRecord):
+        if os.getpid() == self.pid:
+            super().emit(record)
+            return
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Thin out a chatty logger: below `level` only every `every`-th record passes and at most
+    `per_second` records per second (a token bucket holding up to `burst`); records at `level` or
+    above always pass. The next record that passes notes how many were suppressed since the last one.
+
+    Only records of the logger `name` and its children are sampled (all of them when `name` is
+    empty); others pass untouched. One filter may sit on several handlers: a record is decided once
+    and the other handlers reuse that decision.
+    """
+
+    def __init__(self, every: int = 1, per_second: Optional[float] = None, burst: Optional[int] = None,
+                 level: int = logging.WARNING, name: str = ""):
+        super().__init__(name)
+        self.every = max(1, int(every))
+        self.per_second = per_second
+        self.burst = burst or max(1, int(per_second or 1))
+        self.level = level
+        self.suppressed = 0
+        self._seen = 0
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+        self._decided = f"_sampled_{id(self)}"
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not super().filter(record):
+            # another logger's record: not ours to sample
+            return True
+        decision = getattr(record, self._decided, None)
+        if decision is None:
+            decision = self._decide(record)
+            setattr(record, self._decided, decision)
+        return decision
+
+    def _decide(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.level:
+            return self._mark(record)
+        with self._lock:
+            self._seen += 1
+            keep = (self._seen - 1) % self.every == 0
+            if keep and self.per_second is not None:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.per_second)
+                self._refilled = now
+                keep = self._tokens >= 1
+                if keep:
+                    self._tokens -= 1
+            if not keep:
+                self.suppressed += 1
+                return False
+        return self._mark(record)
+
+    def _mark(self, record: logging.LogRecord) -> bool:
+        with self._lock:
+            suppressed, self.suppressed = self.suppressed, 0
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar record(s) suppressed)"
+            record.args = None
+        return True
+
+
+def _reached_handlers(logger: logging.Logger) -> List[logging.Handler]:
+    """The handlers a record logged on `logger` is passed to (its own and those of its ancestors)."""
+    handlers: List[logging.Handler] = []
+    current: Optional[logging.Logger] = logger
+    while current is not None:
+        handlers.extend(handler for handler in current.handlers if handler not in handlers)
+        if not current.propagate:
+            break
+        current = current.parent
+    return handlers
+
+
+def sample_logger(name: str, every: int = 1, per_second: Optional[float] = None,
+                  burst: Optional[int] = None) -> SamplingFilter:
+    """
+    Sample the records of logger `name` and of every logger below it (e.g. "data.repo" covers
+    "data.repo.MongoDbRepo"), replacing an earlier sampler for `name`, and return the filter.
+
+    The filter sits on the handlers those records reach, not on the logger: a logger's own
+    filters never see its children's records. Call it after queue_handlers so it lands on the
+    QueueHandler and suppressed records are never queued. The record is still created first;
+    what sampling saves is the formatting and the I/O. Handlers added later are not covered.
+    """
+    sampler = SamplingFilter(every, per_second, burst, name=name)
+    for handler in _reached_handlers(logging.getLogger(name)):
+        for existing in [f for f in handler.filters if isinstance(f, SamplingFilter) and f.name == sampler.name]:
+            handler.removeFilter(existing)
+        handler.addFilter(sampler)
+    return sampler
+
+
+def queue_handlers(logger: Optional[logging.Logger] = None) -> logging.handlers.QueueListener:
+    """
+    Move the handlers of `logger` (default: root) behind a queue: the logger keeps only a
+    QueueHandler and a QueueListener thread formats and writes the records.
+    """
+    logger = logger or logging.getLogger()
+    handlers = []
+    for handler in logger.handlers:
+        # queueing twice keeps the handlers already behind the queue
+        handlers.extend(handler.handlers if isinstance(handler, _ProcessLocalQueueHandler) else [handler])
+    stop_logging(logger)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    records: "queue.Queue[logging.LogRecord]" = queue.Queue()
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listeners[logger.name] = (logger, listener)
+    listener.start()
+    logger.addHandler(_ProcessLocalQueueHandler(records, handlers))
+    return listener
+
+
+def stop_logging(logger: Optional[logging.Logger] = None):
+    """
+    Stop the listener of `logger` (default: every queued logger) once it has written every queued
+    record, and put its handlers back on the logger so later records are written synchronously.
+    """
+    for name in [logger.name] if logger else list(_listeners):
+        if name not in _listeners:
+            continue
+        queued, listener = _listeners.pop(name)
+        listener.stop()
+        for handler in list(queued.handlers):
+            if isinstance(handler, _ProcessLocalQueueHandler):
+                queued.removeHandler(handler)
+                for inner in handler.handlers:
+                    queued.addHandler(inner)
+
+
+atexit.register(stop_logging)
+
+
+def init_logger(queued: bool = False, max_bytes: int = 0, backup_count: int = 5,
+                sampling: Optional[Dict[str, int]] = None):
+    """
+    Log to a timestamped file under logs/logs_records and to the console.
+
+    - `queued`: the root logger only puts records on a queue and a QueueListener thread does the
+      formatting and I/O, so hot loops never wait on the disk or the terminal
+    - `max_bytes`: rotate the file at this size, keeping `backup_count` old files (0: never rotate)
+    - `sampling`: {logger name: every} keeps one in `every` sub-WARNING records of those loggers
+      and their children
+    """
     # Ensure logs folder exists
     log_dir = "logs/logs_records"
     os.makedirs(log_dir, exist_ok=True)
@@ -18,27 +200,80 @@ def init_logger():
     )
 
     # Create handlers: one for file, one for console
-    file_handler = logging.FileHandler(log_path, encoding="utf-8")
+    if max_bytes > 0:
+        file_handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count,
+                                                            encoding="utf-8")
+    else:
+        file_handler = logging.FileHandler(log_path, encoding="utf-8")
     console_handler = logging.StreamHandler()
 
     # Formatter
     formatter = logging.Formatter(log_format, datefmt="%Y-%m-%d %H:%M:%S")
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
+    handlers: List[logging.Handler] = [file_handler, console_handler]
 
     # Get root logger
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
 
     # Avoid duplicate handlers when re-running init
-    if not logger.handlers:
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
-    else:
-        # Update existing handlers
-        logger.handlers.clear()
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+    stop_logging(logger)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+    for handler in handlers:
+        logger.addHandler(handler)
+    if queued:
+        queue_handlers(logger)
+
+    for name, every in (sampling or {}).items():
+        sample_logger(name, every)
 
     logger.info("Logger initialized successfully.")
     return logger
+
+
+class ProgressLogger:
+    """
+    Rate-limited progress reporting for hot loops: `update()` is cheap and only emits a log record
+    every `interval` seconds, as `task progress: rows=... rows_per_sec=...` with the same values in
+    `extra["progress"]` for structured handlers.
+    """
+
+    def __init__(self, logger: logging.Logger, task: str, interval: float = 5.0, unit: str = "rows"):
+        self.logger = logger
+        self.task = task
+        self.interval = interval
+        self.unit = unit
+        self.count = 0
+        self.started = time.perf_counter()
+        self._last_logged = self.started
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self) -> float:
+        elapsed = self.elapsed
+        return self.count / elapsed if elapsed else 0.0
+
+    def update(self, n: int = 1, **fields):
+        self.count += n
+        now = time.perf_counter()
+        if now - self._last_logged >= self.interval:
+            self._last_logged = now
+            self._emit("progress", fields)
+
+    def done(self, **fields) -> float:
+        """Log the final count and rate; returns the rate."""
+        self._emit("done", fields)
+        return self.rate
+
+    def _emit(self, stage: str, fields: dict):
+        progress = {"task": self.task, "stage": stage, self.unit: self.count,
+                    f"{self.unit}_per_sec": round(self.rate, 1), "elapsed": round(self.elapsed, 2), **fields}
+        message = " ".join(f"{key}={value}" for key, value in progress.items() if key not in ("task", "stage"))
+        self.logger.info(f"{self.task} {stage}: {message}", extra={"progress": progress})
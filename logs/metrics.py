@@ -0,0 +1,222 @@
+import bisect
+import functools
+import inspect
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets (seconds) shared by every operation histogram
+DEFAULT_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Size buckets (rows) for batch histograms
+DEFAULT_SIZE_BUCKETS = (1, 10, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+OPERATION_SECONDS = "redeye_operation_seconds"
+OPERATION_ERRORS = "redeye_operation_errors_total"
+IMPORT_ROWS = "redeye_import_rows_total"
+IMPORT_BATCH_ROWS = "redeye_import_batch_rows"
+IMPORT_BATCH_SECONDS = "redeye_import_batch_seconds"
+IMPORT_FAILED_BATCHES = "redeye_import_failed_batches_total"
+IMPORT_ROWS_PER_SEC = "redeye_import_rows_per_second"
+SCORING_USERS_PER_SEC = "redeye_scoring_users_per_second"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense (a value lands in every bucket >= it)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (inf if it lies past the last bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total, rows = 0, []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            rows.append((repr(bound), total))
+        rows.append(("+Inf", self.count))
+        return rows
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters, gauges and histograms keyed by (name, labels).
+
+    Recording is a dict lookup plus an increment under one lock, cheap enough for per-call use in
+    the repos. `to_prometheus()` renders the text exposition format and `to_json()` a snapshot with
+    p50/p95/p99 bucket estimates. Use `metrics` (the module-level instance).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> Tuple[str, Labels]:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(self._key(name, labels), 0)
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        with self._lock:
+            return self._histograms.get(self._key(name, labels))
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            return {
+                "counters": [{"name": n, "labels": dict(l), "value": v} for (n, l), v in sorted(self._counters.items())],
+                "gauges": [{"name": n, "labels": dict(l), "value": v} for (n, l), v in sorted(self._gauges.items())],
+                "histograms": [
+                    {
+                        "name": n, "labels": dict(l), "count": h.count, "sum": h.sum,
+                        "mean": h.sum / h.count if h.count else 0.0,
+                        "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99),
+                    }
+                    for (n, l), h in sorted(self._histograms.items(), key=lambda item: item[0])
+                ],
+            }
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        return json.dumps(self.snapshot(), indent=indent, default=str)
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for kind, series in (("counter", self._counters), ("gauge", self._gauges)):
+                typed = set()
+                for (name, labels), value in sorted(series.items()):
+                    if name not in typed:
+                        lines.append(f"# TYPE {name} {kind}")
+                        typed.add(name)
+                    lines.append(f"{name}{_render_labels(labels)} {value}")
+            typed = set()
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{name}_bucket{_render_labels(labels + (('le', bound),))} {count}")
+                lines.append(f"{name}_sum{_render_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_render_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _render_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def timed(backend: str, operation: Optional[str] = None) -> Callable:
+    """
+    Decorator recording the latency of a repo method in OPERATION_SECONDS{backend, operation}.
+    Generator methods (streaming cursors) are timed until the caller stops iterating; coroutines
+    (the async repos) until they are awaited to completion.
+    """
+    def decorate(fn: Callable) -> Callable:
+        name = operation or fn.__name__
+
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def async_generator_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    async for item in fn(*args, **kwargs):
+                        yield item
+                finally:
+                    metrics.observe(OPERATION_SECONDS, time.perf_counter() - started, backend=backend, operation=name)
+            return async_generator_wrapper
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def coroutine_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    metrics.observe(OPERATION_SECONDS, time.perf_counter() - started, backend=backend, operation=name)
+            return coroutine_wrapper
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    yield from fn(*args, **kwargs)
+                finally:
+                    metrics.observe(OPERATION_SECONDS, time.perf_counter() - started, backend=backend, operation=name)
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe(OPERATION_SECONDS, time.perf_counter() - started, backend=backend, operation=name)
+        return wrapper
+
+    return decorate
+
+
+def record_error(backend: str, operation: str):
+    metrics.inc(OPERATION_ERRORS, backend=backend, operation=operation)
+
+
+def record_batch(importer: str, rows: int, seconds: float, ok: bool = True):
+    """Account one importer batch: rows, batch size and batch latency (and a failure if not `ok`)."""
+    metrics.inc(IMPORT_ROWS, rows, importer=importer)
+    metrics.observe(IMPORT_BATCH_ROWS, rows, DEFAULT_SIZE_BUCKETS, importer=importer)
+    metrics.observe(IMPORT_BATCH_SECONDS, seconds, importer=importer)
+    if not ok:
+        metrics.inc(IMPORT_FAILED_BATCHES, importer=importer)
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,541 @@
+"""
+Non-interactive entry point for batch jobs:
+
+    python redeye.py import-mongo relations.csv --db lastfm --resume
+    python redeye.py import-neo4j relations.csv --workers 4
+    python redeye.py import-all relations.csv --batch-size 5000
+    python redeye.py profile relations.csv --output profiles.npz
+    python redeye.py score relations.csv --to-mongo --workers 4
+    python redeye.py export neo4j --output snapshot/ --format arrow
+    python redeye.py plans capture --output plans.json --baseline plans-previous.json
+    python redeye.py bench --only reader
+
+Only the standard library is imported at startup; drivers, importers and numpy are imported by the
+subcommand that needs them. Connection settings come from the command line, then REDEYE_*
+environment variables, then a JSON config file (--config or REDEYE_CONFIG), then the defaults below.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("redeye")
+
+EXIT_OK = 0
+# the command ran but some rows were not written (failed batches, aborted import)
+EXIT_FAILED = 1
+# bad arguments or configuration (argparse also exits with 2)
+EXIT_USAGE = 2
+# a database could not be reached
+EXIT_UNAVAILABLE = 3
+EXIT_INTERRUPTED = 130
+
+# Mirrors the importer defaults without importing them (they pull in the drivers)
+DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "mongo": {"uri": "localhost", "port": 27017, "db": "redeye", "collection": "users", "chunk_size": 50000},
+    "neo4j": {"uri": "bolt://localhost:7687", "user": "neo4j", "password": None, "db": "neo4j", "batch_size": 1000},
+    "import": {"workers": 1, "pool_size": 100},
+}
+
+# (section, key) -> environment variable
+ENVIRONMENT = {
+    ("mongo", "uri"): "REDEYE_MONGO_URI",
+    ("mongo", "port"): "REDEYE_MONGO_PORT",
+    ("mongo", "db"): "REDEYE_MONGO_DB",
+    ("mongo", "collection"): "REDEYE_MONGO_COLLECTION",
+    ("neo4j", "uri"): "REDEYE_NEO4J_URI",
+    ("neo4j", "user"): "REDEYE_NEO4J_USER",
+    ("neo4j", "password"): "REDEYE_NEO4J_PASSWORD",
+    ("neo4j", "db"): "REDEYE_NEO4J_DB",
+    ("import", "workers"): "REDEYE_WORKERS",
+    ("import", "pool_size"): "REDEYE_POOL_SIZE",
+}
+
+
+class ConfigError(Exception):
+    pass
+
+
+def load_config(path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Defaults, overlaid with the JSON config file (if any) and then the REDEYE_* environment."""
+    config = {section: dict(values) for section, values in DEFAULTS.items()}
+    path = path or os.environ.get("REDEYE_CONFIG")
+    if path:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ConfigError(f"Cannot read config file '{path}': {e}")
+        for section, values in loaded.items():
+            if section not in config or not isinstance(values, dict):
+                raise ConfigError(f"Unknown config section '{section}' in '{path}'")
+            config[section].update(values)
+    for (section, key), variable in ENVIRONMENT.items():
+        if variable in os.environ:
+            config[section][key] = os.environ[variable]
+    return config
+
+
+def _setting(args: argparse.Namespace, config: Dict[str, Dict[str, Any]], section: str, key: str,
+             cast: type = str) -> Any:
+    value = getattr(args, key, None)
+    if value is None:
+        value = config[section][key]
+    if value is None:
+        raise ConfigError(f"Missing {section} {key}: pass --{key.replace('_', '-')}, set "
+                          f"{ENVIRONMENT.get((section, key), 'it in the config file')} or add it to the config file")
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise ConfigError(f"Invalid {section} {key}: {value!r}")
+
+
+def _import_status(stats: Optional[Dict[str, Any]]) -> int:
+    if not stats:
+        return EXIT_OK
+    sinks = stats.get("sinks", {}).values()
+    if stats.get("error") or stats.get("errors") or stats.get("failed_batches") \
+            or any(sink["failed_batches"] for sink in sinks):
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+def _print_stats(stats: Optional[Dict[str, Any]]):
+    if stats:
+        print(json.dumps(stats, default=str))
+
+
+def cmd_import_mongo(args: argparse.Namespace, config: Dict[str, Dict[str, Any]]) -> int:
+    uri = _setting(args, config, "mongo", "uri")
+    port = _setting(args, config, "mongo", "port", int)
+    db = _setting(args, config, "mongo", "db")
+    collection = _setting(args, config, "mongo", "collection")
+    chunk_size = _setting(args, config, "mongo", "chunk_size", int)
+    workers = _setting(args, config, "import", "workers", int)
+    pool_size = _setting(args, config, "import", "pool_size", int)
+
+    from scripts.checkpoint import default_checkpoint_path
+    checkpoint_path = args.checkpoint or default_checkpoint_path(args.input_file, f"mongo-{collection}")
+    if workers > 1:
+        from scripts.parallel_import import import_parallel, DEFAULT_BATCH_SIZE
+        return _finish(import_parallel(args.input_file, workers, mongo={"uri": uri, "port": port, "db": db},
+                                       collection_name=collection, batch_size=chunk_size or DEFAULT_BATCH_SIZE,
+                                       checkpoint_path=checkpoint_path, resume=args.resume))
+
+    from data.repo.MongoDbRepo import MongoDBRepo
+    from scripts.import_csv_to_mongo import import_lastfm_file, import_lastfm_file_aggregated
+    with MongoDBRepo.shared(uri, port, db, pool_size) as repo:
+        if not _reachable():
+            return EXIT_UNAVAILABLE
+        if chunk_size > 0:
+            return _finish(import_lastfm_file_aggregated(repo, args.input_file, collection, chunk_size,
+                                                         checkpoint_path=checkpoint_path, resume=args.resume))
+        if args.resume:
+            logger.warning("--resume needs a chunk size > 0; the row-by-row import always starts over.")
+        return _finish(import_lastfm_file(repo, args.input_file, collection))
+
+
+def cmd_import_neo4j(args: argparse.Namespace, config: Dict[str, Dict[str, Any]]) -> int:
+    uri = _setting(args, config, "neo4j", "uri")
+    user = _setting(args, config, "neo4j", "user")
+    password = _setting(args, config, "neo4j", "password")
+    db = _setting(args, config, "neo4j", "db")
+    batch_size = _setting(args, config, "neo4j", "batch_size", int)
+    workers = _setting(args, config, "import", "workers", int)
+    pool_size = _setting(args, config, "import", "pool_size", int)
+
+    from scripts.checkpoint import default_checkpoint_path
+    checkpoint_path = args.checkpoint or default_checkpoint_path(args.input_file, f"neo4j-{db}")
+    if workers > 1:
+        from scripts.parallel_import import import_parallel, DEFAULT_BATCH_SIZE
+        return _finish(import_parallel(args.input_file, workers,
+                                       neo4j={"uri": uri, "user": user, "password": password, "db": db},
+                                       batch_size=batch_size or DEFAULT_BATCH_SIZE,
+                                       checkpoint_path=checkpoint_path, resume=args.resume))
+
+    from data.repo.Neo4jRepo import Neo4jRepo
+    from scripts.import_csv_to_graph import import_lastfm_like_file, import_lastfm_like_file_bulk
+    with Neo4jRepo.shared(db, uri, user, password, pool_size) as repo:
+        if not _reachable():
+            return EXIT_UNAVAILABLE
+        if batch_size > 0:
+            return _finish(import_lastfm_like_file_bulk(repo, args.input_file, batch_size,
+                                                        checkpoint_path=checkpoint_path, resume=args.resume))
+        if args.resume:
+            logger.warning("--resume needs a batch size > 0; the row-by-row import always starts over.")
+        return _finish(import_lastfm_like_file(repo, args.input_file))
+
+
+def cmd_import_all(args: argparse.Namespace, config: Dict[str, Dict[str, Any]]) -> int:
+    """Parse the file once and write it to MongoDB and Neo4j concurrently."""
+    mongo = {key: _setting(args, config, "mongo", key) for key in ("uri", "db", "collection")}
+    neo4j = {key: _setting(args, config, "neo4j", key) for key in ("uri", "user", "password", "db")}
+    port = _setting(args, config, "mongo", "port", int)
+    pool_size = _setting(args, config, "import", "pool_size", int)
+    batch_size = max(1, _setting(args, config, "neo4j", "batch_size", int))
+    workers = _setting(args, config, "import", "workers", int)
+
+    from scripts.checkpoint import default_checkpoint_path
+    checkpoint_path = args.checkpoint or default_checkpoint_path(args.input_file, f"all-{mongo['collection']}")
+    if workers > 1:
+        # every shard worker already writes each of its batches to both databases
+        from scripts.parallel_import import import_parallel
+        return _finish(import_parallel(args.input_file, workers,
+                                       mongo={"uri": mongo["uri"], "port": port, "db": mongo["db"]}, neo4j=neo4j,
+                                       collection_name=mongo["collection"], batch_size=batch_size,
+                                       checkpoint_path=checkpoint_path, resume=args.resume))
+
+    from data.repo.MongoDbRepo import MongoDBRepo
+    from data.repo.Neo4jRepo import Neo4jRepo
+    from scripts.pipeline import import_dual
+    with MongoDBRepo.shared(mongo["uri"], port, mongo["db"], pool_size) as mongo_repo, \
+            Neo4jRepo.shared(neo4j["db"], neo4j["uri"], neo4j["user"], neo4j["password"], pool_size) as neo4j_repo:
+        if not _reachable():
+            return EXIT_UNAVAILABLE
+        return _finish(import_dual(args.input_file, mongo_repo, neo4j_repo, mongo["collection"],
+                                   batch_size, args.queue_size,
+                                   checkpoint_path=checkpoint_path, resume=args.resume))
+
+
+def _item_genres(args: argparse.Namespace, config: Dict[str, Dict[str, Any]]) -> Optional[Dict[Any, str]]:
+    """Event/Group genres from Neo4j with --genres-from-neo4j, else None."""
+    if not args.genres_from_neo4j:
+        return None
+    from data.repo.Neo4jRepo import Neo4jRepo
+    from src.features import load_item_genres_from_neo4j
+    with Neo4jRepo.shared(_setting(args, config, "neo4j", "db"), _setting(args, config, "neo4j", "uri"),
+                          _setting(args, config, "neo4j", "user"),
+                          _setting(args, config, "neo4j", "password")) as repo:
+        if not _reachable():
+            raise ConnectionError("Neo4j is not reachable for --genres-from-neo4j")
+        return load_item_genres_from_neo4j(repo)
+
+
+def _relation_graph(args: argparse.Namespace):
+    """The CSRGraph of the input files, numbered with the --ids dictionary when given."""
+    from src.analytics.graph import load_relation_file
+
+    ids = None
+    if args.ids:
+        from src.analytics.ids import IdDictionary
+        # reuse the persisted numbering so codes stay stable across runs; new ids are appended
+        ids = IdDictionary.load(args.ids) if os.path.exists(os.path.join(args.ids, "meta.json")) else IdDictionary()
+    graph = load_relation_file(args.input_files, ids=ids)
+    if ids is not None:
+        ids.save(args.ids)
+    return graph
+
+
+def cmd_profile(args: argparse.Namespace, config: Dict[str, Dict[str, Any]]) -> int:
+    """Build the per-user profile store from relation files and save it and/or write it to MongoDB."""
+    if not args.output and not args.to_mongo:
+        raise ConfigError("profile needs --output and/or --to-mongo")
+
+    from src.features import build_profiles, PROFILES_COLLECTION
+
+    item_genres = _item_genres(args, config)
+    store = build_profiles(_relation_graph(args), item_genres, top_n=args.top_n)
+    if args.output:
+        store.save(args.output)
+    if args.to_mongo:
+        from data.repo.MongoDbRepo import MongoDBRepo
+        with MongoDBRepo.shared(_setting(args, config, "mongo", "uri"), _setting(args, config, "mongo", "port", int),
+                                _setting(args, config, "mongo", "db")) as repo:
+            if not _reachable():
+                return EXIT_UNAVAILABLE
+            written = store.write_to_mongo(repo, args.collection or PROFILES_COLLECTION)
+            if written < len(store):
+                logger.error(f"Only {written}/{len(store)} profiles were written.")
+                return EXIT_FAILED
+    return EXIT_OK
+
+
+def cmd_score(args: argparse.Namespace, config: Dict[str, Dict[str, Any]]) -> int:
+    """Score every user's Big 5 OCEAN traits from relation files and save them and/or write them to MongoDB."""
+    if not args.output and not args.to_mongo:
+        raise ConfigError("score needs --output and/or --to-mongo")
+
+    import numpy as np
+    from src.features import LinearTraitModel, TRAITS, TRAITS_COLLECTION, score_traits
+
+    model = LinearTraitModel.load(args.model) if args.model else None
+    item_genres = _item_genres(args, config)
+    graph = _relation_graph(args)
+    workers = _setting(args, config, "import", "workers", int)
+
+    if not args.to_mongo:
+        stats = score_traits(graph, None, item_genres, model, args.batch_size, workers)
+    else:
+        from data.repo.MongoDbRepo import MongoDBRepo
+        with MongoDBRepo.shared(_setting(args, config, "mongo", "uri"), _setting(args, config, "mongo", "port", int),
+                                _setting(args, config, "mongo", "db")) as repo:
+            if not _reachable():
+                return EXIT_UNAVAILABLE
+            stats = score_traits(graph, repo, item_genres, model, args.batch_size, workers,
+                                 args.collection or TRAITS_COLLECTION)
+    if args.output:
+        np.savez(args.output, user_ids=np.array(stats["user_ids"], dtype=np.str_), scores=stats["scores"],
+                 traits=np.array(TRAITS))
+    if args.to_mongo and stats["written"] < stats["users"]:
+        logger.error(f"Only {stats['written']}/{stats['users']} trait scores were written.")
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+def cmd_plans(args: argparse.Namespace, config: Dict[str, Dict[str, Any]]) -> int:
+    """List the Cypher query catalog, capture its plans into a JSON report, or check a report for regressions."""
+    if args.action == "list":
+        from scripts.query_catalog import describe
+        for name, kind, description in describe():
+            print(f"{name:<45} {kind:<6} {description}")
+        return EXIT_OK
+
+    from scripts.query_plans import capture_plans, check_plans, format_findings, load_report, save_report
+    if args.action == "capture":
+        if not args.output:
+            raise ConfigError("plans capture needs --output")
+        parameters = {}
+        for option in args.param:
+            name, _, value = option.partition("=")
+            try:
+                parameters[name] = json.loads(value)
+            except ValueError:
+                parameters[name] = value
+        from data.repo.Neo4jRepo import Neo4jRepo
+        with Neo4jRepo.shared(_setting(args, config, "neo4j", "db"), _setting(args, config, "neo4j", "uri"),
+                              _setting(args, config, "neo4j", "user"),
+                              _setting(args, config, "neo4j", "password")) as repo:
+            if not _reachable():
+                return EXIT_UNAVAILABLE
+            report = capture_plans(repo, args.only.split(",") if args.only else None, args.mode, parameters,
+                                   args.allow_writes)
+        save_report(report, args.output)
+    else:
+        if not args.report:
+            raise ConfigError("plans check needs a report file")
+        report = load_report(args.report)
+
+    baseline = load_report(args.baseline) if args.baseline else None
+    findings = check_plans(report, baseline, args.tolerance)
+    print(format_findings(findings))
+    return EXIT_FAILED if any(finding["severity"] == "error" for finding in findings) else EXIT_OK
+
+
+def cmd_export(args: argparse.Namespace, config: Dict[str, Dict[str, Any]]) -> int:
+    """Snapshot MongoDB or Neo4j to Parquet / Arrow IPC files under --output."""
+    if args.source == "neo4j":
+        from data.repo.Neo4jRepo import Neo4jRepo
+        from scripts.export_snapshot import export_neo4j
+        with Neo4jRepo.shared(_setting(args, config, "neo4j", "db"), _setting(args, config, "neo4j", "uri"),
+                              _setting(args, config, "neo4j", "user"),
+                              _setting(args, config, "neo4j", "password")) as repo:
+            if not _reachable():
+                return EXIT_UNAVAILABLE
+            manifest = export_neo4j(repo, args.output, args.format, batch_size=args.batch_size)
+    else:
+        from data.repo.MongoDbRepo import MongoDBRepo
+        from scripts.export_snapshot import export_mongo
+        with MongoDBRepo.shared(_setting(args, config, "mongo", "uri"), _setting(args, config, "mongo", "port", int),
+                                _setting(args, config, "mongo", "db")) as repo:
+            if not _reachable():
+                return EXIT_UNAVAILABLE
+            manifest = export_mongo(repo, args.output, _setting(args, config, "mongo", "collection"), args.format,
+                                    batch_size=args.batch_size)
+    for table in manifest["tables"]:
+        print(f"{table['path']}: {table['rows']} rows")
+    return EXIT_OK
+
+
+def cmd_bench(args: argparse.Namespace, config: Dict[str, Dict[str, Any]]) -> int:
+    from benchmarks.run import main as run_benchmarks
+    return run_benchmarks(args.bench_args)
+
+
+def _reachable() -> bool:
+    """Ping the drivers opened so far; a job should fail fast rather than log one error per batch."""
+    from data.database.DriverRegistry import registry
+    unreachable = [target for target, healthy in registry.health_check().items() if not healthy]
+    for target in unreachable:
+        logger.error(f"Cannot reach {target}.")
+    return not unreachable
+
+
+def _finish(stats: Optional[Dict[str, Any]]) -> int:
+    _print_stats(stats)
+    return _import_status(stats)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="redeye", description="Red Eye batch commands.")
+    parser.add_argument("--config", help="JSON config file with mongo/neo4j/import sections (default: $REDEYE_CONFIG)")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    parser.add_argument("--log-file", action="store_true", help="also write the log to logs/logs_records")
+    parser.add_argument("--log-max-bytes", type=int, default=100 * 1024 * 1024,
+                        help="rotate the --log-file at this size (0: never)")
+    parser.add_argument("--log-sample", action="append", default=[], metavar="LOGGER=EVERY",
+                        help="keep one in EVERY sub-WARNING records of LOGGER and its children, e.g. data.repo=1000")
+    parser.add_argument("--log-sync", action="store_true",
+                        help="write log records on the calling thread instead of a background one")
+    parser.add_argument("--metrics", metavar="FILE", help="write the metrics snapshot here when the command ends "
+                                                          "(.prom for Prometheus text, JSON otherwise)")
+    commands = parser.add_subparsers(dest="command", metavar="<command>")
+    commands.required = True
+
+    def add_import_options(command: argparse.ArgumentParser):
+        command.add_argument("input_file", help="pipe-delimited user|relation|target file")
+        command.add_argument("--workers", type=int, help="import with N processes, one shard each")
+        command.add_argument("--pool-size", type=int, help="driver connection pool size")
+        command.add_argument("--resume", action="store_true", help="continue from the last checkpoint")
+        command.add_argument("--checkpoint", help="checkpoint file (default: next to the input file)")
+
+    mongo = commands.add_parser("import-mongo", help="import a relation file into MongoDB")
+    add_import_options(mongo)
+    mongo.add_argument("--uri")
+    mongo.add_argument("--port", type=int)
+    mongo.add_argument("--db")
+    mongo.add_argument("--collection")
+    mongo.add_argument("--chunk-size", type=int, help="target ids per flush (0: one document per row)")
+    mongo.set_defaults(handler=cmd_import_mongo)
+
+    neo4j = commands.add_parser("import-neo4j", help="import a relation file into Neo4j")
+    add_import_options(neo4j)
+    neo4j.add_argument("--uri")
+    neo4j.add_argument("--user")
+    neo4j.add_argument("--password")
+    neo4j.add_argument("--db")
+    neo4j.add_argument("--batch-size", type=int, help="rows per transaction (0: row by row)")
+    neo4j.set_defaults(handler=cmd_import_neo4j)
+
+    both = commands.add_parser("import-all", help="import a relation file into MongoDB and Neo4j in one pass")
+    add_import_options(both)
+    both.add_argument("--batch-size", type=int, help="rows per batch, shared by both sinks")
+    both.add_argument("--queue-size", type=int, default=4, help="batches buffered per sink before reading blocks")
+    for option in ("uri", "port", "db", "collection", "user", "password"):
+        # two databases, so connection settings come from the env or config file
+        both.set_defaults(**{option: None})
+    both.set_defaults(handler=cmd_import_all)
+
+    profile = commands.add_parser("profile", help="build per-user profiles from relation files")
+    profile.add_argument("input_files", nargs="+", help="relation file(s), read in order")
+    profile.add_argument("--output", help="save the profile store (.npz)")
+    profile.add_argument("--to-mongo", action="store_true", help="write the profiles to MongoDB")
+    profile.add_argument("--collection", help="profiles collection (default: profiles)")
+    profile.add_argument("--top-n", type=int, default=10, help="co-attendees kept per user")
+    profile.add_argument("--genres-from-neo4j", action="store_true", help="read Event/Group genres from Neo4j")
+    profile.add_argument("--ids", metavar="DIR", help="id dictionary directory to build the graph with (created if missing)")
+    for option in ("uri", "port", "db", "user", "password"):
+        # connection settings for --to-mongo / --genres-from-neo4j come from the env or config file
+        profile.set_defaults(**{option: None})
+    profile.set_defaults(handler=cmd_profile)
+
+    score = commands.add_parser("score", help="score Big 5 OCEAN traits from relation files")
+    score.add_argument("input_files", nargs="+", help="relation file(s), read in order")
+    score.add_argument("--output", help="save the scores (.npz with user_ids, scores, traits)")
+    score.add_argument("--to-mongo", action="store_true", help="write the scores to MongoDB")
+    score.add_argument("--collection", help="trait scores collection (default: traits)")
+    score.add_argument("--model", help="LinearTraitModel .npz (default: the baseline weights)")
+    score.add_argument("--workers", type=int, help="score with N processes")
+    score.add_argument("--batch-size", type=int, default=8192, help="users per model call")
+    score.add_argument("--genres-from-neo4j", action="store_true", help="read Event/Group genres from Neo4j")
+    score.add_argument("--ids", metavar="DIR", help="id dictionary directory to build the graph with (created if missing)")
+    for option in ("uri", "port", "db", "user", "password"):
+        score.set_defaults(**{option: None})
+    score.set_defaults(handler=cmd_score)
+
+    plans = commands.add_parser("plans", help="Cypher query catalog: list, capture PROFILE/EXPLAIN plans, check them")
+    plans.add_argument("action", choices=["list", "capture", "check"])
+    plans.add_argument("report", nargs="?", help="report to check (check)")
+    plans.add_argument("--output", help="write the captured report here (capture)")
+    plans.add_argument("--baseline", help="earlier report to compare against")
+    plans.add_argument("--mode", choices=["profile", "explain"], default="profile",
+                       help="profile executes read queries; writes are only explained unless --allow-writes")
+    plans.add_argument("--allow-writes", action="store_true", help="PROFILE write queries too (commits them)")
+    plans.add_argument("--only", help="comma-separated query names or prefixes (e.g. usecase.)")
+    plans.add_argument("--param", action="append", default=[], metavar="NAME=VALUE",
+                       help="override a sampled query parameter (VALUE is JSON or a plain string)")
+    plans.add_argument("--tolerance", type=float, default=0.5, help="allowed relative growth of db hits")
+    for option in ("uri", "db", "user", "password"):
+        plans.set_defaults(**{option: None})
+    plans.set_defaults(handler=cmd_plans)
+
+    export = commands.add_parser("export", help="snapshot a database to Parquet / Arrow IPC files")
+    export.add_argument("source", choices=["neo4j", "mongo"])
+    export.add_argument("--output", required=True, help="snapshot directory")
+    export.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    export.add_argument("--batch-size", type=int, default=50000, help="records per round trip and record batch")
+    for option in ("uri", "port", "db", "collection", "user", "password"):
+        export.set_defaults(**{option: None})
+    export.set_defaults(handler=cmd_export)
+
+    # every argument after `bench` is passed through to benchmarks.run (see `bench --help`)
+    bench = commands.add_parser("bench", help="run the benchmark suite (arguments go to benchmarks.run)",
+                                add_help=False)
+    bench.set_defaults(handler=cmd_bench)
+    return parser
+
+
+def _configure_logging(args: argparse.Namespace):
+    sampling = {}
+    for option in args.log_sample:
+        name, _, every = option.partition("=")
+        if not name or not every.isdigit() or int(every) < 1:
+            raise ConfigError(f"Invalid --log-sample {option!r} (expected LOGGER=EVERY)")
+        sampling[name] = int(every)
+
+    from logs.init_logger import init_logger, queue_handlers, sample_logger
+    if args.log_file:
+        init_logger(queued=not args.log_sync, max_bytes=args.log_max_bytes, sampling=sampling)
+    else:
+        logging.basicConfig(format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+        if not args.log_sync:
+            queue_handlers()
+        for name, every in sampling.items():
+            sample_logger(name, every)
+    logging.getLogger().setLevel(args.log_level)
+
+
+def _write_metrics(path: str):
+    from logs.metrics import metrics
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(metrics.to_prometheus() if path.endswith(".prom") else metrics.to_json(indent=2))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "bench":
+        args.bench_args = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    try:
+        _configure_logging(args)
+        config = load_config(args.config)
+        return args.handler(args, config)
+    except ConfigError as e:
+        logger.error(str(e))
+        return EXIT_USAGE
+    except ConnectionError as e:
+        logger.error(f"Database unavailable: {e}")
+        return EXIT_UNAVAILABLE
+    except ImportError as e:
+        # an optional dependency of the subcommand (e.g. pyarrow for export) is missing
+        logger.error(str(e))
+        return EXIT_USAGE
+    except RuntimeError as e:
+        logger.error(str(e))
+        return EXIT_FAILED
+    except KeyboardInterrupt:
+        logger.warning("Interrupted.")
+        return EXIT_INTERRUPTED
+    finally:
+        if args.metrics:
+            _write_metrics(args.metrics)
+        from logs.init_logger import stop_logging
+        # drain the queued log records before the exit code is returned
+        stop_logging()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
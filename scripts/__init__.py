@@ -1,5 +1,34 @@
-from .import_csv_to_mongo import import_lastfm_file
-from .import_csv_to_graph import import_lastfm_like_file
+import importlib
+
+# Exported name -> submodule. Submodules are imported on first access, so `scripts.schema` and
+# `scripts.relation_reader` stay usable (e.g. by the offline loaders) without pymongo or neo4j.
+_EXPORTS = {
+    "import_lastfm_file": "import_csv_to_mongo",
+    "import_lastfm_file_aggregated": "import_csv_to_mongo",
+    "import_lastfm_like_file": "import_csv_to_graph",
+    "import_lastfm_like_file_bulk": "import_csv_to_graph",
+    "ImportCheckpoint": "checkpoint",
+    "default_checkpoint_path": "checkpoint",
+    "import_dual": "pipeline",
+    "export_neo4j": "export_snapshot",
+    "export_mongo": "export_snapshot",
+    "read_snapshot": "export_snapshot",
+    "CATALOG": "query_catalog",
+    "CatalogQuery": "query_catalog",
+    "get_query": "query_catalog",
+    "capture_plans": "query_plans",
+    "check_plans": "query_plans",
+    "load_report": "query_plans",
+    "save_report": "query_plans",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'scripts' has no attribute '{name}'")
+    return getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
 
 # from data.repo.MongoDbRepo import MongoDBRepo
-# from data.repo.Neo4jRepo import Neo4jRepo
\ No newline at end of file
+# from data.repo.Neo4jRepo import Neo4jRepo
@@ -0,0 +1,76 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def default_checkpoint_path(input_file: str, target: str) -> str:
+    """State file next to the input, one per import target (e.g. "neo4j" or "mongo-users")."""
+    return f"{input_file}.{target}.checkpoint.json"
+
+
+class ImportCheckpoint:
+    """
+    Small JSON state file recording how far an import has committed.
+
+    After every committed transaction the importer calls `commit` with the batch id and the
+    batch's resume point (byte `offset` plus `skip` rows, see RelationBatch); the file is replaced
+    atomically, so a crash leaves either the previous or the new state. `resume_point` returns
+    where to restart, or the range start when there is no usable state (missing, finished, or
+    written for another file or byte range). Replaying the batch that was in flight is harmless
+    because the batched importers only MERGE / $addToSet.
+    """
+
+    def __init__(self, path: str, input_file: str, start: int = 0, end: Optional[int] = None):
+        self.path = path
+        self.input_file = input_file
+        self.start = start
+        self.end = end
+        self.state: Dict[str, Any] = {}
+
+    def _identity(self) -> Dict[str, Any]:
+        stat = os.stat(self.input_file)
+        return {"input_file": os.path.abspath(self.input_file), "size": stat.st_size,
+                "mtime": int(stat.st_mtime), "start": self.start, "end": self.end}
+
+    def resume_point(self) -> Dict[str, int]:
+        """{"offset", "skip", "batch_id", "rows"} to continue from (a fresh start if nothing to resume)."""
+        fresh = {"offset": self.start, "skip": 0, "batch_id": 0, "rows": 0}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return fresh
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable checkpoint '{self.path}': {e}")
+            return fresh
+
+        identity = self._identity()
+        if any(state.get(key) != value for key, value in identity.items()):
+            logger.warning(f"Checkpoint '{self.path}' was written for another file or range; starting over.")
+            return fresh
+        if state.get("completed"):
+            logger.info(f"Checkpoint '{self.path}' marks the import as completed; nothing to resume.")
+            return {"offset": identity["size"] if self.end is None else self.end, "skip": 0,
+                    "batch_id": state["batch_id"], "rows": state["rows"]}
+        self.state = state
+        logger.info(f"Resuming '{self.input_file}' after batch {state['batch_id']} "
+                    f"(byte {state['offset']}, {state['rows']} rows committed).")
+        return {key: state[key] for key in ("offset", "skip", "batch_id", "rows")}
+
+    def commit(self, batch_id: int, offset: int, skip: int, rows: int, completed: bool = False):
+        """Record that everything up to (offset, skip) is committed."""
+        self.state = {**self._identity(), "batch_id": batch_id, "offset": offset, "skip": skip,
+                      "rows": rows, "completed": completed, "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(temporary, self.path)
+
+    def complete(self):
+        if self.state:
+            self.commit(self.state["batch_id"], self.state["offset"], self.state["skip"], self.state["rows"],
+                        completed=True)
@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from data.repo.MongoDbRepo import MongoDBRepo
+from data.repo.Neo4jRepo import Neo4jRepo
+from logs.init_logger import ProgressLogger
+from scripts.schema import FIELD_MAP as MONGO_RELATION_MAP, NODE_MAP, RELATION_MAP as GRAPH_RELATION_MAP
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"parquet": "parquet", "arrow": "arrow"}
+DEFAULT_FORMAT = "parquet"
+DEFAULT_EXPORT_BATCH_SIZE = 50000
+MANIFEST_FILE = "manifest.json"
+# Node properties exported next to `id` (missing ones are null)
+NODE_PROPERTIES = {"Event": ("genre",), "Group": ("genre",)}
+# relationship type -> (source label, target label), as written by the importers
+REL_ENDPOINTS = {GRAPH_RELATION_MAP[relation]: ("User", NODE_MAP[relation]) for relation in GRAPH_RELATION_MAP}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Snapshot export needs pyarrow (pip install pyarrow).")
+    return pyarrow
+
+
+class _TableWriter:
+    """Appends record batches of string columns to one Parquet or Arrow IPC file."""
+
+    def __init__(self, path: str, columns: Sequence[str], fmt: str, metadata: Optional[Dict[str, str]] = None):
+        pa = _pyarrow()
+        self.path = path
+        self.rows = 0
+        self._temporary = f"{path}.tmp"
+        self._closed = False
+        self._schema = pa.schema([(column, pa.string()) for column in columns], metadata=metadata)
+        if fmt == "parquet":
+            self._writer = pa.parquet.ParquetWriter(self._temporary, self._schema)
+        else:
+            self._sink = pa.OSFile(self._temporary, "wb")
+            self._writer = pa.ipc.new_file(self._sink, self._schema)
+        self._fmt = fmt
+
+    def write(self, rows: List[Dict[str, Any]]):
+        pa = _pyarrow()
+        arrays = [pa.array([row.get(field.name) for row in rows], type=pa.string()) for field in self._schema]
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self._schema))
+        self.rows += len(rows)
+
+    def _close_files(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._writer.close()
+        if self._fmt != "parquet":
+            self._sink.close()
+
+    def close(self) -> int:
+        self._close_files()
+        os.replace(self._temporary, self.path)
+        return self.rows
+
+    def discard(self):
+        """Close the files if still open and remove the partial temporary file (a no-op after close)."""
+        try:
+            self._close_files()
+        except Exception as e:
+            logger.warning(f"Closing the partial '{self._temporary}' failed: {e}")
+        if os.path.exists(self._temporary):
+            os.remove(self._temporary)
+
+
+def _write_table(directory: str, kind: str, name: str, columns: Sequence[str], chunks: Iterable[List[Dict[str, Any]]],
+                 fmt: str, metadata: Dict[str, str], progress: ProgressLogger) -> Dict[str, Any]:
+    """Write `chunks` (read with raise_errors, so a failed pull raises here) to one table file."""
+    os.makedirs(os.path.join(directory, kind), exist_ok=True)
+    relative = os.path.join(kind, f"{name}.{FORMATS[fmt]}")
+    writer = _TableWriter(os.path.join(directory, relative), columns, fmt, metadata)
+    try:
+        for chunk in chunks:
+            if chunk:
+                writer.write(chunk)
+                progress.update(len(chunk), table=f"{kind}/{name}")
+        rows = writer.close()
+    except Exception as e:
+        raise RuntimeError(f"Reading {kind}/{name} failed ({e}); the snapshot in '{directory}' is incomplete.") from e
+    finally:
+        writer.discard()
+    return {"kind": kind, "name": name, "path": relative, "rows": rows, "columns": list(columns), **metadata}
+
+
+def _discard_manifest(directory: str):
+    # a directory without a manifest is an incomplete snapshot: drop the previous one before any
+    # table is overwritten, so an export that fails halfway never looks like a finished one
+    try:
+        os.remove(os.path.join(directory, MANIFEST_FILE))
+    except FileNotFoundError:
+        pass
+
+
+def _write_manifest(directory: str, source: str, fmt: str, tables: List[Dict[str, Any]], started: float):
+    manifest = {
+        "source": source, "format": fmt, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seconds": round(time.perf_counter() - started, 3), "tables": tables,
+    }
+    # written last, to a temporary file moved into place, so readers never see a partial manifest
+    path = os.path.join(directory, MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+    return manifest
+
+
+def export_neo4j(repo: Neo4jRepo, directory: str, fmt: str = DEFAULT_FORMAT,
+                 labels: Optional[Iterable[str]] = None, rel_types: Optional[Iterable[str]] = None,
+                 batch_size: int = DEFAULT_EXPORT_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Stream every node label and relationship type to one columnar file each under `directory`
+    (`nodes/<Label>` with `id` plus NODE_PROPERTIES, `edges/<TYPE>` with `source`/`target` ids).
+
+    Results are pulled `batch_size` records at a time and written as one record batch each, so
+    memory stays bounded by the batch size; a manifest.json listing the tables and row counts is
+    written last. Returns the manifest.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown snapshot format '{fmt}' (expected one of {sorted(FORMATS)}).")
+    started = time.perf_counter()
+    progress = ProgressLogger(logger, f"Neo4j snapshot to '{directory}'")
+    _discard_manifest(directory)
+    tables = []
+
+    for label in sorted(labels or set(NODE_MAP.values())):
+        properties = NODE_PROPERTIES.get(label, ())
+        returns = ", ".join(["n.id AS id"] + [f"n.{name} AS {name}" for name in properties])
+        query = f"MATCH (n:{label}) RETURN {returns}"
+        chunks = repo.stream_query(query, fetch_size=batch_size, chunk_size=batch_size, raise_errors=True)
+        tables.append(_write_table(directory, "nodes", label, ("id",) + tuple(properties), chunks, fmt,
+                                   {"label": label}, progress))
+
+    for rel_type in sorted(rel_types or REL_ENDPOINTS):
+        source_label, target_label = REL_ENDPOINTS.get(rel_type, ("", ""))
+        source = f"a:{source_label}" if source_label else "a"
+        target = f"b:{target_label}" if target_label else "b"
+        query = f"MATCH ({source})-[:{rel_type}]->({target}) RETURN a.id AS source, b.id AS target"
+        chunks = repo.stream_query(query, fetch_size=batch_size, chunk_size=batch_size, raise_errors=True)
+        tables.append(_write_table(directory, "edges", rel_type, ("source", "target"), chunks, fmt,
+                                   {"rel_type": rel_type, "source_label": source_label,
+                                    "target_label": target_label}, progress))
+
+    progress.done(tables=len(tables))
+    return _write_manifest(directory, "neo4j", fmt, tables, started)
+
+
+def export_mongo(repo: MongoDBRepo, directory: str, collection_name: str = "users", fmt: str = DEFAULT_FORMAT,
+                 batch_size: int = DEFAULT_EXPORT_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Snapshot the aggregated user documents with the same layout as export_neo4j: `nodes/User`
+    and one `edges/<TYPE>` table per relation array. Each relation is one pass over the
+    collection that projects only that array, so no document is held longer than its batch.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown snapshot format '{fmt}' (expected one of {sorted(FORMATS)}).")
+    started = time.perf_counter()
+    progress = ProgressLogger(logger, f"Mongo snapshot of '{collection_name}' to '{directory}'")
+    _discard_manifest(directory)
+
+    def user_rows():
+        for chunk in repo.iter_many(collection_name, {}, projection={"_id": 0, "user_id": 1},
+                                    batch_size=batch_size, chunk_size=batch_size, raise_errors=True):
+            yield [{"id": document["user_id"]} for document in chunk]
+
+    def edge_rows(field: str):
+        for chunk in repo.iter_many(collection_name, {field: {"$exists": True}},
+                                    projection={"_id": 0, "user_id": 1, field: 1},
+                                    batch_size=batch_size, chunk_size=batch_size, raise_errors=True):
+            yield [{"source": document["user_id"], "target": target}
+                   for document in chunk for target in document.get(field, ())]
+
+    tables = [_write_table(directory, "nodes", "User", ("id",), user_rows(), fmt, {"label": "User"}, progress)]
+    for relation, field in MONGO_RELATION_MAP.items():
+        rel_type = GRAPH_RELATION_MAP[relation]
+        tables.append(_write_table(directory, "edges", rel_type, ("source", "target"), edge_rows(field), fmt,
+                                   {"rel_type": rel_type, "source_label": "User",
+                                    "target_label": NODE_MAP[relation]}, progress))
+
+    progress.done(tables=len(tables))
+    return _write_manifest(directory, "mongo", fmt, tables, started)
+
+
+def read_snapshot(directory: str, memory_map: bool = True) -> Dict[str, Any]:
+    """
+    Open every table of a snapshot as a pyarrow.Table keyed "nodes/<Label>" / "edges/<TYPE>".
+    Arrow IPC files are memory-mapped and read zero-copy; Parquet files are memory-mapped and decoded.
+    """
+    pa = _pyarrow()
+    with open(os.path.join(directory, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    tables = {}
+    for table in manifest["tables"]:
+        path = os.path.join(directory, table["path"])
+        key = f"{table['kind']}/{table['name']}"
+        if manifest["format"] == "arrow":
+            source = pa.memory_map(path, "r") if memory_map else pa.OSFile(path, "rb")
+            tables[key] = pa.ipc.open_file(source).read_all()
+        else:
+            tables[key] = pa.parquet.read_table(path, memory_map=memory_map)
+    return tables
@@ -1,34 +1,44 @@
 import argparse
 import csv
 import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
 from data.repo.Neo4jRepo import Neo4jRepo  # adjust the import path
+from logs.init_logger import ProgressLogger
+from logs.metrics import metrics, record_batch, IMPORT_ROWS, IMPORT_ROWS_PER_SEC
+from scripts.checkpoint import ImportCheckpoint
+from scripts.relation_reader import ChangeCallback, RelationBatch, iter_relation_batches
+from scripts.schema import NODE_MAP, RELATION_MAP
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-RELATION_MAP = {
-    "event": "ATTENDED",
-    "friend": "FRIEND_WITH",
-    "group": "MEMBER_OF",
-    "neighbor": "NEIGHBOR_WITH"
-}
-
-NODE_MAP = {
-    "event": "Event",
-    "friend": "User",
-    "group": "Group",
-    "neighbor": "User"
-}
-
-def import_lastfm_like_file(repo: Neo4jRepo, input_file: str):
+DEFAULT_BATCH_SIZE = 1000
+
+
+def bootstrap_schema(repo: Neo4jRepo) -> int:
+    """Create the `id` uniqueness constraints for every label the importer writes."""
+    return repo.ensure_constraints(sorted(set(NODE_MAP.values())))
+
+
+def import_lastfm_like_file(repo: Neo4jRepo, input_file: str,
+                            on_change: Optional[ChangeCallback] = None) -> Dict[str, float]:
+    """
+    Row-by-row import: one MERGE round trip per row.
+    Returns {"rows" (merged), "errors" (rows whose merge failed), "seconds", "rows_per_sec"},
+    plus "error" when the import stopped early.
+    """
+    stats = {"rows": 0, "errors": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+    started = time.perf_counter()
+    progress = ProgressLogger(logger, f"Neo4j import of '{input_file}'")
     try:
         # if not repo.verify_connection():
         #     logger.error("Cannot connect to Neo4j database.")
         #     return
-        
+        bootstrap_schema(repo)
+
         with open(input_file, "r", encoding="utf-8") as file:
             reader = csv.reader(file, delimiter="|")
-            count = 0
             # Make a query to input all nodes and relationships one time
             for row in reader:
                 if len(row) != 3:
@@ -38,25 +48,116 @@ def import_lastfm_like_file(repo: Neo4jRepo, input_file: str):
                     continue
 
                 rel_type = RELATION_MAP[relation_type]
-                user_node_label = "User"
                 target_node_label = NODE_MAP[relation_type]
 
-                # Create User node
-                repo.create_node("User", {"id": user_id})
-                # Create target node (Event, Group, or another User)
-                repo.create_node(target_node_label, {"id": target_id})
-
-                # Create relationship
-                repo.create_relationship(
+                # Upsert User node, target node (Event, Group, or another User) and relationship
+                merged = repo.merge_relationship(
                     from_label="User",
                     from_key={"id": user_id},
                     to_label=target_node_label,
                     to_key={"id": target_id},
                     rel_type=rel_type
                 )
-                count += 1
-                if count % 1000 == 0:
-                    print(f"Processed {count} lines.")
+                if merged:
+                    stats["rows"] += 1
+                    if on_change:
+                        on_change([(user_id, relation_type, target_id)])
+                else:
+                    stats["errors"] += 1
+                progress.update()
+
+    except Exception as e:
+        stats["error"] = str(e)
+        logger.error(f"Failed to import data from '{input_file}': {e}")
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    metrics.inc(IMPORT_ROWS, stats["rows"], importer="neo4j")
+    metrics.set(IMPORT_ROWS_PER_SEC, stats["rows_per_sec"], importer="neo4j")
+    progress.done(errors=stats["errors"])
+    return stats
+
+
+def build_merge_query(target_label: str, rel_type: str) -> str:
+    """Parameterised UNWIND/MERGE statement for one (target label, relationship type) pair."""
+    return (
+        "UNWIND $rows AS row "
+        "MERGE (a:User {id: row.from_id}) "
+        f"MERGE (b:{target_label} {{id: row.to_id}}) "
+        f"MERGE (a)-[:{rel_type}]->(b)"
+    )
+
+
+def build_batch_statements(batch: Iterable[Tuple[str, str, str]]) -> List[Tuple[str, Dict]]:
+    """Group a batch of (user_id, relation_type, target_id) rows into one statement per relationship type."""
+    grouped: Dict[Tuple[str, str], List[Dict[str, str]]] = {}
+    for user_id, relation_type, target_id in batch:
+        key = (NODE_MAP[relation_type], RELATION_MAP[relation_type])
+        grouped.setdefault(key, []).append({"from_id": user_id, "to_id": target_id})
+
+    return [
+        (build_merge_query(target_label, rel_type), {"rows": rows})
+        for (target_label, rel_type), rows in grouped.items()
+    ]
+
+
+def import_lastfm_like_file_bulk(repo: Neo4jRepo, input_file: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                                 on_change: Optional[ChangeCallback] = None,
+                                 checkpoint_path: Optional[str] = None, resume: bool = False) -> Dict[str, float]:
+    """
+    Bulk variant of import_lastfm_like_file: rows are grouped into batches of `batch_size`
+    and every batch is written with UNWIND ... MERGE in a single transaction.
+    `on_change` is called with the rows of every committed batch (e.g. ProfileUpdater.record).
+
+    With `checkpoint_path` the committed position is saved after every transaction and the import
+    stops at the first failed batch; `resume` continues from the saved position. Batches are pure
+    MERGEs, so replaying the one that was in flight during a crash creates no duplicates.
+    Returns throughput statistics for the run ("rows" counts committed rows only; "error" is set
+    when it stopped early).
+    """
+    stats = {"rows": 0, "batches": 0, "failed_batches": 0, "resumed_rows": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+    started = time.perf_counter()
+
+    checkpoint = ImportCheckpoint(checkpoint_path, input_file) if checkpoint_path else None
+    point = checkpoint.resume_point() if checkpoint and resume else {"offset": 0, "skip": 0, "batch_id": 0, "rows": 0}
+    stats["resumed_rows"] = point["rows"]
+    progress = ProgressLogger(logger, f"Bulk Neo4j import of '{input_file}'")
+
+    def flush(batch: RelationBatch):
+        batch_started = time.perf_counter()
+        committed = repo.write_batch(build_batch_statements(batch.rows()))
+        record_batch("neo4j_bulk", len(batch), time.perf_counter() - batch_started, ok=committed)
+        if not committed:
+            stats["failed_batches"] += 1
+        else:
+            # only committed rows count towards "rows" and rows_per_sec
+            stats["rows"] += len(batch)
+            if on_change:
+                on_change(list(batch.rows()))
+        stats["batches"] += 1
+        progress.update(len(batch), batches=stats["batches"], failed_batches=stats["failed_batches"])
+        if checkpoint:
+            if not committed:
+                raise RuntimeError(f"batch {point['batch_id'] + stats['batches']} was not committed; "
+                                   f"rerun with resume to retry from '{checkpoint.path}'")
+            checkpoint.commit(point["batch_id"] + stats["batches"], batch.offset, batch.skip,
+                              point["rows"] + stats["rows"])
+
+    try:
+        bootstrap_schema(repo)
+        batch_size = max(1, int(batch_size))
+        for batch in iter_relation_batches(input_file, RELATION_MAP, batch_size,
+                                           start=point["offset"], skip_rows=point["skip"]):
+            flush(batch)
+        if checkpoint:
+            checkpoint.complete()
 
     except Exception as e:
-        logger.error(f"Failed to import data from '{input_file}': {e}")
\ No newline at end of file
+        stats["error"] = str(e)
+        logger.error(f"Failed to import data from '{input_file}': {e}")
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    metrics.set(IMPORT_ROWS_PER_SEC, stats["rows_per_sec"], importer="neo4j_bulk")
+    progress.done(batches=stats["batches"], failed_batches=stats["failed_batches"])
+    return stats
@@ -1,24 +1,46 @@
 import argparse
 import csv
 import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
 from data.repo.MongoDbRepo import MongoDBRepo  # adjust import path
+from logs.init_logger import ProgressLogger
+from logs.metrics import metrics, record_batch, IMPORT_ROWS, IMPORT_ROWS_PER_SEC
+from scripts.checkpoint import ImportCheckpoint
+from scripts.relation_reader import ChangeCallback, RelationBatch, iter_relation_batches
+from scripts.schema import FIELD_MAP as RELATION_MAP  # relation types -> document fields
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Map relation types to document fields
-RELATION_MAP = {
-    "event": "events",
-    "friend": "friends",
-    "group": "groups",
-    "neighbor": "neighbors"
-}
+# Maximum number of buffered target ids before the aggregated documents are flushed
+DEFAULT_CHUNK_SIZE = 50000
 
-def import_lastfm_file(repo: MongoDBRepo, input_file: str, collection_name: str = "users"):
+# The unique key backs the per-user upserts; the multikey indexes on the relation arrays back the
+# use-case queries ("who attended event X"). The array indexes are built after a bulk load, which
+# is cheaper than maintaining them through every $addToSet.
+KEY_INDEX = ([("user_id", 1)], {"unique": True})
+ARRAY_INDEXES = [([(field, 1)], {}) for field in RELATION_MAP.values()]
+
+
+def bootstrap_indexes(repo: MongoDBRepo, collection_name: str = "users", arrays: bool = True) -> List[str]:
+    """Ensure the user_id key index and (with `arrays`) the multikey relation indexes."""
+    return repo.ensure_indexes(collection_name, [KEY_INDEX] + (ARRAY_INDEXES if arrays else []))
+
+
+def import_lastfm_file(repo: MongoDBRepo, input_file: str, collection_name: str = "users",
+                       on_change: Optional[ChangeCallback] = None) -> Dict[str, float]:
+    """
+    Row-by-row import: one inserted document per row.
+    Returns {"rows" (inserted), "errors" (rows whose insert failed), "seconds", "rows_per_sec"},
+    plus "error" when the import stopped early.
+    """
+    stats = {"rows": 0, "errors": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+    started = time.perf_counter()
+    progress = ProgressLogger(logger, f"Mongo import of '{input_file}'")
     try:
         repo.add_collection(collection_name)
 
-        count = 0
         with open(input_file, "r", encoding="utf-8") as f:
             reader = csv.reader(f, delimiter="|")
             
@@ -33,12 +55,101 @@ def import_lastfm_file(repo: MongoDBRepo, input_file: str, collection_name: str
 
                 # Insert new user document
                 doc = {"user_id": user_id, field: [target_id]}
-                repo.insert_one(collection_name, doc)
+                if repo.insert_one(collection_name, doc):
+                    stats["rows"] += 1
+                    if on_change:
+                        on_change([(user_id, relation_type, target_id)])
+                else:
+                    stats["errors"] += 1
+                progress.update()
+
+    except Exception as e:
+        stats["error"] = str(e)
+        logger.error(f"Failed to import data from '{input_file}': {e}")
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    metrics.inc(IMPORT_ROWS, stats["rows"], importer="mongo")
+    metrics.set(IMPORT_ROWS_PER_SEC, stats["rows_per_sec"], importer="mongo")
+    progress.done(errors=stats["errors"])
+    return stats
+
+
+def group_by_user(rows: Iterable[Tuple[str, str, str]]) -> Dict[str, Dict[str, List[str]]]:
+    """Fold (user_id, relation_type, target_id) rows into {user_id: {field: [target_id, ...]}}."""
+    documents: Dict[str, Dict[str, List[str]]] = {}
+    for user_id, relation_type, target_id in rows:
+        documents.setdefault(user_id, {}).setdefault(RELATION_MAP[relation_type], []).append(target_id)
+    return documents
 
-                count += 1
-                if count % 1000 == 0:
-                    print(f"Processed {count} lines.")
 
-        logger.info(f"Completed import. Total relationships processed: {count}")
+def import_lastfm_file_aggregated(repo: MongoDBRepo, input_file: str, collection_name: str = "users",
+                                  chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                  on_change: Optional[ChangeCallback] = None,
+                                  checkpoint_path: Optional[str] = None, resume: bool = False) -> Dict[str, float]:
+    """
+    Streaming variant of import_lastfm_file that keeps one document per user.
+    Rows are grouped by user_id into events/friends/groups/neighbors arrays and flushed
+    as unordered $addToSet upserts whenever `chunk_size` target ids are buffered,
+    so memory stays bounded regardless of the file size.
+    `on_change` is called with the rows of every flushed chunk (e.g. ProfileUpdater.record).
+
+    With `checkpoint_path` the committed position is saved after every flush and the import stops
+    at the first failed flush; `resume` continues from the saved position. $addToSet upserts are
+    idempotent, so replaying the chunk that was in flight during a crash adds nothing twice.
+    "rows" counts the rows of committed flushes only; failed flushes are counted in "failed_batches".
+    """
+    stats = {"rows": 0, "flushes": 0, "failed_batches": 0, "upserted": 0, "modified": 0, "resumed_rows": 0,
+             "seconds": 0.0, "rows_per_sec": 0.0}
+    started = time.perf_counter()
+
+    checkpoint = ImportCheckpoint(checkpoint_path, input_file) if checkpoint_path else None
+    point = checkpoint.resume_point() if checkpoint and resume else {"offset": 0, "skip": 0, "batch_id": 0, "rows": 0}
+    stats["resumed_rows"] = point["rows"]
+    progress = ProgressLogger(logger, f"Aggregated Mongo import of '{input_file}'")
+
+    def flush(batch: RelationBatch):
+        documents = group_by_user(batch.rows())
+        flush_started = time.perf_counter()
+        counts = repo.upsert_add_to_set(collection_name, "user_id", documents)
+        record_batch("mongo_aggregated", len(batch), time.perf_counter() - flush_started, ok=counts is not None)
+        committed = counts is not None
+        if committed:
+            stats["rows"] += len(batch)
+            if on_change:
+                on_change(list(batch.rows()))
+        else:
+            stats["failed_batches"] += 1
+        counts = counts or {}
+        stats["flushes"] += 1
+        stats["upserted"] += counts.get("upserted", 0)
+        stats["modified"] += counts.get("modified", 0)
+        progress.update(len(batch), flushes=stats["flushes"])
+        if checkpoint:
+            if not committed:
+                raise RuntimeError(f"flush {point['batch_id'] + stats['flushes']} was not committed; "
+                                   f"rerun with resume to retry from '{checkpoint.path}'")
+            checkpoint.commit(point["batch_id"] + stats["flushes"], batch.offset, batch.skip,
+                              point["rows"] + stats["rows"])
+
+    try:
+        repo.add_collection(collection_name)
+        bootstrap_indexes(repo, collection_name, arrays=False)
+        chunk_size = max(1, int(chunk_size))
+
+        for batch in iter_relation_batches(input_file, RELATION_MAP, chunk_size,
+                                           start=point["offset"], skip_rows=point["skip"]):
+            flush(batch)
+        bootstrap_indexes(repo, collection_name)
+        if checkpoint:
+            checkpoint.complete()
+
     except Exception as e:
+        stats["error"] = str(e)
         logger.error(f"Failed to import data from '{input_file}': {e}")
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    metrics.set(IMPORT_ROWS_PER_SEC, stats["rows_per_sec"], importer="mongo_aggregated")
+    progress.done(flushes=stats["flushes"])
+    return stats
@@ -0,0 +1,185 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from data.repo.MongoDbRepo import MongoDBRepo
+from data.repo.Neo4jRepo import Neo4jRepo
+from logs.metrics import metrics, IMPORT_FAILED_BATCHES, IMPORT_ROWS, IMPORT_ROWS_PER_SEC
+from scripts.checkpoint import ImportCheckpoint
+from scripts.import_csv_to_graph import DEFAULT_BATCH_SIZE, build_batch_statements, bootstrap_schema
+from scripts.import_csv_to_mongo import bootstrap_indexes, group_by_user
+from scripts.relation_reader import RelationBatch, iter_relation_batches
+from scripts.schema import RELATION_MAP
+
+logger = logging.getLogger(__name__)
+
+
+def split_into_shards(input_file: str, num_shards: int) -> List[Tuple[int, int]]:
+    """
+    Split a file into at most `num_shards` byte ranges [start, end) whose boundaries fall on line starts
+    (none for an empty file).
+    """
+    size = os.path.getsize(input_file)
+    # every shard needs at least one byte, so a tiny file gets fewer shards than workers
+    num_shards = max(1, min(int(num_shards), size))
+    boundaries = [0]
+    with open(input_file, "rb") as f:
+        for i in range(1, num_shards):
+            pos = size * i // num_shards
+            if pos <= 0:
+                continue
+            # Step back one byte so a line starting exactly at `pos` is kept whole
+            f.seek(pos - 1)
+            f.readline()
+            boundary = f.tell()
+            if boundary > boundaries[-1] and boundary < size:
+                boundaries.append(boundary)
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def _import_shard(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Worker entry point: parse one shard, batch it and write it to every configured sink.
+    Each worker opens its own driver(s); connections are never shared across processes.
+    With a checkpoint the shard stops at its first failed batch so a resumed run retries it.
+    """
+    stats = {"shard": task["shard"], "rows": 0, "skipped": 0, "batches": 0, "errors": 0,
+             "resumed_rows": 0, "seconds": 0.0}
+    started = time.perf_counter()
+    mongo_repo = None
+    neo4j_repo = None
+    checkpoint = None
+    point = {"offset": task["start"], "skip": 0, "batch_id": 0, "rows": 0}
+
+    def flush(batch: RelationBatch):
+        errors = stats["errors"]
+        if mongo_repo is not None:
+            if mongo_repo.upsert_add_to_set(task["collection_name"], "user_id", group_by_user(batch.rows())) is None:
+                stats["errors"] += 1
+        if neo4j_repo is not None:
+            if not neo4j_repo.write_batch(build_batch_statements(batch.rows())):
+                stats["errors"] += 1
+        stats["batches"] += 1
+        if stats["errors"] == errors:
+            # only batches every sink committed count towards "rows"
+            stats["rows"] += len(batch)
+        if checkpoint:
+            if stats["errors"]:
+                raise RuntimeError(f"batch {point['batch_id'] + stats['batches']} was not committed")
+            checkpoint.commit(point["batch_id"] + stats["batches"], batch.offset, batch.skip,
+                              point["rows"] + stats["rows"])
+
+    try:
+        if task.get("checkpoint_path"):
+            checkpoint = ImportCheckpoint(task["checkpoint_path"], task["input_file"], task["start"], task["end"])
+            if task.get("resume"):
+                point = checkpoint.resume_point()
+                stats["resumed_rows"] = point["rows"]
+
+        mongo = task.get("mongo")
+        neo4j = task.get("neo4j")
+        if mongo:
+            mongo_repo = MongoDBRepo(mongo["uri"], mongo["port"], mongo["db"])
+        if neo4j:
+            neo4j_repo = Neo4jRepo(neo4j["db"], neo4j["uri"], neo4j["user"], neo4j["password"])
+
+        for batch in iter_relation_batches(task["input_file"], RELATION_MAP, task["batch_size"],
+                                           start=point["offset"], end=task["end"], stats=stats,
+                                           skip_rows=point["skip"]):
+            flush(batch)
+        if checkpoint:
+            checkpoint.complete()
+
+    except Exception as e:
+        stats["errors"] += 1
+        logger.exception(f"Shard {task['shard']} failed: {e}")
+    finally:
+        if mongo_repo is not None:
+            mongo_repo.close()
+        if neo4j_repo is not None:
+            neo4j_repo.close()
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def import_parallel(input_file: str, workers: int,
+                    mongo: Optional[Dict[str, Any]] = None,
+                    neo4j: Optional[Dict[str, Any]] = None,
+                    collection_name: str = "users",
+                    batch_size: int = DEFAULT_BATCH_SIZE,
+                    checkpoint_path: Optional[str] = None, resume: bool = False) -> Dict[str, Any]:
+    """
+    Import a pipe-delimited relation file with `workers` processes, one line-aligned shard each.
+
+    `mongo` is {"uri", "port", "db"} and `neo4j` is {"uri", "user", "password", "db"}; either or both
+    may be given. Shard results are collected in shard order so progress logs and totals are deterministic.
+    With `checkpoint_path` every shard keeps its own state file (`<checkpoint_path>.<shard>`); resuming
+    only picks them up when the file is split the same way, i.e. with the same number of workers.
+    """
+    totals = {"shards": 0, "rows": 0, "skipped": 0, "batches": 0, "errors": 0, "resumed_rows": 0,
+              "seconds": 0.0, "rows_per_sec": 0.0}
+    started = time.perf_counter()
+
+    try:
+        if not mongo and not neo4j:
+            raise ValueError("At least one sink (mongo or neo4j) must be configured.")
+
+        # Schema/index bootstrap happens once, before workers start writing concurrently
+        if mongo:
+            repo = MongoDBRepo(mongo["uri"], mongo["port"], mongo["db"])
+            repo.add_collection(collection_name)
+            bootstrap_indexes(repo, collection_name, arrays=False)
+            repo.close()
+        if neo4j:
+            repo = Neo4jRepo(neo4j["db"], neo4j["uri"], neo4j["user"], neo4j["password"])
+            bootstrap_schema(repo)
+            repo.close()
+
+        shards = split_into_shards(input_file, workers)
+        tasks = [
+            {
+                "shard": index, "input_file": input_file, "start": start, "end": end,
+                "mongo": mongo, "neo4j": neo4j,
+                "collection_name": collection_name, "batch_size": max(1, int(batch_size)),
+                "checkpoint_path": f"{checkpoint_path}.{index}" if checkpoint_path else None, "resume": resume,
+            }
+            for index, (start, end) in enumerate(shards)
+        ]
+        logger.info(f"Importing '{input_file}' as {len(tasks)} shard(s) with {workers} worker(s)...")
+
+        with ProcessPoolExecutor(max_workers=max(1, int(workers))) as executor:
+            for result in executor.map(_import_shard, tasks):
+                totals["shards"] += 1
+                for key in ("rows", "skipped", "batches", "errors", "resumed_rows"):
+                    totals[key] += result[key]
+                # workers record into their own process; the parent accounts the shard totals
+                metrics.inc(IMPORT_ROWS, result["rows"], importer="parallel")
+                metrics.inc(IMPORT_FAILED_BATCHES, result["errors"], importer="parallel")
+                logger.info(
+                    f"Shard {result['shard'] + 1}/{len(tasks)} done: {result['rows']} rows, "
+                    f"{result['errors']} error(s) in {result['seconds']:.1f}s "
+                    f"(total {totals['rows']} rows, {totals['errors']} error(s))."
+                )
+
+        if mongo:
+            # multikey indexes are built once over the loaded data rather than maintained per upsert
+            repo = MongoDBRepo(mongo["uri"], mongo["port"], mongo["db"])
+            bootstrap_indexes(repo, collection_name)
+            repo.close()
+
+    except Exception as e:
+        totals["errors"] += 1
+        logger.error(f"Failed to import data from '{input_file}': {e}")
+
+    totals["seconds"] = time.perf_counter() - started
+    totals["rows_per_sec"] = totals["rows"] / totals["seconds"] if totals["seconds"] else 0.0
+    metrics.set(IMPORT_ROWS_PER_SEC, totals["rows_per_sec"], importer="parallel")
+    logger.info(
+        f"Completed parallel import: {totals['rows']} rows, {totals['skipped']} skipped, "
+        f"{totals['errors']} error(s), {totals['rows_per_sec']:.0f} rows/sec."
+    )
+    return totals
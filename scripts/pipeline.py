@@ -0,0 +1,230 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from data.repo.MongoDbRepo import MongoDBRepo
+from data.repo.Neo4jRepo import Neo4jRepo
+from logs.init_logger import ProgressLogger
+from logs.metrics import metrics, record_batch, IMPORT_ROWS_PER_SEC
+from scripts.checkpoint import ImportCheckpoint
+from scripts.import_csv_to_graph import DEFAULT_BATCH_SIZE, build_batch_statements, bootstrap_schema
+from scripts.import_csv_to_mongo import bootstrap_indexes, group_by_user
+from scripts.relation_reader import ChangeCallback, RelationBatch, iter_relation_batches
+from scripts.schema import RELATION_MAP
+
+logger = logging.getLogger(__name__)
+
+# Batches buffered per sink; the reader blocks once a sink is this far behind
+DEFAULT_QUEUE_SIZE = 4
+
+_STOP = object()
+
+
+class Sink:
+    """
+    One pipeline consumer: a worker thread that takes batches from its own bounded queue and
+    writes them with `write(batch) -> bool` (True once committed).
+
+    A full queue blocks the reader (`put`), so a slow sink throttles parsing instead of letting
+    batches pile up; the time the reader spent blocked is reported as `blocked_seconds`.
+    """
+
+    def __init__(self, name: str, write: Callable[[RelationBatch], bool], queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.name = name
+        self.write = write
+        self.queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.stats = {"rows": 0, "batches": 0, "failed_batches": 0, "busy_seconds": 0.0,
+                      "blocked_seconds": 0.0, "rows_per_sec": 0.0}
+        self.failed = False
+        self.on_done: Optional[Callable[[int, bool], None]] = None
+        self.stop_on_failure = False
+        self._thread = threading.Thread(target=self._run, name=f"sink-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def put(self, item: Any):
+        started = time.perf_counter()
+        while not self.failed:
+            try:
+                self.queue.put(item, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        self.stats["blocked_seconds"] += time.perf_counter() - started
+
+    def join(self):
+        self._thread.join()
+
+    def _run(self):
+        stopped = False
+        try:
+            while True:
+                item = self.queue.get()
+                if item is _STOP:
+                    stopped = True
+                    return
+                sequence, batch = item
+                started = time.perf_counter()
+                try:
+                    committed = self.write(batch)
+                except Exception as e:
+                    logger.exception(f"Sink '{self.name}' failed on batch {sequence}: {e}")
+                    committed = False
+                seconds = time.perf_counter() - started
+                record_batch(f"pipeline_{self.name}", len(batch), seconds, ok=committed)
+                self.stats["busy_seconds"] += seconds
+                self.stats["batches"] += 1
+                if committed:
+                    self.stats["rows"] += len(batch)
+                else:
+                    self.stats["failed_batches"] += 1
+                    if self.stop_on_failure:
+                        # the failed batch is never acknowledged, so nothing after it is either
+                        return
+                if self.on_done:
+                    self.on_done(sequence, committed)
+        except Exception as e:
+            logger.exception(f"Sink '{self.name}' stopped: {e}")
+        finally:
+            if not stopped:
+                # nothing drains the queue any more: `put` and the reader must give up on this sink
+                self.failed = True
+
+
+def mongo_sink(repo: MongoDBRepo, collection_name: str = "users", queue_size: int = DEFAULT_QUEUE_SIZE) -> Sink:
+    return Sink("mongo",
+                lambda batch: repo.upsert_add_to_set(collection_name, "user_id", group_by_user(batch.rows())) is not None,
+                queue_size)
+
+
+def neo4j_sink(repo: Neo4jRepo, queue_size: int = DEFAULT_QUEUE_SIZE) -> Sink:
+    return Sink("neo4j", lambda batch: repo.write_batch(build_batch_statements(batch.rows())), queue_size)
+
+
+def import_dual(input_file: str, mongo_repo: Optional[MongoDBRepo] = None, neo4j_repo: Optional[Neo4jRepo] = None,
+                collection_name: str = "users", batch_size: int = DEFAULT_BATCH_SIZE,
+                queue_size: int = DEFAULT_QUEUE_SIZE, on_change: Optional[ChangeCallback] = None,
+                checkpoint_path: Optional[str] = None, resume: bool = False) -> Dict[str, Any]:
+    """
+    Parse a relation file once and write every batch to MongoDB and Neo4j concurrently.
+
+    Each sink runs in its own thread behind a queue of `queue_size` batches; both queues receive
+    the same (read-only) batch objects, so at most about (queue_size + 2) batches are alive however
+    far one sink falls behind. A batch is acknowledged, in file order, once every sink is done with
+    it: `on_change` then receives its rows (if every sink committed them) and, with `checkpoint_path`,
+    the checkpoint advances past it. With a checkpoint a failed batch stops the run (resume retries it);
+    without one it is counted and the run continues, as in the bulk importers. An exception from
+    `on_change` or the checkpoint stops its sink and the run, with "error" set in the result.
+    Returns {"rows" (acknowledged rows every sink committed), "batches" (read), "seconds", "rows_per_sec",
+    "parse_seconds", "sinks": {name: stats}}.
+    """
+    stats: Dict[str, Any] = {"rows": 0, "batches": 0, "resumed_rows": 0, "parse_seconds": 0.0,
+                             "seconds": 0.0, "rows_per_sec": 0.0, "sinks": {}}
+    started = time.perf_counter()
+
+    sinks: List[Sink] = []
+    if mongo_repo is not None:
+        sinks.append(mongo_sink(mongo_repo, collection_name, queue_size))
+    if neo4j_repo is not None:
+        sinks.append(neo4j_sink(neo4j_repo, queue_size))
+    if not sinks:
+        raise ValueError("At least one sink (mongo or neo4j) must be configured.")
+
+    checkpoint = ImportCheckpoint(checkpoint_path, input_file) if checkpoint_path else None
+    point = checkpoint.resume_point() if checkpoint and resume else {"offset": 0, "skip": 0, "batch_id": 0, "rows": 0}
+    stats["resumed_rows"] = point["rows"]
+
+    # sequence -> [sinks still to finish, batch, committed by all so far]; acknowledged in file order
+    pending: Dict[int, List[Any]] = {}
+    # "rows" is the checkpoint position (resumed rows included), "committed" the rows every sink wrote
+    acknowledged = {"sequence": 0, "rows": point["rows"], "committed": 0}
+    lock = threading.Lock()
+
+    def on_done(sequence: int, committed: bool):
+        with lock:
+            entry = pending[sequence]
+            entry[0] -= 1
+            entry[2] = entry[2] and committed
+            while acknowledged["sequence"] + 1 in pending and pending[acknowledged["sequence"] + 1][0] == 0:
+                sequence = acknowledged["sequence"] + 1
+                _, batch, ok = pending[sequence]
+                # a raising on_change or checkpoint leaves the batch unacknowledged (and stops the sink)
+                if ok and on_change:
+                    on_change(list(batch.rows()))
+                if checkpoint:
+                    checkpoint.commit(point["batch_id"] + sequence, batch.offset, batch.skip,
+                                      acknowledged["rows"] + len(batch))
+                del pending[sequence]
+                acknowledged["sequence"] = sequence
+                acknowledged["rows"] += len(batch)
+                if ok:
+                    acknowledged["committed"] += len(batch)
+
+    for sink in sinks:
+        sink.on_done = on_done
+        sink.stop_on_failure = checkpoint is not None
+        sink.start()
+
+    progress = ProgressLogger(logger, f"Dual-sink import of '{input_file}'")
+    try:
+        if mongo_repo is not None:
+            mongo_repo.add_collection(collection_name)
+            bootstrap_indexes(mongo_repo, collection_name, arrays=False)
+        if neo4j_repo is not None:
+            bootstrap_schema(neo4j_repo)
+
+        batches = iter_relation_batches(input_file, RELATION_MAP, max(1, int(batch_size)),
+                                        start=point["offset"], skip_rows=point["skip"])
+        while True:
+            parse_started = time.perf_counter()
+            batch = next(batches, None)
+            stats["parse_seconds"] += time.perf_counter() - parse_started
+            if batch is None:
+                break
+            failed = [sink.name for sink in sinks if sink.failed]
+            if failed:
+                retry = f"; rerun with resume to retry from '{checkpoint.path}'" if checkpoint else ""
+                raise RuntimeError(f"sink '{failed[0]}' stopped{retry}")
+            stats["batches"] += 1
+            with lock:
+                pending[stats["batches"]] = [len(sinks), batch, True]
+            for sink in sinks:
+                sink.put((stats["batches"], batch))
+            progress.update(len(batch), **{f"{sink.name}_queued": sink.queue.qsize() for sink in sinks})
+
+    except Exception as e:
+        stats["error"] = str(e)
+        logger.error(f"Failed to import data from '{input_file}': {e}")
+    finally:
+        for sink in sinks:
+            sink.put(_STOP)
+        for sink in sinks:
+            sink.join()
+
+    if mongo_repo is not None and "error" not in stats:
+        bootstrap_indexes(mongo_repo, collection_name)
+    if checkpoint and "error" not in stats and not any(sink.failed for sink in sinks):
+        checkpoint.complete()
+
+    # rows of batches every sink committed and that were acknowledged, not rows merely queued
+    stats["rows"] = acknowledged["committed"]
+    stats["seconds"] = time.perf_counter() - started
+    stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    for sink in sinks:
+        # throughput of the sink's own writes, so a slow sink stands out even though both finish together
+        busy = sink.stats["busy_seconds"]
+        sink.stats["rows_per_sec"] = sink.stats["rows"] / busy if busy else 0.0
+        stats["sinks"][sink.name] = sink.stats
+        metrics.set(IMPORT_ROWS_PER_SEC, sink.stats["rows_per_sec"], importer=f"pipeline_{sink.name}")
+        if sink.failed and "error" not in stats:
+            stats["error"] = f"sink '{sink.name}' stopped before the end of the file"
+        logger.info(
+            f"Sink '{sink.name}': {sink.stats['rows']} rows, {sink.stats['failed_batches']} failed batch(es), "
+            f"{sink.stats['rows_per_sec']:.0f} rows/sec, busy {sink.stats['busy_seconds']:.1f}s, "
+            f"reader blocked on it {sink.stats['blocked_seconds']:.1f}s."
+        )
+    progress.done(parse_seconds=round(stats["parse_seconds"], 2))
+    return stats
@@ -0,0 +1,169 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from data.repo.Neo4jRepo import Neo4jRepo
+from scripts.import_csv_to_graph import build_merge_query
+from scripts.schema import NODE_MAP, RELATION_MAP
+
+# Operators no catalogued query may plan: a scan of every node, or a product of unrelated matches
+DEFAULT_FORBIDDEN = ("AllNodesScan", "CartesianProduct")
+# Any of these satisfies an `expect` of INDEX_SEEK (MERGE plans the locking variants)
+INDEX_SEEK = ("NodeUniqueIndexSeek", "NodeIndexSeek")
+# Relationship types with their (Event / Group) target label, for the per-activity questions
+ACTIVITIES = {"ATTENDED": "Event", "MEMBER_OF": "Group"}
+_VERBS = {"ATTENDED": "attended", "MEMBER_OF": "joined"}
+LABELS = tuple(sorted(set(NODE_MAP.values())))
+KEY = {"id": None}
+
+
+class CatalogQuery:
+    """
+    One named Cypher statement: its text, the parameter names it takes, whether it writes, and
+    what its plan must contain (`expect`: any of these operators) or must not (`forbid`).
+    """
+    __slots__ = ("name", "cypher", "parameters", "description", "write", "expect", "forbid")
+
+    def __init__(self, name: str, cypher: str, parameters: Sequence[str] = (), description: str = "",
+                 write: bool = False, expect: Sequence[str] = (), forbid: Sequence[str] = DEFAULT_FORBIDDEN):
+        self.name = name
+        self.cypher = cypher
+        self.parameters = tuple(parameters)
+        self.description = description
+        self.write = write
+        self.expect = tuple(expect)
+        self.forbid = tuple(forbid)
+
+    def bind(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """The parameters of this query taken from `values`; a missing one raises KeyError."""
+        missing = [name for name in self.parameters if name not in values]
+        if missing:
+            raise KeyError(f"Query '{self.name}' needs parameter(s) {missing}.")
+        return {name: values[name] for name in self.parameters}
+
+
+CATALOG: Dict[str, CatalogQuery] = {}
+
+
+def _register(name: str, cypher: str, parameters: Sequence[str] = (), description: str = "", **options):
+    CATALOG[name] = CatalogQuery(name, cypher, parameters, description, **options)
+
+
+def get_query(name: str) -> CatalogQuery:
+    if name not in CATALOG:
+        raise KeyError(f"Unknown catalog query '{name}'.")
+    return CATALOG[name]
+
+
+def select(names: Optional[Iterable[str]] = None) -> List[CatalogQuery]:
+    """Catalog entries by name or name prefix (e.g. "usecase."), all of them without `names`."""
+    if not names:
+        return list(CATALOG.values())
+    selected = []
+    for pattern in names:
+        matches = [query for name, query in CATALOG.items() if name == pattern or name.startswith(pattern)]
+        if not matches:
+            raise KeyError(f"No catalog query matches '{pattern}'.")
+        selected.extend(query for query in matches if query not in selected)
+    return selected
+
+
+# UseCases.md: counts per label
+for _label in LABELS:
+    _register(f"usecase.count.{_label}", f"MATCH (n:{_label}) RETURN count(n) AS count",
+              description=f"How many {_label} nodes do we have")
+
+# UseCases.md: users to events / users to groups
+for _rel_type, _label in ACTIVITIES.items():
+    _key, _verb = _label.lower(), _VERBS[_rel_type]
+    _register(f"usecase.{_key}.users", f"MATCH (:{_label} {{id: ${_key}_id}})<-[:{_rel_type}]-(u:User) "
+              f"RETURN count(u) AS users", (f"{_key}_id",),
+              f"How many users {_verb} this {_label}", expect=INDEX_SEEK)
+    _register(f"usecase.{_key}.per_user", f"MATCH (:User {{id: $user_id}})-[:{_rel_type}]->(t:{_label}) "
+              f"RETURN count(t) AS count", ("user_id",),
+              f"How many {_label}s a user {_verb}", expect=INDEX_SEEK)
+    _register(f"usecase.{_key}.users_by_genre", f"MATCH (t:{_label}) WHERE t.genre IN $genres "
+              f"MATCH (t)<-[:{_rel_type}]-(u:User) RETURN count(DISTINCT u) AS users", ("genres",),
+              f"How many users {_verb} {_label}s of these genres")
+    _register(f"usecase.{_key}.member_genre_mode",
+              f"MATCH (:{_label} {{id: ${_key}_id}})<-[:{_rel_type}]-(:User)-[:{_rel_type}]->(other:{_label}) "
+              f"WHERE other.genre IS NOT NULL "
+              f"RETURN other.genre AS genre, count(*) AS count ORDER BY count DESC, genre LIMIT 1",
+              (f"{_key}_id",), f"Mode genre of the users of this {_label} (over all their {_label}s)",
+              expect=INDEX_SEEK)
+    _register(f"usecase.{_key}.user_genre_mode",
+              f"MATCH (:User {{id: $user_id}})-[:{_rel_type}]->(t:{_label}) WHERE t.genre IS NOT NULL "
+              f"RETURN t.genre AS genre, count(*) AS count ORDER BY count DESC, genre LIMIT 1", ("user_id",),
+              f"Mode genre of the {_label}s a user {_verb}", expect=INDEX_SEEK)
+
+# UseCases.md: users to activities
+_ACTIVITY_TYPES = "|".join(ACTIVITIES)
+_register("usecase.activity.users", f"MATCH (u:User) WHERE (u)-[:{_ACTIVITY_TYPES}]->() RETURN count(u) AS users",
+          description="How many users have activities")
+_register("usecase.activity.top", f"MATCH (:User)-[r:{_ACTIVITY_TYPES}]->(t) "
+          f"RETURN type(r) AS type, t.id AS id, count(*) AS users ORDER BY users DESC, id LIMIT $n", ("n",),
+          "What is the most repeated activity")
+_register("usecase.activity.per_user", f"MATCH (:User {{id: $user_id}})-[r:{_ACTIVITY_TYPES}]->() "
+          f"RETURN count(r) AS count", ("user_id",), "How many activities a user made", expect=INDEX_SEEK)
+_register("usecase.activity.companions",
+          f"MATCH (u:User {{id: $user_id}})-[:{_ACTIVITY_TYPES}]->(t)<-[:{_ACTIVITY_TYPES}]-(other:User) "
+          f"WHERE other <> u RETURN other.id AS user_id, count(DISTINCT t) AS shared "
+          f"ORDER BY shared DESC, user_id LIMIT $n", ("user_id", "n"),
+          "Who are the most people a user made activities with", expect=INDEX_SEEK)
+_register("usecase.activity.companion_genres",
+          f"MATCH (u:User {{id: $user_id}})-[:{_ACTIVITY_TYPES}]->(t)<-[:{_ACTIVITY_TYPES}]-(other:User) "
+          f"WHERE other <> u WITH other, count(DISTINCT t) AS shared ORDER BY shared DESC LIMIT $n "
+          f"MATCH (other)-[:{_ACTIVITY_TYPES}]->(item) WHERE item.genre IS NOT NULL "
+          f"RETURN item.genre AS genre, count(*) AS count ORDER BY count DESC, genre", ("user_id", "n"),
+          "What are the genres of the people a user interacts with most", expect=INDEX_SEEK)
+
+# Repository and importer operations, with the text they actually send, for the imported schema
+for _relation, _rel_type in RELATION_MAP.items():
+    _target = NODE_MAP[_relation]
+    _register(f"import.merge_batch.{_rel_type}", build_merge_query(_target, _rel_type), ("rows",),
+              f"Bulk importer UNWIND/MERGE for User-[:{_rel_type}]->{_target}", write=True, expect=INDEX_SEEK)
+    _register(f"repo.merge_relationship.{_rel_type}",
+              Neo4jRepo.merge_relationship_query("User", KEY, _target, KEY, _rel_type),
+              ("from_key", "to_key", "rel_props"), f"Neo4jRepo.merge_relationship User->{_target}",
+              write=True, expect=INDEX_SEEK)
+    _register(f"repo.create_relationship.{_rel_type}",
+              Neo4jRepo.create_relationship_query("User", KEY, _target, KEY, _rel_type),
+              ("from_key", "to_key", "rel_props"), f"Neo4jRepo.create_relationship User->{_target}",
+              write=True, expect=INDEX_SEEK)
+for _label in LABELS:
+    _register(f"repo.merge_node.{_label}", Neo4jRepo.merge_node_query(_label, KEY), ("key", "props"),
+              f"Neo4jRepo.merge_node {_label}", write=True, expect=INDEX_SEEK)
+    _register(f"repo.find_nodes.{_label}", Neo4jRepo.find_nodes_query(_label, KEY), ("filters",),
+              f"Neo4jRepo.find_nodes {_label} by id", expect=INDEX_SEEK)
+    _register(f"repo.update_node.{_label}", Neo4jRepo.update_node_query(_label, KEY),
+              ("match_props", "update_props"), f"Neo4jRepo.update_node {_label} by id", write=True, expect=INDEX_SEEK)
+    _register(f"repo.delete_node.{_label}", Neo4jRepo.delete_node_query(_label, KEY), ("match_props",),
+              f"Neo4jRepo.delete_node {_label} by id", write=True, expect=INDEX_SEEK)
+
+
+def sample_parameters(repo: Optional[Neo4jRepo] = None, n: int = 10) -> Dict[str, Any]:
+    """
+    Parameter values for every catalog query. With `repo` the ids are taken from existing data, so
+    PROFILE walks real neighbourhoods; without it (or on an empty graph) placeholders are used.
+    """
+    ids: Dict[str, Any] = {"user_id": "0", "event_id": "0", "group_id": "0", "genres": []}
+    if repo is not None:
+        for rel_type, label in ACTIVITIES.items():
+            rows = repo.execute_query(f"MATCH (u:User)-[:{rel_type}]->(t:{label}) "
+                                      f"RETURN u.id AS user_id, t.id AS id LIMIT 1", use_cache=False) or []
+            if rows:
+                ids["user_id"] = rows[0]["user_id"]
+                ids[f"{label.lower()}_id"] = rows[0]["id"]
+        rows = repo.execute_query("MATCH (t) WHERE (t:Event OR t:Group) AND t.genre IS NOT NULL "
+                                  "RETURN DISTINCT t.genre AS genre LIMIT 3", use_cache=False) or []
+        ids["genres"] = [row["genre"] for row in rows]
+    key = {"id": ids["user_id"]}
+    return {
+        **ids, "n": int(n),
+        "rows": [{"from_id": ids["user_id"], "to_id": ids["event_id"]}],
+        "from_key": key, "to_key": {"id": ids["event_id"]}, "rel_props": {},
+        "key": key, "props": {}, "filters": key, "match_props": key, "update_props": {},
+    }
+
+
+def describe() -> List[Tuple[str, str, str]]:
+    """(name, "read"/"write", description) of every catalog entry."""
+    return [(query.name, "write" if query.write else "read", query.description) for query in CATALOG.values()]
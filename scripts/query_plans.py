@@ -0,0 +1,179 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from data.repo.Neo4jRepo import Neo4jRepo
+from scripts.query_catalog import CATALOG, DEFAULT_FORBIDDEN, CatalogQuery, sample_parameters, select
+
+logger = logging.getLogger(__name__)
+
+REPORT_VERSION = 1
+# A query regresses when its db hits grow by more than this fraction of the baseline...
+DEFAULT_DB_HITS_TOLERANCE = 0.5
+# ...and by at least this many hits, so tiny plans do not flap
+MIN_DB_HITS_DELTA = 100
+# Operators that read more than their input should need; one appearing where the baseline had none is a regression
+SCAN_OPERATORS = ("AllNodesScan", "NodeByLabelScan", "CartesianProduct", "DirectedRelationshipTypeScan",
+                  "UndirectedRelationshipTypeScan", "NodeIndexScan")
+
+
+def _operator_name(operator: str) -> str:
+    # Neo4j 5 reports e.g. "NodeIndexSeek@neo4j"
+    return operator.split("@", 1)[0]
+
+
+def plan_tree(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalise a driver plan / profile dict to {"operator", "identifiers", "details", "estimated_rows",
+    "rows", "db_hits", "children"} (rows and db_hits are None for EXPLAIN plans).
+    """
+    arguments = raw.get("args") or raw.get("arguments") or {}
+    return {
+        "operator": _operator_name(raw.get("operatorType") or raw.get("operator_type") or raw.get("operator", "")),
+        "identifiers": sorted(raw.get("identifiers") or []),
+        "details": arguments.get("Details"),
+        "estimated_rows": arguments.get("EstimatedRows"),
+        "rows": raw.get("rows"),
+        "db_hits": raw.get("dbHits", raw.get("db_hits")),
+        "children": [plan_tree(child) for child in raw.get("children") or []],
+    }
+
+
+def operators(tree: Dict[str, Any]) -> List[str]:
+    """Operator names of a plan tree, depth first."""
+    names = [tree["operator"]]
+    for child in tree["children"]:
+        names.extend(operators(child))
+    return names
+
+
+def signature(tree: Dict[str, Any]) -> str:
+    """Compact shape of a plan, e.g. "ProduceResults(EagerAggregation(Expand(All)(NodeUniqueIndexSeek)))"."""
+    if not tree["children"]:
+        return tree["operator"]
+    return f"{tree['operator']}({', '.join(signature(child) for child in tree['children'])})"
+
+
+def _total(tree: Dict[str, Any], field: str) -> Optional[int]:
+    values = [tree[field]] + [_total(child, field) for child in tree["children"]]
+    values = [value for value in values if value is not None]
+    return int(sum(values)) if values else None
+
+
+def capture_plans(repo: Neo4jRepo, names: Optional[Iterable[str]] = None, mode: str = "profile",
+                  parameters: Optional[Dict[str, Any]] = None, allow_writes: bool = False) -> Dict[str, Any]:
+    """
+    Capture the plan of every selected catalog query into a JSON-serialisable report.
+
+    `mode` "profile" executes read queries and records db hits and rows per operator; write queries
+    are only EXPLAINed unless `allow_writes` (PROFILE of a write commits it). "explain" plans
+    everything without executing it. `parameters` override the values sample_parameters(repo) finds.
+    """
+    mode = mode.lower()
+    if mode not in ("profile", "explain"):
+        raise ValueError(f"Unknown plan mode '{mode}' (expected profile or explain).")
+    values = {**sample_parameters(repo), **(parameters or {})}
+    report = {"version": REPORT_VERSION, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "mode": mode,
+              "queries": {}}
+    for query in select(names):
+        query_mode = "profile" if mode == "profile" and (allow_writes or not query.write) else "explain"
+        entry = {"cypher": query.cypher, "write": query.write, "mode": query_mode}
+        try:
+            entry["parameters"] = query.bind(values)
+            captured = repo.profile_query(query.cypher, entry["parameters"], query_mode.upper())
+            if captured is None or not captured.get("plan"):
+                raise RuntimeError("no plan returned (see the log for the database error)")
+            tree = plan_tree(captured["plan"])
+            entry.update({
+                "plan": tree, "operators": operators(tree), "signature": signature(tree),
+                "db_hits": _total(tree, "db_hits"), "rows": tree["rows"], "estimated_rows": tree["estimated_rows"],
+                "available_after_ms": captured.get("available_after"),
+                "consumed_after_ms": captured.get("consumed_after"),
+            })
+        except Exception as e:
+            entry["error"] = str(e)
+            logger.error(f"Capturing the plan of '{query.name}' failed: {e}")
+        report["queries"][query.name] = entry
+    captured_count = sum("error" not in entry for entry in report["queries"].values())
+    logger.info(f"Captured {captured_count}/{len(report['queries'])} query plan(s) in {mode} mode.")
+    return report
+
+
+def save_report(report: Dict[str, Any], path: str):
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    os.replace(temporary, path)
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _finding(query: str, severity: str, issue: str, detail: str) -> Dict[str, str]:
+    return {"query": query, "severity": severity, "issue": issue, "detail": detail}
+
+
+def _rules(name: str, entry: Dict[str, Any], query: Optional[CatalogQuery]) -> List[Dict[str, str]]:
+    findings = []
+    found = entry["operators"]
+    forbid = query.forbid if query else DEFAULT_FORBIDDEN
+    for operator in sorted(set(found) & set(forbid)):
+        findings.append(_finding(name, "error", "forbidden_operator", f"plan contains {operator}: {entry['signature']}"))
+    if query and query.expect and not any(op.startswith(expected) for op in found for expected in query.expect):
+        findings.append(_finding(name, "error", "missing_operator",
+                                 f"expected one of {list(query.expect)}, got {entry['signature']}"))
+    return findings
+
+
+def _compare(name: str, entry: Dict[str, Any], before: Dict[str, Any], tolerance: float) -> List[Dict[str, str]]:
+    findings = []
+    if entry["signature"] != before["signature"]:
+        new_scans = sorted({op for op in entry["operators"] if op.startswith(SCAN_OPERATORS)}
+                           - {op for op in before["operators"] if op.startswith(SCAN_OPERATORS)})
+        if new_scans:
+            findings.append(_finding(name, "error", "plan_regression",
+                                     f"new {', '.join(new_scans)}: {before['signature']} -> {entry['signature']}"))
+        else:
+            findings.append(_finding(name, "warning", "plan_changed", f"{before['signature']} -> {entry['signature']}"))
+    hits, previous = entry.get("db_hits"), before.get("db_hits")
+    if hits is not None and previous is not None and entry["mode"] == before["mode"] == "profile" \
+            and hits - previous >= MIN_DB_HITS_DELTA and hits > previous * (1 + tolerance):
+        findings.append(_finding(name, "error", "db_hits_regression", f"db hits {previous} -> {hits}"))
+    return findings
+
+
+def check_plans(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None,
+                tolerance: float = DEFAULT_DB_HITS_TOLERANCE) -> List[Dict[str, str]]:
+    """
+    Check a captured report against the catalog rules and, optionally, a baseline report of an
+    earlier run; works on recorded JSON alone, without a database. Returns findings
+    {"query", "severity" (error / warning), "issue", "detail"}:
+
+    - capture_failed, forbidden_operator (e.g. AllNodesScan), missing_operator (no index seek)
+    - plan_regression (a scan operator the baseline plan did not have), plan_changed (other shape change)
+    - db_hits_regression (PROFILE db hits up by more than `tolerance` and MIN_DB_HITS_DELTA)
+    - missing_query (in the baseline but not in this report)
+    """
+    findings = []
+    previous = (baseline or {}).get("queries", {})
+    for name, entry in report.get("queries", {}).items():
+        if "error" in entry:
+            findings.append(_finding(name, "error", "capture_failed", entry["error"]))
+            continue
+        findings.extend(_rules(name, entry, CATALOG.get(name)))
+        before = previous.get(name)
+        if before and "error" not in before:
+            findings.extend(_compare(name, entry, before, tolerance))
+    for name in sorted(set(previous) - set(report.get("queries", {}))):
+        findings.append(_finding(name, "warning", "missing_query", "in the baseline but not captured"))
+    return findings
+
+
+def format_findings(findings: List[Dict[str, str]]) -> str:
+    if not findings:
+        return "No plan regressions."
+    return "\n".join(f"{f['severity'].upper():<8} {f['query']}: {f['issue']} ({f['detail']})" for f in findings)
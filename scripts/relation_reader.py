@@ -0,0 +1,173 @@
+import logging
+import mmap
+import os
+from itertools import compress
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the mapping per slice; slices are cut back to the last full line
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+DEFAULT_BATCH_SIZE = 10000
+# Upper bound on distinct ids kept in the intern cache before it is reset (0 disables interning)
+DEFAULT_INTERN_LIMIT = 0
+
+# Receives the (user_id, relation_type, target_id) rows an importer has just written
+ChangeCallback = Callable[[List[Tuple[str, str, str]]], None]
+
+
+class RelationBatch:
+    """
+    Column-oriented batch of `user|relation|target` rows.
+    Relation types are the canonical keys of the relation map the reader was created with;
+    ids are shared across rows when the reader interns them.
+    (`offset`, `skip`) is the resume point right after the batch: reading again from byte `offset`
+    and dropping the first `skip` accepted rows continues with the next batch's first row.
+    """
+    __slots__ = ("users", "relations", "targets", "offset", "skip")
+
+    def __init__(self):
+        self.users: List[str] = []
+        self.relations: List[str] = []
+        self.targets: List[str] = []
+        self.offset = 0
+        self.skip = 0
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def rows(self) -> Iterator[Tuple[str, str, str]]:
+        """Iterate the batch as (user_id, relation_type, target_id) tuples."""
+        return zip(self.users, self.relations, self.targets)
+
+
+def iter_relation_batches(input_file: str, relations: Iterable[str],
+                          batch_size: int = DEFAULT_BATCH_SIZE,
+                          start: int = 0, end: Optional[int] = None,
+                          stats: Optional[Dict[str, int]] = None,
+                          chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+                          intern_limit: int = DEFAULT_INTERN_LIMIT,
+                          skip_rows: int = 0) -> Iterator[RelationBatch]:
+    """
+    Memory-map a pipe-delimited relation file and yield RelationBatch objects.
+
+    Only lines starting inside [start, end) are read, so line-aligned shards can be handed to
+    separate workers. Rows whose relation is not in `relations` (or that do not have exactly three
+    columns) are dropped while still raw bytes, before any id is decoded. When `stats` is given
+    its "skipped" counter is incremented for every dropped line.
+
+    With `intern_limit` > 0 repeated ids share one str object (up to that many distinct ids),
+    which is worth its hashing cost only for callers that keep ids around across batches.
+
+    `skip_rows` drops that many accepted rows from `start` on, so (start, skip_rows) taken from a
+    batch's (offset, skip) resumes exactly after that batch.
+    """
+    relation_keys: Dict[bytes, str] = {relation.encode("utf-8"): relation for relation in relations}
+    batch_size = max(1, int(batch_size))
+    size = os.path.getsize(input_file)
+    end = size if end is None else min(end, size)
+    if start >= end:
+        return
+
+    cache: Dict[str, str] = {}
+    skipped = 0
+    batch = RelationBatch()
+
+    with open(input_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = start
+        while pos < end:
+            chunk_end = min(pos + chunk_bytes, size)
+            if chunk_end < size:
+                newline = mm.rfind(b"\n", pos, chunk_end)
+                if newline < pos:
+                    # a single line longer than chunk_bytes
+                    newline = mm.find(b"\n", chunk_end)
+                    newline = size - 1 if newline == -1 else newline
+                chunk_end = newline + 1
+
+            # Lines that start before `end` belong to this range, even if they run past it
+            if chunk_end > end:
+                last = mm.find(b"\n", end - 1)
+                chunk_end = size if last == -1 else last + 1
+
+            users, relations, targets, dropped = _parse_chunk(mm[pos:chunk_end], relation_keys)
+            skipped += dropped
+            chunk_start, pos = pos, chunk_end
+            # rows of this chunk consumed before `users[0]` (non-zero only while resuming)
+            consumed = 0
+            if skip_rows:
+                consumed = min(skip_rows, len(users))
+                users, relations, targets = users[consumed:], relations[consumed:], targets[consumed:]
+                skip_rows -= consumed
+                if skip_rows:
+                    # the rows to skip continue into the next chunk
+                    continue
+
+            if intern_limit > 0:
+                # Share one str object per distinct id instead of one per row
+                if len(cache) > intern_limit:
+                    cache.clear()
+                users = list(map(cache.setdefault, users, users))
+                targets = list(map(cache.setdefault, targets, targets))
+
+            offset = 0
+            while offset < len(users):
+                take = batch_size - len(batch)
+                batch.users.extend(users[offset:offset + take])
+                batch.relations.extend(relations[offset:offset + take])
+                batch.targets.extend(targets[offset:offset + take])
+                offset += take
+                if len(batch) >= batch_size:
+                    if offset >= len(users):
+                        batch.offset, batch.skip = pos, 0
+                    else:
+                        batch.offset, batch.skip = chunk_start, consumed + offset
+                    yield batch
+                    batch = RelationBatch()
+
+    if len(batch):
+        batch.offset, batch.skip = pos, 0
+        yield batch
+
+    if stats is not None:
+        stats["skipped"] = stats.get("skipped", 0) + skipped
+    logger.debug(f"Finished reading '{input_file}' [{start}, {end}): {skipped} line(s) skipped.")
+
+
+def _parse_chunk(chunk: bytes, relation_keys: Dict[bytes, str]) -> Tuple[List[str], List[str], List[str], int]:
+    """
+    Split a block of whole lines into user/relation/target columns.
+
+    The common case (every line has exactly three columns) is handled with a handful of C-level
+    bytes operations: newlines become a `|\n|` marker so a single split yields a flat token list
+    in which every fourth token must be the marker. Rows are then filtered on the raw relation
+    bytes and only the surviving ids are decoded, in one call per column. Blocks containing
+    malformed or blank lines fall back to a per-line parse.
+    """
+    if b"\r" in chunk:
+        chunk = chunk.replace(b"\r\n", b"\n")
+    if chunk.endswith(b"\n"):
+        chunk = chunk[:-1]
+    if not chunk:
+        return [], [], [], 0
+
+    lines = chunk.count(b"\n") + 1
+    tokens = chunk.replace(b"\n", b"|\n|").split(b"|")
+    if len(tokens) == 4 * lines - 1 and tokens[3::4].count(b"\n") == lines - 1:
+        raw_users, raw_relations, raw_targets = tokens[0::4], tokens[1::4], tokens[2::4]
+    else:
+        raw_users, raw_relations, raw_targets = [], [], []
+        for line in chunk.split(b"\n"):
+            parts = line.split(b"|")
+            if len(parts) == 3:
+                raw_users.append(parts[0])
+                raw_relations.append(parts[1])
+                raw_targets.append(parts[2])
+
+    mask = list(map(relation_keys.__contains__, raw_relations))
+    relations = list(map(relation_keys.__getitem__, compress(raw_relations, mask)))
+    if not relations:
+        return [], [], [], lines
+    users = b"\n".join(compress(raw_users, mask)).decode("utf-8").split("\n")
+    targets = b"\n".join(compress(raw_targets, mask)).decode("utf-8").split("\n")
+    return users, relations, targets, lines - len(relations)
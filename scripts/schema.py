@@ -0,0 +1,26 @@
+# Relation-file vocabulary shared by the importers and the offline loaders (src.analytics, src.features).
+# It must not import the repos or drivers: loading a relation file needs neither.
+
+# Map relation types to relationship types
+RELATION_MAP = {
+    "event": "ATTENDED",
+    "friend": "FRIEND_WITH",
+    "group": "MEMBER_OF",
+    "neighbor": "NEIGHBOR_WITH"
+}
+
+# Map relation types to the label of their target node
+NODE_MAP = {
+    "event": "Event",
+    "friend": "User",
+    "group": "Group",
+    "neighbor": "User"
+}
+
+# Map relation types to the array fields of the aggregated Mongo user documents
+FIELD_MAP = {
+    "event": "events",
+    "friend": "friends",
+    "group": "groups",
+    "neighbor": "neighbors"
+}
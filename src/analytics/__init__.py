@@ -0,0 +1,7 @@
+from .graph import CSRGraph, GraphBuilder, load_relation_file, load_from_neo4j, load_from_mongo, load_from_snapshot
+from .ids import IdDictionary, LabelIds, EncodedBatch, encode_batch, iter_encoded_batches
+from .algorithms import (degree, top_degree, weakly_connected_components, component_sizes,
+                         jaccard_topk, node_similarity, random_projection_embeddings)
+from .similarity import SimilarityIndex, item_hash, minhash_signatures, compare_with_brute_force
+from .use_cases import (count_users, count_targets, count_users_with, count_for_user, count_users_of,
+                        top_targets, top_users, top_companions)
@@ -0,0 +1,172 @@
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from .graph import CSRGraph
+
+logger = logging.getLogger(__name__)
+
+
+def degree(graph: CSRGraph, label: Optional[str] = None, direction: str = "both") -> np.ndarray:
+    """
+    Number of distinct neighbours per node ("out", "in" or "both" directions), the local
+    counterpart of gds.degree. With `label` only those nodes are returned, in nodes_with_label order.
+    """
+    if direction == "out":
+        counts = graph.adjacency.getnnz(axis=1)
+    elif direction == "in":
+        counts = graph.adjacency.getnnz(axis=0)
+    else:
+        counts = graph.undirected().getnnz(axis=1)
+    counts = np.asarray(counts, dtype=np.int64)
+    return counts if label is None else counts[graph.nodes_with_label(label)]
+
+
+def top_degree(graph: CSRGraph, label: str, k: int = 20, direction: str = "both") -> List[Tuple[str, int]]:
+    """The `k` highest-degree nodes of `label` as (id, degree), highest first."""
+    nodes = graph.nodes_with_label(label)
+    counts = degree(graph, label, direction)
+    k = min(k, len(nodes))
+    if k == 0:
+        return []
+    top = np.argpartition(-counts, k - 1)[:k]
+    top = top[np.argsort(-counts[top], kind="stable")]
+    return [(graph.node_ids[nodes[i]], int(counts[i])) for i in top]
+
+
+def weakly_connected_components(graph: CSRGraph) -> np.ndarray:
+    """
+    Component id per node (the smallest dense id in the component), the counterpart of gds.wcc.
+
+    Vectorised union-find: every round hooks the larger root of each edge onto the smaller one
+    with a scatter-min and then compresses paths by pointer jumping, until no edge joins two roots.
+    """
+    coo = graph.adjacency.tocoo()
+    src = coo.row.astype(np.int64)
+    dst = coo.col.astype(np.int64)
+    parent = np.arange(graph.num_nodes, dtype=np.int64)
+
+    while True:
+        root_src = parent[src]
+        root_dst = parent[dst]
+        pending = root_src != root_dst
+        if not pending.any():
+            break
+        low = np.minimum(root_src[pending], root_dst[pending])
+        high = np.maximum(root_src[pending], root_dst[pending])
+        np.minimum.at(parent, high, low)
+        # pointer jumping until every node points straight at its root
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+        # only keep edges that may still join two components
+        src, dst = src[pending], dst[pending]
+
+    return parent
+
+
+def component_sizes(components: np.ndarray) -> List[Tuple[int, int]]:
+    """(component id, member count) sorted by size, largest first."""
+    ids, counts = np.unique(components, return_counts=True)
+    order = np.argsort(-counts, kind="stable")
+    return [(int(ids[i]), int(counts[i])) for i in order]
+
+
+def jaccard_topk(incidence: sparse.csr_matrix, k: int = 10, block_size: int = 2048,
+                 min_similarity: float = 0.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Top-k Jaccard similarity between the rows of a binary incidence matrix (e.g. User x Event),
+    the counterpart of gds.nodeSimilarity.
+
+    Intersections come from a sparse A[block] @ A.T product, computed `block_size` rows at a time so
+    memory is bounded by the block rather than by all pairs. Returns parallel arrays
+    (row, other_row, similarity) sorted by row and then by similarity (highest first).
+    """
+    incidence = incidence.tocsr().astype(np.float32)
+    sizes = np.asarray(incidence.getnnz(axis=1), dtype=np.float32)
+    transposed = incidence.T.tocsr()
+    out_rows, out_cols, out_scores = [], [], []
+
+    for start in range(0, incidence.shape[0], block_size):
+        stop = min(start + block_size, incidence.shape[0])
+        inter = (incidence[start:stop] @ transposed).tocoo()
+        rows = inter.row.astype(np.int64) + start
+        cols = inter.col.astype(np.int64)
+        keep = rows != cols
+        rows, cols, shared = rows[keep], cols[keep], inter.data[keep]
+        scores = shared / (sizes[rows] + sizes[cols] - shared)
+        if min_similarity > 0:
+            keep = scores >= min_similarity
+            rows, cols, scores = rows[keep], cols[keep], scores[keep]
+        if len(rows) == 0:
+            continue
+
+        rows, cols, scores = top_k_per_row(rows, cols, scores, k)
+        out_rows.append(rows)
+        out_cols.append(cols)
+        out_scores.append(scores)
+
+    if not out_rows:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float32)
+    return np.concatenate(out_rows), np.concatenate(out_cols), np.concatenate(out_scores)
+
+
+def top_k_per_row(rows: np.ndarray, cols: np.ndarray, scores: np.ndarray,
+                  k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Keep the `k` highest-scoring entries of every row of a COO triple, sorted by row and then by
+    score (highest first, ties broken by column).
+    """
+    order = np.lexsort((cols, -scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    first = np.searchsorted(rows, rows, side="left")
+    keep = (np.arange(len(rows)) - first) < k
+    return rows[keep], cols[keep], scores[keep]
+
+
+def node_similarity(graph: CSRGraph, source_label: str = "User", target_label: str = "Event",
+                    k: int = 10, min_similarity: float = 0.0) -> List[Tuple[str, str, float]]:
+    """
+    Jaccard similarity of `source_label` nodes over their shared `target_label` neighbours,
+    as (id1, id2, similarity) rows.
+    """
+    incidence, rows, _ = graph.incidence(source_label, target_label)
+    a, b, scores = jaccard_topk(incidence, k=k, min_similarity=min_similarity)
+    ids = graph.node_ids
+    return [(ids[rows[i]], ids[rows[j]], float(s)) for i, j, s in zip(a, b, scores)]
+
+
+def random_projection_embeddings(graph: CSRGraph, dimension: int = 64,
+                                 iteration_weights: Sequence[float] = (0.0, 1.0, 1.0),
+                                 seed: int = 42) -> np.ndarray:
+    """
+    FastRP-style node embeddings (counterpart of gds.fastRP) of shape (num_nodes, dimension).
+
+    A very sparse random projection (Achlioptas, s = 3) is propagated through the row-normalised
+    undirected adjacency; each propagation step is L2-normalised and summed with its weight.
+    """
+    n = graph.num_nodes
+    rng = np.random.default_rng(seed)
+    s = 3.0
+    draws = rng.random((n, dimension))
+    projection = np.zeros((n, dimension), dtype=np.float32)
+    projection[draws < 1 / (2 * s)] = np.sqrt(s)
+    projection[draws > 1 - 1 / (2 * s)] = -np.sqrt(s)
+
+    adjacency = graph.undirected()
+    degrees = np.asarray(adjacency.getnnz(axis=1), dtype=np.float32)
+    inverse = np.divide(1.0, degrees, out=np.zeros_like(degrees), where=degrees > 0)
+    transition = sparse.diags(inverse) @ adjacency
+
+    embedding = np.zeros((n, dimension), dtype=np.float32)
+    current = projection
+    for weight in iteration_weights:
+        current = transition @ current
+        norms = np.linalg.norm(current, axis=1, keepdims=True)
+        current = np.divide(current, norms, out=np.zeros_like(current), where=norms > 0)
+        embedding += weight * current
+    return embedding
@@ -0,0 +1,238 @@
+import logging
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+
+class CSRGraph:
+    """
+    In-memory graph stored as a SciPy CSR adjacency over dense integer node ids.
+
+    Nodes are identified by (label, id); `node_ids[i]` / `node_labels[i]` map the integer id back.
+    `adjacency` holds the directed edges as written by the importers (User -> Event/Group/User)
+    with 1.0 for every distinct edge; `relations` holds the same edges split per relationship type.
+    Graphs built from an IdDictionary get a LabelledIds view as both `node_ids` and the index.
+    """
+
+    def __init__(self, adjacency: sparse.csr_matrix, node_ids: List[str], node_labels: np.ndarray,
+                 label_names: List[str], index: Dict[Tuple[str, str], int],
+                 relations: Optional[Dict[str, sparse.csr_matrix]] = None):
+        self.adjacency = adjacency
+        self.relations = relations or {}
+        self.node_ids = node_ids
+        self.node_labels = node_labels
+        self.label_names = label_names
+        self._index = index
+        self._undirected: Optional[sparse.csr_matrix] = None
+
+    @property
+    def num_nodes(self) -> int:
+        return self.adjacency.shape[0]
+
+    @property
+    def num_edges(self) -> int:
+        return self.adjacency.nnz
+
+    def index_of(self, label: str, node_id: str) -> Optional[int]:
+        """Dense integer id of a node, or None if it is not in the graph."""
+        return self._index.get((label, node_id))
+
+    def node_key(self, index: int) -> Tuple[str, str]:
+        """(label, id) of a dense integer node id."""
+        return self.label_names[self.node_labels[index]], self.node_ids[index]
+
+    def nodes_with_label(self, label: str) -> np.ndarray:
+        """Dense ids of every node carrying `label`."""
+        if label not in self.label_names:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(self.node_labels == self.label_names.index(label))
+
+    def undirected(self) -> sparse.csr_matrix:
+        """Symmetric binary adjacency (cached), the equivalent of an UNDIRECTED GDS projection."""
+        if self._undirected is None:
+            sym = (self.adjacency + self.adjacency.T).tocsr()
+            sym.data[:] = 1.0
+            self._undirected = sym
+        return self._undirected
+
+    def incidence(self, source_label: str, target_label: str) -> Tuple[sparse.csr_matrix, np.ndarray, np.ndarray]:
+        """
+        Binary source x target matrix (e.g. User x Event) plus the dense ids of its rows and columns.
+        """
+        rows = self.nodes_with_label(source_label)
+        cols = self.nodes_with_label(target_label)
+        matrix = self.adjacency[rows][:, cols].tocsr()
+        matrix.data[:] = 1.0
+        return matrix, rows, cols
+
+
+class GraphBuilder:
+    """
+    Accumulates edges into compact int arrays while remapping (label, id) to dense integers,
+    then builds a CSRGraph in one shot.
+    """
+
+    def __init__(self):
+        self._index: Dict[Tuple[str, str], int] = {}
+        self._node_ids: List[str] = []
+        self._node_labels = array("b")
+        self._label_names: List[str] = []
+        self._src = array("q")
+        self._dst = array("q")
+        self._rel = array("b")
+        self._rel_names: List[str] = []
+
+    def _node(self, label: str, node_id: str) -> int:
+        key = (label, node_id)
+        index = self._index.get(key)
+        if index is None:
+            if label not in self._label_names:
+                self._label_names.append(label)
+            index = self._index[key] = len(self._node_ids)
+            self._node_ids.append(node_id)
+            self._node_labels.append(self._label_names.index(label))
+        return index
+
+    def add_edge(self, from_label: str, from_id: str, to_label: str, to_id: str, rel_type: str = "RELATED"):
+        if rel_type not in self._rel_names:
+            self._rel_names.append(rel_type)
+        self._src.append(self._node(from_label, from_id))
+        self._dst.append(self._node(to_label, to_id))
+        self._rel.append(self._rel_names.index(rel_type))
+
+    def add_edges(self, edges: Iterable[Tuple[str, str, str, str, str]]):
+        """Add (from_label, from_id, to_label, to_id, rel_type) tuples."""
+        for from_label, from_id, to_label, to_id, rel_type in edges:
+            self.add_edge(from_label, from_id, to_label, to_id, rel_type)
+
+    def build(self) -> CSRGraph:
+        n = len(self._node_ids)
+        src = np.frombuffer(self._src, dtype=np.int64)
+        dst = np.frombuffer(self._dst, dtype=np.int64)
+        rel = np.frombuffer(self._rel, dtype=np.int8)
+        adjacency = _binary_csr(src, dst, n)
+        relations = {name: _binary_csr(src[rel == code], dst[rel == code], n)
+                     for code, name in enumerate(self._rel_names)}
+        graph = CSRGraph(adjacency, self._node_ids, np.frombuffer(self._node_labels, dtype=np.int8).copy(),
+                         list(self._label_names), self._index, relations)
+        logger.info(f"Built CSR graph with {graph.num_nodes} nodes and {graph.num_edges} edges.")
+        return graph
+
+
+def _binary_csr(src: np.ndarray, dst: np.ndarray, n: int) -> sparse.csr_matrix:
+    matrix = sparse.csr_matrix((np.ones(len(src), dtype=np.float32), (src, dst)), shape=(n, n))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1.0
+    return matrix
+
+
+def load_relation_file(input_file: Union[str, Sequence[str]], relations: Optional[Iterable[str]] = None,
+                       ids: Optional[Any] = None) -> CSRGraph:
+    """
+    Build a CSRGraph straight from a `user|relation|target` file, or from several files read in
+    order (relation keys as in RELATION_MAP, e.g. ["event"] for the User-Event graph; all
+    relations by default).
+
+    With an IdDictionary as `ids` the rows are encoded with it (new ids are added) and the graph is
+    built from integer arrays: node numbering follows the dictionary, one consecutive range per
+    label, and node_ids / index_of read from the dictionary instead of per-node Python strings.
+    Every id in the dictionary is a node, including ids that do not occur in these files.
+    """
+    from scripts.schema import NODE_MAP, RELATION_MAP
+    from scripts.relation_reader import iter_relation_batches
+
+    relations = list(relations or NODE_MAP)
+    input_files = [input_file] if isinstance(input_file, str) else list(input_file)
+    if ids is not None:
+        return _build_encoded(input_files, relations, ids)
+    builder = GraphBuilder()
+    for path in input_files:
+        for batch in iter_relation_batches(path, relations):
+            for user_id, relation_type, target_id in batch.rows():
+                builder.add_edge("User", user_id, NODE_MAP[relation_type], target_id, RELATION_MAP[relation_type])
+    return builder.build()
+
+
+def _build_encoded(input_files: List[str], relations: List[str], ids: Any) -> CSRGraph:
+    from scripts.schema import NODE_MAP, RELATION_MAP
+    from src.analytics.ids import LabelledIds, iter_encoded_batches
+
+    users: Dict[str, List[np.ndarray]] = {relation: [] for relation in relations}
+    targets: Dict[str, List[np.ndarray]] = {relation: [] for relation in relations}
+    for path in input_files:
+        for batch in iter_encoded_batches(path, ids, relations):
+            for code, relation in enumerate(relations):
+                mask = batch.relations == code
+                users[relation].append(batch.users[mask])
+                targets[relation].append(batch.targets[mask])
+
+    label_names = ["User"] + sorted({NODE_MAP[relation] for relation in relations} - {"User"})
+    view = LabelledIds(ids, label_names)
+    n = len(view)
+    src_parts, dst_parts, relation_matrices = [], [], {}
+    for relation in relations:
+        src = np.concatenate(users[relation] or [np.empty(0, np.int64)]).astype(np.int64) + view.offsets["User"]
+        dst = np.concatenate(targets[relation] or [np.empty(0, np.int64)]).astype(np.int64) \
+            + view.offsets[NODE_MAP[relation]]
+        src_parts.append(src)
+        dst_parts.append(dst)
+        relation_matrices[RELATION_MAP[relation]] = _binary_csr(src, dst, n)
+
+    adjacency = _binary_csr(np.concatenate(src_parts), np.concatenate(dst_parts), n)
+    node_labels = np.repeat(np.arange(len(label_names), dtype=np.int8), np.diff(view.starts))
+    graph = CSRGraph(adjacency, view, node_labels, label_names, view, relation_matrices)
+    logger.info(f"Built CSR graph with {graph.num_nodes} nodes and {graph.num_edges} edges from encoded ids.")
+    return graph
+
+
+def load_from_snapshot(directory: str, rel_types: Optional[Iterable[str]] = None) -> CSRGraph:
+    """Build a CSRGraph from the edge tables of a snapshot written by scripts.export_snapshot."""
+    from scripts.export_snapshot import read_snapshot
+
+    tables = read_snapshot(directory)
+    builder = GraphBuilder()
+    for key, table in tables.items():
+        kind, rel_type = key.split("/", 1)
+        if kind != "edges" or (rel_types and rel_type not in rel_types):
+            continue
+        metadata = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+        source_label, target_label = metadata.get("source_label", "User"), metadata.get("target_label", "")
+        for batch in table.to_batches():
+            sources, targets = batch.column(0).to_pylist(), batch.column(1).to_pylist()
+            for source, target in zip(sources, targets):
+                builder.add_edge(source_label, source, target_label, target, rel_type)
+    return builder.build()
+
+
+def load_from_neo4j(repo: Any, rel_types: Optional[Iterable[str]] = None, fetch_size: int = 10000) -> CSRGraph:
+    """Build a CSRGraph from a Neo4jRepo by streaming every (optionally filtered) relationship."""
+    rel_filter = ""
+    if rel_types:
+        rel_filter = ":" + "|".join(rel_types)
+    query = (
+        f"MATCH (a)-[r{rel_filter}]->(b) "
+        "RETURN labels(a)[0] AS a_label, a.id AS a_id, labels(b)[0] AS b_label, b.id AS b_id, type(r) AS rel"
+    )
+    builder = GraphBuilder()
+    for chunk in repo.stream_query(query, fetch_size=fetch_size, chunk_size=fetch_size):
+        builder.add_edges((row["a_label"], row["a_id"], row["b_label"], row["b_id"], row["rel"]) for row in chunk)
+    return builder.build()
+
+
+def load_from_mongo(repo: Any, collection_name: str = "users", batch_size: int = 1000) -> CSRGraph:
+    """Build a CSRGraph from the aggregated user documents written by the Mongo importer."""
+    from scripts.schema import FIELD_MAP, NODE_MAP, RELATION_MAP
+
+    fields = {field: (NODE_MAP[relation], RELATION_MAP[relation]) for relation, field in FIELD_MAP.items()}
+    builder = GraphBuilder()
+    projection = {"_id": 0, "user_id": 1, **{field: 1 for field in fields}}
+    for document in repo.iter_many(collection_name, {}, projection=projection, batch_size=batch_size):
+        user_id = document["user_id"]
+        for field, (label, rel_type) in fields.items():
+            for target_id in document.get(field, ()):
+                builder.add_edge("User", user_id, label, target_id, rel_type)
+    return builder.build()
@@ -0,0 +1,262 @@
+import json
+import logging
+import os
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Slot tables are kept at most half full so probe chains stay short
+_LOAD_FACTOR = 0.5
+_EMPTY = -1
+_META_FILE = "meta.json"
+
+
+def _code_dtype(count: int) -> np.dtype:
+    return np.dtype(np.int32) if count < np.iinfo(np.int32).max else np.dtype(np.int64)
+
+
+def _hash(key: bytes) -> int:
+    # stable across processes (unlike hash()), so the slot table can be persisted
+    return zlib.crc32(key)
+
+
+def _build_slots(hashes: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """Open-addressing table (linear probing) mapping hash slots to codes, filled in vectorised rounds."""
+    size = 1
+    while size * _LOAD_FACTOR < max(1, len(hashes)):
+        size *= 2
+    mask = size - 1
+    slots = np.full(size, _EMPTY, dtype=dtype)
+    codes = np.arange(len(hashes), dtype=dtype)
+    positions = hashes.astype(np.int64) & mask
+    while len(codes):
+        free = slots[positions] == _EMPTY
+        # among keys probing the same free slot the first one wins, the rest move on
+        candidates = np.flatnonzero(free)
+        _, first = np.unique(positions[candidates], return_index=True)
+        winners = candidates[first]
+        slots[positions[winners]] = codes[winners]
+        placed = np.zeros(len(codes), dtype=bool)
+        placed[winners] = True
+        codes, positions = codes[~placed], (positions[~placed] + 1) & mask
+    return slots
+
+
+class LabelIds:
+    """
+    Dense integer codes (0..n-1, in order of first appearance) for the string ids of one label.
+
+    The persisted part is four flat arrays that can be memory-mapped: a UTF-8 `blob` of all ids,
+    `offsets` into it (code -> id is one slice), their CRC32 `hashes` and an open-addressing `slots`
+    table over those hashes (id -> code is one probe sequence), so lookups are O(1) both ways without building a
+    Python dict. Ids added after loading live in a small in-memory overlay until the next `save`.
+    """
+
+    def __init__(self, blob: Optional[np.ndarray] = None, offsets: Optional[np.ndarray] = None,
+                 hashes: Optional[np.ndarray] = None, slots: Optional[np.ndarray] = None):
+        self._blob = blob if blob is not None else np.empty(0, dtype=np.uint8)
+        self._offsets = offsets if offsets is not None else np.zeros(1, dtype=np.int64)
+        self._hashes = hashes if hashes is not None else np.empty(0, dtype=np.uint32)
+        self._slots = slots if slots is not None else np.full(1, _EMPTY, dtype=np.int32)
+        self._base = len(self._offsets) - 1
+        self._added: Dict[str, int] = {}
+        self._added_ids: List[str] = []
+
+    def __len__(self) -> int:
+        return self._base + len(self._added_ids)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return _code_dtype(len(self))
+
+    def get(self, node_id: str) -> Optional[int]:
+        """Code of `node_id`, or None if it has none."""
+        code = self._added.get(node_id)
+        if code is not None or not self._base:
+            return code
+        key = node_id.encode("utf-8")
+        hashed = _hash(key)
+        mask = len(self._slots) - 1
+        position = hashed & mask
+        while True:
+            code = int(self._slots[position])
+            if code == _EMPTY:
+                return None
+            if self._hashes[code] == hashed and self._blob[self._offsets[code]:self._offsets[code + 1]].tobytes() == key:
+                return code
+            position = (position + 1) & mask
+
+    def add(self, node_id: str) -> int:
+        """Code of `node_id`, assigning the next free one if it is new."""
+        code = self.get(node_id)
+        if code is None:
+            code = self._added[node_id] = len(self)
+            self._added_ids.append(node_id)
+        return code
+
+    def id_of(self, code: int) -> str:
+        if code < self._base:
+            return self._blob[self._offsets[code]:self._offsets[code + 1]].tobytes().decode("utf-8")
+        return self._added_ids[code - self._base]
+
+    def encode(self, node_ids: Iterable[str], add: bool = True) -> np.ndarray:
+        """Codes for a sequence of ids; unknown ids get new codes, or -1 when `add` is False."""
+        def find(node_id: str) -> int:
+            code = self.get(node_id)
+            return _EMPTY if code is None else code
+
+        codes = np.fromiter(map(self.add if add else find, node_ids), dtype=np.int64)
+        return codes.astype(self.dtype, copy=False)
+
+    def decode(self, codes: Iterable[int]) -> List[str]:
+        return [self.id_of(int(code)) for code in codes]
+
+    def save(self, prefix: str):
+        """Write `<prefix>.{blob,offsets,hashes,slots}.npy`, folding the overlay into the arrays."""
+        if self._added_ids:
+            encoded = [node_id.encode("utf-8") for node_id in self._added_ids]
+            lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+            blob = np.concatenate([self._blob, np.frombuffer(b"".join(encoded), dtype=np.uint8)])
+            offsets = np.concatenate([self._offsets, self._offsets[-1] + np.cumsum(lengths)])
+            hashes = np.concatenate([self._hashes, np.fromiter(map(_hash, encoded), dtype=np.uint32,
+                                                               count=len(encoded))])
+        else:
+            blob, offsets, hashes = self._blob, self._offsets, self._hashes
+        slots = _build_slots(hashes, _code_dtype(len(hashes)))
+        for name, array in (("blob", blob), ("offsets", offsets), ("hashes", hashes), ("slots", slots)):
+            # write next to the target and swap, so a mapping of the old file stays valid
+            temporary = f"{prefix}.{name}.tmp.npy"
+            np.save(temporary, array)
+            os.replace(temporary, f"{prefix}.{name}.npy")
+
+    @classmethod
+    def load(cls, prefix: str, mmap: bool = True) -> "LabelIds":
+        mode = "r" if mmap else None
+        return cls(*(np.load(f"{prefix}.{name}.npy", mmap_mode=mode) for name in ("blob", "offsets", "hashes", "slots")))
+
+
+class IdDictionary:
+    """
+    Per-label id dictionaries (`User`, `Event`, `Group`, ... as in NODE_MAP), created on first use.
+
+    `save(directory)` writes one set of flat arrays per label plus a small meta.json, and
+    `load(directory)` memory-maps them, so a dictionary over tens of millions of ids costs a few
+    bytes per id of page cache instead of a Python str and dict entry each.
+    """
+
+    def __init__(self, labels: Optional[Dict[str, LabelIds]] = None):
+        self.labels: Dict[str, LabelIds] = labels or {}
+
+    def __getitem__(self, label: str) -> LabelIds:
+        ids = self.labels.get(label)
+        if ids is None:
+            ids = self.labels[label] = LabelIds()
+        return ids
+
+    def __contains__(self, label: str) -> bool:
+        return label in self.labels
+
+    def encode(self, label: str, node_ids: Iterable[str], add: bool = True) -> np.ndarray:
+        return self[label].encode(node_ids, add)
+
+    def decode(self, label: str, codes: Iterable[int]) -> List[str]:
+        return self[label].decode(codes)
+
+    def counts(self) -> Dict[str, int]:
+        return {label: len(ids) for label, ids in self.labels.items()}
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        for label, ids in self.labels.items():
+            ids.save(os.path.join(directory, label))
+        with open(os.path.join(directory, _META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"labels": {label: {"count": len(ids), "dtype": ids.dtype.name}
+                                  for label, ids in self.labels.items()}}, f)
+        logger.info(f"Id dictionary saved to '{directory}': {self.counts()}.")
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "IdDictionary":
+        with open(os.path.join(directory, _META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls({label: LabelIds.load(os.path.join(directory, label), mmap) for label in meta["labels"]})
+
+
+class EncodedBatch:
+    """A RelationBatch as integer columns: user codes, relation codes (index into `relations`) and target codes."""
+    __slots__ = ("users", "relations", "targets", "offset", "skip")
+
+    def __init__(self, users: np.ndarray, relations: np.ndarray, targets: np.ndarray, offset: int = 0, skip: int = 0):
+        self.users = users
+        self.relations = relations
+        self.targets = targets
+        self.offset = offset
+        self.skip = skip
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+
+def encode_batch(batch: Any, ids: IdDictionary, relations: Sequence[str], add: bool = True) -> EncodedBatch:
+    """
+    Encode a RelationBatch with `ids`: users under "User", each target under its NODE_MAP label.
+    Target codes are only unique per label, so (relation, target) identifies a node.
+    """
+    from scripts.schema import NODE_MAP
+
+    relation_codes = {relation: code for code, relation in enumerate(relations)}
+    relation_column = np.fromiter(map(relation_codes.__getitem__, batch.relations), dtype=np.int8,
+                                  count=len(batch))
+    users = ids["User"].encode(batch.users, add)
+    targets = np.empty(len(batch), dtype=np.int64)
+    target_column = np.array(batch.targets, dtype=object)
+    for relation, code in relation_codes.items():
+        mask = relation_column == code
+        if mask.any():
+            targets[mask] = ids[NODE_MAP[relation]].encode(target_column[mask], add)
+    return EncodedBatch(users, relation_column, targets, batch.offset, batch.skip)
+
+
+def iter_encoded_batches(input_file: str, ids: IdDictionary, relations: Optional[Sequence[str]] = None,
+                         batch_size: int = 10000, add: bool = True, **reader_options) -> Iterator[EncodedBatch]:
+    """iter_relation_batches, but yielding integer columns encoded with `ids`."""
+    from scripts.schema import NODE_MAP
+    from scripts.relation_reader import iter_relation_batches
+
+    relations = list(relations or NODE_MAP)
+    for batch in iter_relation_batches(input_file, relations, batch_size, **reader_options):
+        yield encode_batch(batch, ids, relations, add)
+
+
+class LabelledIds:
+    """
+    Read-only view of an IdDictionary over a global node numbering where the labels occupy
+    consecutive ranges (`offsets[label]` is the first global id of that label). It stands in for
+    CSRGraph.node_ids (global id -> id string) and the (label, id) -> global id index.
+    """
+
+    def __init__(self, ids: IdDictionary, label_names: List[str]):
+        self.ids = ids
+        self.label_names = label_names
+        counts = [len(ids[label]) for label in label_names]
+        self.starts = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.offsets = dict(zip(label_names, self.starts[:-1].tolist()))
+
+    def __len__(self) -> int:
+        return int(self.starts[-1])
+
+    def __getitem__(self, index: int) -> str:
+        position = int(np.searchsorted(self.starts, index, side="right")) - 1
+        return self.ids[self.label_names[position]].id_of(int(index) - int(self.starts[position]))
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[i] for i in range(len(self)))
+
+    def get(self, key: Tuple[str, str], default: Optional[int] = None) -> Optional[int]:
+        label, node_id = key
+        if label not in self.offsets:
+            return default
+        code = self.ids[label].get(node_id)
+        return default if code is None else self.offsets[label] + code
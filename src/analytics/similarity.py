@@ -0,0 +1,283 @@
+import logging
+import hashlib
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from .graph import CSRGraph
+
+logger = logging.getLogger(__name__)
+
+# Mersenne prime used by the universal hash family of the MinHash permutations
+_PRIME = np.int64((1 << 31) - 1)
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 64
+
+
+class SimilarityIndex:
+    """
+    Top-k Jaccard similarity service over entity -> item sets (e.g. User -> Events/Groups).
+
+    Candidates come from MinHash LSH: `num_perm` signature rows are split into `bands` bands and
+    entities sharing any band bucket become candidates, which are then re-ranked with exact Jaccard
+    over the stored incidence matrix. `brute_force_top_k` answers the same question exactly through
+    the item -> entities inverted index and is the recall/latency baseline.
+
+    Items are hashed by `item_hashes` (a stable hash of their key, see `item_hash`) rather than by
+    column position, so an index maintained with `update` has the same signatures as one rebuilt
+    from scratch over the same data.
+    """
+
+    def __init__(self, entity_ids: List[str], incidence: sparse.csr_matrix, signatures: np.ndarray, bands: int,
+                 item_hashes: Optional[np.ndarray] = None, seed: int = 1):
+        self.entity_ids = entity_ids
+        self.incidence = incidence.tocsr()
+        self.signatures = signatures
+        self.bands = bands
+        self.seed = seed
+        if item_hashes is None:
+            item_hashes = np.arange(incidence.shape[1], dtype=np.int64)
+        self.item_hashes = np.asarray(item_hashes, dtype=np.int64)
+        self._position = {entity_id: i for i, entity_id in enumerate(entity_ids)}
+        self._column = {int(h): i for i, h in enumerate(self.item_hashes)}
+        self._reindex()
+
+    def _reindex(self):
+        self.inverted = self.incidence.T.tocsr()
+        self._sizes = np.asarray(self.incidence.getnnz(axis=1), dtype=np.float32)
+        self._buckets = [self._band_buckets(band) for band in range(self.bands)]
+
+    @classmethod
+    def from_graph(cls, graph: CSRGraph, source_label: str = "User",
+                   target_labels: Sequence[str] = ("Event", "Group"),
+                   num_perm: int = DEFAULT_NUM_PERM, bands: int = DEFAULT_BANDS, seed: int = 1) -> "SimilarityIndex":
+        """Index every `source_label` node by its neighbours carrying one of `target_labels`."""
+        rows = graph.nodes_with_label(source_label)
+        cols = np.concatenate([graph.nodes_with_label(label) for label in target_labels])
+        incidence = graph.undirected()[rows][:, cols].tocsr()
+        incidence.data[:] = 1.0
+        item_hashes = np.array([item_hash(*graph.node_key(i)) for i in cols], dtype=np.int64)
+        return cls.from_incidence([graph.node_ids[i] for i in rows], incidence, num_perm, bands, seed, item_hashes)
+
+    @classmethod
+    def from_incidence(cls, entity_ids: List[str], incidence: sparse.csr_matrix,
+                       num_perm: int = DEFAULT_NUM_PERM, bands: int = DEFAULT_BANDS, seed: int = 1,
+                       item_hashes: Optional[np.ndarray] = None) -> "SimilarityIndex":
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        started = time.perf_counter()
+        signatures = minhash_signatures(incidence.tocsr(), num_perm, seed, item_hashes=item_hashes)
+        index = cls(entity_ids, incidence, signatures, bands, item_hashes, seed)
+        logger.info(
+            f"Built similarity index over {len(entity_ids)} entities and {incidence.shape[1]} items "
+            f"in {time.perf_counter() - started:.2f}s."
+        )
+        return index
+
+    def save(self, path: str):
+        """Persist the index to a single .npz file (".npz" is appended to `path` when missing, as load expects)."""
+        path = npz_path(path)
+        np.savez_compressed(
+            path,
+            entity_ids=np.array(self.entity_ids, dtype=np.str_),
+            data=self.incidence.data, indices=self.incidence.indices, indptr=self.incidence.indptr,
+            shape=np.array(self.incidence.shape), signatures=self.signatures, bands=np.array(self.bands),
+            item_hashes=self.item_hashes, seed=np.array(self.seed),
+        )
+        logger.info(f"Similarity index saved to '{path}'.")
+
+    @classmethod
+    def load(cls, path: str) -> "SimilarityIndex":
+        # plain arrays only: loading never unpickles objects from the file
+        with np.load(npz_path(path)) as saved:
+            incidence = sparse.csr_matrix((saved["data"], saved["indices"], saved["indptr"]),
+                                          shape=tuple(saved["shape"]))
+            item_hashes = saved["item_hashes"] if "item_hashes" in saved.files else None
+            seed = int(saved["seed"]) if "seed" in saved.files else 1
+            return cls(saved["entity_ids"].tolist(), incidence, saved["signatures"], int(saved["bands"]),
+                       item_hashes, seed)
+
+    def update(self, entity_items: Dict[str, Iterable[int]]):
+        """
+        Replace the item sets of the given entities (item hashes, see `item_hash`), appending
+        unknown entities and items. Only the signatures of those entities are recomputed; the
+        band buckets are then regrouped.
+        """
+        if not entity_items:
+            return
+        started = time.perf_counter()
+        entity_items = {entity_id: set(items) for entity_id, items in entity_items.items()}
+        for entity_id in entity_items:
+            if entity_id not in self._position:
+                self._position[entity_id] = len(self.entity_ids)
+                self.entity_ids.append(entity_id)
+        new_hashes = []
+        for items in entity_items.values():
+            for h in items:
+                if h not in self._column:
+                    self._column[h] = len(self.item_hashes) + len(new_hashes)
+                    new_hashes.append(h)
+        if new_hashes:
+            self.item_hashes = np.concatenate([self.item_hashes, np.array(new_hashes, dtype=np.int64)])
+
+        changed = np.array([self._position[entity_id] for entity_id in entity_items], dtype=np.int64)
+        rows = np.repeat(changed, [len(items) for items in entity_items.values()])
+        cols = np.array([self._column[h] for items in entity_items.values() for h in items], dtype=np.int64)
+        shape = (len(self.entity_ids), len(self.item_hashes))
+
+        kept = self.incidence.tocoo()
+        keep = ~np.isin(kept.row, changed)
+        self.incidence = sparse.csr_matrix(
+            (np.ones(keep.sum() + len(rows), dtype=np.float32),
+             (np.concatenate([kept.row[keep], rows]), np.concatenate([kept.col[keep], cols]))),
+            shape=shape,
+        )
+
+        num_perm = self.signatures.shape[1]
+        grown = np.full((shape[0], num_perm), _PRIME, dtype=np.int64)
+        grown[:len(self.signatures)] = self.signatures
+        grown[changed] = minhash_signatures(self.incidence[changed], num_perm, self.seed, item_hashes=self.item_hashes)
+        self.signatures = grown
+        self._reindex()
+        logger.info(f"Updated {len(changed)} entities in the similarity index in {time.perf_counter() - started:.2f}s.")
+
+    def top_k(self, entity_id: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Approximate top-k most similar entities: LSH candidates re-ranked by exact Jaccard."""
+        position = self._position.get(entity_id)
+        if position is None:
+            return []
+        candidates = self.candidates(position)
+        return self._rank(position, candidates, k)
+
+    def brute_force_top_k(self, entity_id: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Exact top-k through the inverted index (every entity sharing at least one item)."""
+        position = self._position.get(entity_id)
+        if position is None:
+            return []
+        items = self.incidence.indices[self.incidence.indptr[position]:self.incidence.indptr[position + 1]]
+        postings = [self.inverted.indices[self.inverted.indptr[i]:self.inverted.indptr[i + 1]] for i in items]
+        if not postings:
+            return []
+        candidates = np.unique(np.concatenate(postings))
+        return self._rank(position, candidates[candidates != position], k)
+
+    def candidates(self, position: int) -> np.ndarray:
+        """Entities sharing at least one LSH band bucket with `position`."""
+        found = [np.empty(0, dtype=np.int64)]
+        for bucket_of, members, offsets in self._buckets:
+            bucket = bucket_of[position]
+            if bucket >= 0:
+                found.append(members[offsets[bucket]:offsets[bucket + 1]])
+        candidates = np.unique(np.concatenate(found))
+        return candidates[candidates != position]
+
+    def _rank(self, position: int, candidates: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        if len(candidates) == 0:
+            return []
+        shared = np.asarray((self.incidence[candidates] @ self.incidence[position].T).todense()).ravel()
+        scores = shared / (self._sizes[candidates] + self._sizes[position] - shared)
+        keep = scores > 0
+        candidates, scores = candidates[keep], scores[keep]
+        if len(candidates) > k > 0:
+            # every candidate tying with the k-th best score stays in, ties are broken by id below
+            keep = scores >= np.partition(scores, len(scores) - k)[len(scores) - k]
+            candidates, scores = candidates[keep], scores[keep]
+        ranked = sorted(zip(scores.tolist(), (self.entity_ids[c] for c in candidates)), key=lambda item: (-item[0], item[1]))
+        return [(entity_id, score) for score, entity_id in ranked[:k]]
+
+    def _band_buckets(self, band: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Group entities by their signature slice for one band: (bucket per entity, members sorted
+        by bucket, bucket offsets into members). Entities without items get bucket -1.
+        """
+        rows_per_band = self.signatures.shape[1] // self.bands
+        bucket_of = np.full(len(self.entity_ids), -1, dtype=np.int64)
+        non_empty = np.flatnonzero(self._sizes > 0)
+        if len(non_empty):
+            keys = self.signatures[non_empty, band * rows_per_band:(band + 1) * rows_per_band]
+            # pack the band into one int64 key (exact for up to two rows per band, a wrapping hash
+            # beyond that, where a collision only adds candidates that the exact re-rank drops)
+            packed = keys[:, 0].copy()
+            for column in range(1, rows_per_band):
+                packed = packed * _PRIME + keys[:, column]
+            _, inverse = np.unique(packed, return_inverse=True)
+            bucket_of[non_empty] = inverse
+        members = non_empty[np.argsort(bucket_of[non_empty], kind="stable")]
+        offsets = np.searchsorted(bucket_of[members], np.arange(bucket_of.max(initial=-1) + 2))
+        return bucket_of, members, offsets
+
+
+def npz_path(path: str) -> str:
+    """`path` with the ".npz" suffix np.savez appends when it is missing, so save(p) and load(p) agree."""
+    return path if path.endswith(".npz") else f"{path}.npz"
+
+
+def item_hash(label: str, item_id: str) -> int:
+    """Stable non-negative 63-bit hash of an item key, independent of process and column order."""
+    digest = hashlib.blake2b(f"{label}|{item_id}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") >> 1
+
+
+def minhash_signatures(incidence: sparse.csr_matrix, num_perm: int = DEFAULT_NUM_PERM,
+                       seed: int = 1, perm_chunk: int = 8, item_hashes: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    MinHash signature matrix (rows x num_perm) of the column sets of a CSR matrix, vectorised
+    with np.minimum.reduceat over the CSR row segments, `perm_chunk` permutations at a time.
+    Columns are hashed by `item_hashes[column]` when given, by their index otherwise.
+    Rows without any column keep the sentinel value _PRIME in every position.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, size=num_perm, dtype=np.int64)
+    b = rng.integers(0, _PRIME, size=num_perm, dtype=np.int64)
+    n = incidence.shape[0]
+    signatures = np.full((n, num_perm), _PRIME, dtype=np.int64)
+    indices = incidence.indices.astype(np.int64)
+    if item_hashes is not None:
+        indices = (np.asarray(item_hashes, dtype=np.int64) % _PRIME)[indices]
+    indptr = incidence.indptr
+    non_empty = np.flatnonzero(np.diff(indptr) > 0)
+    if len(indices) == 0:
+        return signatures
+
+    for start in range(0, num_perm, perm_chunk):
+        stop = min(start + perm_chunk, num_perm)
+        hashed = (a[start:stop, None] * indices[None, :] + b[start:stop, None]) % _PRIME
+        signatures[non_empty, start:stop] = np.minimum.reduceat(hashed, indptr[non_empty], axis=1).T
+    return signatures
+
+
+def compare_with_brute_force(index: SimilarityIndex, sample: Sequence[str], k: int = 10) -> Dict[str, float]:
+    """
+    Recall@k of the LSH top_k against the exact inverted-index answer, and mean latency of both,
+    over the `sample` entity ids.
+    """
+    recalls = []
+    lsh_time = exact_time = 0.0
+    for entity_id in sample:
+        started = time.perf_counter()
+        approximate = index.top_k(entity_id, k)
+        lsh_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        exact = index.brute_force_top_k(entity_id, k)
+        exact_time += time.perf_counter() - started
+
+        if exact:
+            # ties at the k-th score make any entity with that score a correct answer
+            threshold = exact[-1][1]
+            exact_ids = {other for other, _ in exact}
+            hits = sum(1 for other, score in approximate if other in exact_ids or score >= threshold)
+            recalls.append(min(hits, len(exact)) / len(exact))
+
+    count = max(len(sample), 1)
+    report = {
+        "queries": len(sample),
+        "k": k,
+        "recall": float(np.mean(recalls)) if recalls else 1.0,
+        "lsh_ms": 1000 * lsh_time / count,
+        "brute_force_ms": 1000 * exact_time / count,
+    }
+    logger.info(f"LSH vs brute force: {report}")
+    return report
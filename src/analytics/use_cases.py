@@ -0,0 +1,126 @@
+"""
+Server-side answers to the UseCases.md questions over the aggregated `users` collection
+(one document per user with events / groups / friends / neighbors arrays).
+
+Every function pushes the work into MongoDB, as a count or an aggregation pipeline, and starts
+from a filter the user_id key index or a multikey relation index can serve (see
+scripts.import_csv_to_mongo.bootstrap_indexes). Only small results come back to Python, never
+the documents themselves. Questions about genres need the Neo4j genre properties and are not
+answered here. As with the repo methods they call, a failed query returns None rather than an
+empty answer.
+"""
+from typing import Any, Dict, List, Optional
+
+USERS_COLLECTION = "users"
+RELATION_FIELDS = ("events", "groups", "friends", "neighbors")
+
+
+def _field(field: str) -> str:
+    if field not in RELATION_FIELDS:
+        raise ValueError(f"Unknown relation field '{field}' (expected one of {RELATION_FIELDS}).")
+    return field
+
+
+def count_users(repo: Any, collection_name: str = USERS_COLLECTION) -> Optional[int]:
+    """Users: how many users do we have."""
+    return repo.count_documents(collection_name, {})
+
+
+def count_targets(repo: Any, field: str, collection_name: str = USERS_COLLECTION) -> Optional[int]:
+    """How many distinct events / groups (or befriended users) appear in the relation arrays."""
+    field = _field(field)
+    rows = repo.aggregate(collection_name, [
+        {"$match": {f"{field}.0": {"$exists": True}}},
+        {"$unwind": f"${field}"},
+        {"$group": {"_id": f"${field}"}},
+        {"$count": "count"},
+    ], allow_disk_use=True)
+    if rows is None:
+        return None
+    return rows[0]["count"] if rows else 0
+
+
+def count_users_with(repo: Any, field: str, collection_name: str = USERS_COLLECTION) -> Optional[int]:
+    """Users to activities: how many users have at least one event / group / friend."""
+    return repo.count_documents(collection_name, {f"{_field(field)}.0": {"$exists": True}})
+
+
+def count_for_user(repo: Any, user_id: str, field: str, collection_name: str = USERS_COLLECTION) -> Optional[int]:
+    """How many events a user attended / groups a user entered (a key-index seek plus $size)."""
+    field = _field(field)
+    rows = repo.aggregate(collection_name, [
+        {"$match": {"user_id": user_id}},
+        {"$project": {"_id": 0, "count": {"$size": {"$ifNull": [f"${field}", []]}}}},
+    ])
+    if rows is None:
+        return None
+    return rows[0]["count"] if rows else 0
+
+
+def count_users_of(repo: Any, field: str, target_id: str, collection_name: str = USERS_COLLECTION) -> Optional[int]:
+    """How many users attended this event / entered this group (a multikey index count)."""
+    return repo.count_documents(collection_name, {_field(field): target_id})
+
+
+def top_targets(repo: Any, field: str, n: int = 10,
+                collection_name: str = USERS_COLLECTION) -> Optional[List[Dict[str, Any]]]:
+    """Most attended events / most joined groups: [{"id", "users"}, ...] ($unwind / $group / top-N)."""
+    field = _field(field)
+    rows = repo.aggregate(collection_name, [
+        {"$match": {f"{field}.0": {"$exists": True}}},
+        {"$project": {"_id": 0, field: 1}},
+        {"$unwind": f"${field}"},
+        {"$group": {"_id": f"${field}", "users": {"$sum": 1}}},
+        {"$sort": {"users": -1, "_id": 1}},
+        {"$limit": int(n)},
+    ], allow_disk_use=True)
+    if rows is None:
+        return None
+    return [{"id": row["_id"], "users": row["users"]} for row in rows]
+
+
+def top_users(repo: Any, field: str, n: int = 10,
+              collection_name: str = USERS_COLLECTION) -> Optional[List[Dict[str, Any]]]:
+    """Users with the most events / groups / friends: [{"user_id", "count"}, ...] ($size + top-N sort)."""
+    field = _field(field)
+    rows = repo.aggregate(collection_name, [
+        {"$match": {f"{field}.0": {"$exists": True}}},
+        {"$project": {"_id": 0, "user_id": 1, "count": {"$size": f"${field}"}}},
+        {"$sort": {"count": -1, "user_id": 1}},
+        {"$limit": int(n)},
+    ], allow_disk_use=True)
+    return rows
+
+
+def top_companions(repo: Any, user_id: str, field: str = "events", n: int = 10,
+                   collection_name: str = USERS_COLLECTION) -> Optional[List[Dict[str, Any]]]:
+    """
+    Who are the most people a user made activities with: the users sharing the most events
+    (or groups) with `user_id`, as [{"user_id", "shared"}, ...]. Two index-backed queries: the
+    user's own array, then an $in match on the multikey index whose unwound items are re-filtered
+    and counted once per distinct item and user.
+    """
+    field = _field(field)
+    own = repo.aggregate(collection_name, [
+        {"$match": {"user_id": user_id}},
+        {"$project": {"_id": 0, "items": {"$ifNull": [f"${field}", []]}}},
+    ])
+    if own is None:
+        return None
+    items = own[0]["items"] if own else []
+    if not items:
+        return []
+    rows = repo.aggregate(collection_name, [
+        {"$match": {field: {"$in": items}, "user_id": {"$ne": user_id}}},
+        {"$project": {"_id": 0, "user_id": 1, field: 1}},
+        {"$unwind": f"${field}"},
+        {"$match": {field: {"$in": items}}},
+        # distinct (user, item) pairs first, so a repeated array entry is not counted twice
+        {"$group": {"_id": {"user_id": "$user_id", "item": f"${field}"}}},
+        {"$group": {"_id": "$_id.user_id", "shared": {"$sum": 1}}},
+        {"$sort": {"shared": -1, "_id": 1}},
+        {"$limit": int(n)},
+    ], allow_disk_use=True)
+    if rows is None:
+        return None
+    return [{"user_id": row["_id"], "shared": row["shared"]} for row in rows]
@@ -0,0 +1,5 @@
+from .profile_store import (ProfileStore, build_profiles, load_item_genres_from_neo4j, get_profile, get_profiles,
+                            fetch_activity, PROFILES_COLLECTION)
+from .incremental import ProfileUpdater, verify_incremental
+from .traits import (TRAITS, TRAITS_COLLECTION, TraitFeatures, LinearTraitModel, build_trait_features,
+                     baseline_trait_model, score_features, score_traits, write_trait_scores, get_traits)
@@ -0,0 +1,237 @@
+import logging
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.analytics.graph import CSRGraph, load_relation_file
+from src.analytics.similarity import SimilarityIndex, item_hash
+
+from .profile_store import (COATTENDANCE_RELATION, DEFAULT_TOP_COATTENDEES, GENRE_RELATIONS, PROFILE_RELATIONS,
+                            PROFILES_COLLECTION, SYMMETRIC_RELATIONS, build_profiles)
+
+logger = logging.getLogger(__name__)
+
+# Relationship types whose targets make up a user's item set in the similarity index
+SIMILARITY_RELATIONS = ("ATTENDED", "MEMBER_OF")
+
+
+class ProfileUpdater:
+    """
+    Keeps profile documents (and optionally a SimilarityIndex) current as relation rows arrive.
+
+    The updater holds the distinct edges per relationship type plus the event -> attendees
+    inverse, so a batch of new rows only recomputes the users it can affect: the row owners,
+    the other end of symmetric relations, and every attendee of a newly attended event (their
+    co-attendee counts change). Pass `record` as the importers' `on_change` callback and call
+    `flush` once the import is done; profiles stay identical to a `build_profiles` rebuild.
+    """
+
+    def __init__(self, documents: Dict[str, Dict[str, Any]], targets: Dict[str, Dict[str, Set[str]]],
+                 incoming: Dict[str, Dict[str, Set[str]]], attendees: Dict[str, Set[str]],
+                 item_genres: Optional[Dict[Tuple[str, str], str]] = None, top_n: int = DEFAULT_TOP_COATTENDEES,
+                 similarity: Optional[SimilarityIndex] = None):
+        self.documents = documents
+        self.targets = targets
+        self.incoming = incoming
+        self.attendees = attendees
+        self.item_genres = item_genres or {}
+        self.top_n = top_n
+        self.similarity = similarity
+        self._pending: List[Tuple[str, str, str]] = []
+
+    @classmethod
+    def from_graph(cls, graph: CSRGraph, item_genres: Optional[Dict[Tuple[str, str], str]] = None,
+                   top_n: int = DEFAULT_TOP_COATTENDEES, similarity: Optional[SimilarityIndex] = None) -> "ProfileUpdater":
+        """Start from a full build over `graph` (the state the deltas are applied on)."""
+        started = time.perf_counter()
+        store = build_profiles(graph, item_genres, top_n)
+        documents = {document["user_id"]: document for document in store.documents()}
+
+        targets = {rel: {} for rel in PROFILE_RELATIONS}
+        incoming = {rel: {} for rel in SYMMETRIC_RELATIONS}
+        for rel, matrix in graph.relations.items():
+            out = targets.setdefault(rel, {})
+            for src in np.flatnonzero(np.diff(matrix.indptr)):
+                start, stop = matrix.indptr[src], matrix.indptr[src + 1]
+                src_id = graph.node_ids[src]
+                dst_ids = [graph.node_ids[dst] for dst in matrix.indices[start:stop]]
+                out.setdefault(src_id, set()).update(dst_ids)
+                if rel in incoming:
+                    for dst_id in dst_ids:
+                        incoming[rel].setdefault(dst_id, set()).add(src_id)
+
+        attendees: Dict[str, Set[str]] = {}
+        for user_id, events in targets[COATTENDANCE_RELATION].items():
+            for event_id in events:
+                attendees.setdefault(event_id, set()).add(user_id)
+
+        logger.info(f"Profile updater initialised with {len(documents)} users in {time.perf_counter() - started:.2f}s.")
+        return cls(documents, targets, incoming, attendees, item_genres, top_n, similarity)
+
+    def record(self, rows: Iterable[Tuple[str, str, str]]):
+        """Buffer (user_id, relation_type, target_id) change events; matches the importers' `on_change`."""
+        self._pending.extend(rows)
+
+    def flush(self) -> Set[str]:
+        """Apply the buffered change events and return the ids of every user whose profile was recomputed."""
+        rows, self._pending = self._pending, []
+        return self.apply(rows)
+
+    def apply(self, rows: Iterable[Tuple[str, str, str]]) -> Set[str]:
+        """Apply relation rows immediately and return the ids of every recomputed user."""
+        from scripts.schema import RELATION_MAP
+
+        started = time.perf_counter()
+        affected: Set[str] = set()
+        new_events: Set[str] = set()
+        item_changes: Set[str] = set()
+        edges = 0
+        for user_id, relation_type, target_id in rows:
+            rel = RELATION_MAP.get(relation_type)
+            if rel is None:
+                continue
+            out = self.targets.setdefault(rel, {}).setdefault(user_id, set())
+            affected.add(user_id)
+            if PROFILE_RELATIONS.get(rel) == "User":
+                # the target is a user too and gets a (possibly empty) profile
+                affected.add(target_id)
+            if target_id in out:
+                continue
+            out.add(target_id)
+            edges += 1
+            if rel in self.incoming:
+                self.incoming[rel].setdefault(target_id, set()).add(user_id)
+            if rel == COATTENDANCE_RELATION:
+                self.attendees.setdefault(target_id, set()).add(user_id)
+                new_events.add(target_id)
+            if rel in SIMILARITY_RELATIONS:
+                item_changes.add(user_id)
+
+        for event_id in new_events:
+            affected.update(self.attendees[event_id])
+        for user_id in affected:
+            if user_id not in self.documents:
+                item_changes.add(user_id)
+            self.documents[user_id] = self._document(user_id)
+
+        if self.similarity is not None:
+            self.similarity.update({user_id: self._item_hashes(user_id) for user_id in item_changes})
+
+        logger.info(
+            f"Applied {edges} new edge(s); recomputed {len(affected)} profile(s) "
+            f"in {time.perf_counter() - started:.2f}s."
+        )
+        return affected
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self.documents.get(user_id)
+
+    def write_to_mongo(self, repo: Any, user_ids: Iterable[str], collection_name: str = PROFILES_COLLECTION) -> int:
+        """Upsert the profiles of `user_ids` (e.g. the result of `flush`); returns the count written (0 on failure)."""
+        documents = [self.documents[user_id] for user_id in user_ids if user_id in self.documents]
+        if documents and repo.replace_many(collection_name, "user_id", documents) is None:
+            logger.error(f"Writing {len(documents)} updated profile(s) to '{collection_name}' failed.")
+            return 0
+        return len(documents)
+
+    def _neighbours(self, rel: str, user_id: str) -> Set[str]:
+        neighbours = self.targets.get(rel, {}).get(user_id, set())
+        if rel in self.incoming:
+            neighbours = neighbours | self.incoming[rel].get(user_id, set())
+        return neighbours
+
+    def _document(self, user_id: str) -> Dict[str, Any]:
+        degrees = {rel: len(self._neighbours(rel, user_id)) for rel in self.targets}
+
+        genres, top_genre = {}, {}
+        if self.item_genres:
+            for rel in GENRE_RELATIONS:
+                label = PROFILE_RELATIONS[rel]
+                histogram = Counter(
+                    self.item_genres[(label, target_id)]
+                    for target_id in self.targets.get(rel, {}).get(user_id, ())
+                    if (label, target_id) in self.item_genres
+                )
+                genres[rel] = dict(histogram)
+                top_genre[rel] = min(histogram, key=lambda g: (-histogram[g], g)) if histogram else None
+
+        shared = Counter()
+        for event_id in self.targets[COATTENDANCE_RELATION].get(user_id, ()):
+            shared.update(self.attendees[event_id])
+        shared.pop(user_id, None)
+        partners = sorted(shared.items(), key=lambda item: (-item[1], item[0]))[:self.top_n]
+
+        return {
+            "user_id": user_id,
+            "degrees": degrees,
+            "genres": genres,
+            "top_genre": top_genre,
+            "top_coattendees": [{"user_id": other, "count": count} for other, count in partners],
+        }
+
+    def _item_hashes(self, user_id: str) -> Set[int]:
+        return {
+            item_hash(PROFILE_RELATIONS[rel], target_id)
+            for rel in SIMILARITY_RELATIONS
+            for target_id in self.targets.get(rel, {}).get(user_id, ())
+        }
+
+
+def verify_incremental(base_file: str, delta_files: Sequence[str],
+                       item_genres: Optional[Dict[Tuple[str, str], str]] = None,
+                       top_n: int = DEFAULT_TOP_COATTENDEES, sample: int = 1000,
+                       with_similarity: bool = True) -> Dict[str, Any]:
+    """
+    Harness proving incremental maintenance equals a rebuild: profiles (and similarity index)
+    are built over `base_file`, every delta file is applied through ProfileUpdater, and the result
+    is compared with a full build over base + deltas. Every profile is compared; for the similarity
+    index the signatures of every user and top_k of up to `sample` recomputed users are compared.
+    """
+    from scripts.schema import NODE_MAP
+    from scripts.relation_reader import iter_relation_batches
+
+    relations = list(NODE_MAP)
+    base = load_relation_file(base_file, relations)
+    similarity = SimilarityIndex.from_graph(base) if with_similarity else None
+    updater = ProfileUpdater.from_graph(base, item_genres, top_n, similarity)
+
+    started = time.perf_counter()
+    changed: Set[str] = set()
+    for delta_file in delta_files:
+        for batch in iter_relation_batches(delta_file, relations):
+            updater.record(list(batch.rows()))
+        changed |= updater.flush()
+    incremental_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    full = load_relation_file([base_file, *delta_files], relations)
+    rebuilt = {document["user_id"]: document for document in build_profiles(full, item_genres, top_n).documents()}
+    rebuilt_similarity = SimilarityIndex.from_graph(full) if with_similarity else None
+    rebuild_seconds = time.perf_counter() - started
+
+    mismatched = sorted(user_id for user_id in set(rebuilt) | set(updater.documents)
+                        if rebuilt.get(user_id) != updater.documents.get(user_id))
+    report = {
+        "users": len(rebuilt),
+        "changed_users": len(changed),
+        "mismatched_profiles": len(mismatched),
+        "incremental_seconds": incremental_seconds,
+        "rebuild_seconds": rebuild_seconds,
+    }
+    if with_similarity:
+        mismatched_signatures = sum(
+            1 for user_id, position in rebuilt_similarity._position.items()
+            if user_id not in similarity._position
+            or (rebuilt_similarity.signatures[position] != similarity.signatures[similarity._position[user_id]]).any()
+        )
+        checked = sorted(changed)[:sample]
+        report["mismatched_signatures"] = mismatched_signatures
+        report["mismatched_top_k"] = sum(1 for user_id in checked
+                                         if similarity.top_k(user_id) != rebuilt_similarity.top_k(user_id))
+    if mismatched:
+        logger.warning(f"Incremental profiles differ from the rebuild for e.g. {mismatched[:5]}")
+    logger.info(f"Incremental vs rebuild: {report}")
+    return report
+
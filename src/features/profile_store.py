@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from src.analytics.algorithms import top_k_per_row
+from src.analytics.graph import CSRGraph
+from src.analytics.similarity import npz_path
+
+logger = logging.getLogger(__name__)
+
+# Relationship types every profile reports a degree for, with the label of their target nodes
+PROFILE_RELATIONS = {"ATTENDED": "Event", "MEMBER_OF": "Group", "FRIEND_WITH": "User", "NEIGHBOR_WITH": "User"}
+# Relationship types whose degree counts both directions (a friend row for either user counts)
+SYMMETRIC_RELATIONS = ("FRIEND_WITH", "NEIGHBOR_WITH")
+# Relationship types whose targets carry a genre
+GENRE_RELATIONS = ("ATTENDED", "MEMBER_OF")
+COATTENDANCE_RELATION = "ATTENDED"
+DEFAULT_TOP_COATTENDEES = 10
+PROFILES_COLLECTION = "profiles"
+
+
+class ProfileStore:
+    """
+    Precomputed per-user profile features in columnar form.
+
+    - `degrees[rel]`: int32 count per user for every relationship type
+    - `genre_counts[rel]`: users x genres CSR histogram of the genres of the user's targets
+    - `coattendees`: users x users CSR holding, per user, the top-N users sharing most events
+
+    Rows follow `user_ids` (sorted, so ties between co-attendees resolve by user id); `get(user_id)`
+    turns one row into a profile document, which is also the shape written to the Mongo `profiles`
+    collection.
+    """
+
+    def __init__(self, user_ids: List[str], degrees: Dict[str, np.ndarray], genre_names: List[str],
+                 genre_counts: Dict[str, sparse.csr_matrix], coattendees: sparse.csr_matrix):
+        self.user_ids = user_ids
+        self.degrees = degrees
+        self.genre_names = genre_names
+        self.genre_counts = genre_counts
+        self.coattendees = coattendees
+        self._position = {user_id: i for i, user_id in enumerate(user_ids)}
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Profile document of one user, or None if the user is unknown."""
+        position = self._position.get(user_id)
+        return None if position is None else self._document(position)
+
+    def documents(self) -> Iterator[Dict[str, Any]]:
+        for position in range(len(self.user_ids)):
+            yield self._document(position)
+
+    def _document(self, position: int) -> Dict[str, Any]:
+        genres, top_genre = {}, {}
+        for rel, matrix in self.genre_counts.items():
+            start, stop = matrix.indptr[position], matrix.indptr[position + 1]
+            histogram = {self.genre_names[g]: int(c) for g, c in zip(matrix.indices[start:stop], matrix.data[start:stop])}
+            genres[rel] = histogram
+            # mode genre; ties resolve to the alphabetically first genre
+            top_genre[rel] = min(histogram, key=lambda g: (-histogram[g], g)) if histogram else None
+
+        start, stop = self.coattendees.indptr[position], self.coattendees.indptr[position + 1]
+        partners = sorted(zip(self.coattendees.indices[start:stop], self.coattendees.data[start:stop]),
+                          key=lambda item: (-item[1], self.user_ids[item[0]]))
+        return {
+            "user_id": self.user_ids[position],
+            "degrees": {rel: int(counts[position]) for rel, counts in self.degrees.items()},
+            "genres": genres,
+            "top_genre": top_genre,
+            "top_coattendees": [{"user_id": self.user_ids[other], "count": int(count)} for other, count in partners],
+        }
+
+    def save(self, path: str):
+        """Persist every column to one .npz file (".npz" is appended to `path` when missing, as load expects)."""
+        arrays = {
+            "user_ids": np.array(self.user_ids, dtype=np.str_),
+            "genre_names": np.array(self.genre_names, dtype=np.str_),
+        }
+        for rel, counts in self.degrees.items():
+            arrays[f"degree:{rel}"] = counts
+        for name, matrix in [(f"genres:{rel}", m) for rel, m in self.genre_counts.items()] + [("coattendees", self.coattendees)]:
+            arrays[f"{name}:data"] = matrix.data
+            arrays[f"{name}:indices"] = matrix.indices
+            arrays[f"{name}:indptr"] = matrix.indptr
+            arrays[f"{name}:shape"] = np.array(matrix.shape)
+        np.savez_compressed(npz_path(path), **arrays)
+        logger.info(f"Profile store with {len(self)} users saved to '{path}'.")
+
+    @classmethod
+    def load(cls, path: str) -> "ProfileStore":
+        with np.load(npz_path(path)) as saved:
+            def matrix(name: str) -> sparse.csr_matrix:
+                return sparse.csr_matrix((saved[f"{name}:data"], saved[f"{name}:indices"], saved[f"{name}:indptr"]),
+                                         shape=tuple(saved[f"{name}:shape"]))
+
+            degrees = {key.split(":", 1)[1]: saved[key] for key in saved.files if key.startswith("degree:")}
+            genre_rels = {key.split(":")[1] for key in saved.files if key.startswith("genres:")}
+            return cls(saved["user_ids"].tolist(), degrees, saved["genre_names"].tolist(),
+                       {rel: matrix(f"genres:{rel}") for rel in sorted(genre_rels)}, matrix("coattendees"))
+
+    def write_to_mongo(self, repo: Any, collection_name: str = PROFILES_COLLECTION, chunk_size: int = 5000) -> int:
+        """
+        Upsert every profile document into `collection_name` (indexed by user_id) `chunk_size` at a
+        time. Stops at the first chunk that fails; returns the count confirmed written (0 if the
+        index could not be created), so a short count means the collection is incomplete.
+        """
+        if repo.create_index(collection_name, [("user_id", 1)], unique=True) is None:
+            logger.error(f"Creating the user_id index on '{collection_name}' failed; no profiles written.")
+            return 0
+        written, chunk = 0, []
+        for document in self.documents():
+            chunk.append(document)
+            if len(chunk) >= chunk_size:
+                if repo.replace_many(collection_name, "user_id", chunk) is None:
+                    break
+                written += len(chunk)
+                chunk = []
+        else:
+            if chunk and repo.replace_many(collection_name, "user_id", chunk) is not None:
+                written += len(chunk)
+        if written < len(self):
+            logger.error(f"Writing profiles to '{collection_name}' failed after {written}/{len(self)}.")
+        else:
+            logger.info(f"Wrote {written} profile(s) to '{collection_name}'.")
+        return written
+
+
+def build_profiles(graph: CSRGraph, item_genres: Optional[Dict[Tuple[str, str], str]] = None,
+                   top_n: int = DEFAULT_TOP_COATTENDEES, block_size: int = 2048) -> ProfileStore:
+    """
+    Compute every user's profile features in one pass over a CSRGraph.
+
+    `item_genres` maps (label, id) of Event/Group nodes to their genre; without it the genre
+    histograms are empty.
+    """
+    started = time.perf_counter()
+    users = profile_users(graph)
+    user_ids = [graph.node_ids[i] for i in users]
+    degrees = relation_degrees(graph, users)
+    genre_names, genre_counts = genre_histograms(graph, users, item_genres)
+
+    coattendees = _top_coattendees(graph, users, top_n, block_size)
+    logger.info(f"Built {len(user_ids)} profiles in {time.perf_counter() - started:.2f}s.")
+    return ProfileStore(user_ids, degrees, genre_names, genre_counts, coattendees)
+
+
+def profile_users(graph: CSRGraph) -> np.ndarray:
+    """Node indices of every User, ordered by user id (the row order of profiles and trait scores)."""
+    users = graph.nodes_with_label("User")
+    return users[np.argsort(np.array([graph.node_ids[i] for i in users], dtype=np.str_), kind="stable")]
+
+
+def relation_degrees(graph: CSRGraph, users: np.ndarray) -> Dict[str, np.ndarray]:
+    """int32 degree of every user in `users` for each PROFILE_RELATIONS type (both directions for symmetric ones)."""
+    degrees = {rel: np.zeros(len(users), dtype=np.int32) for rel in PROFILE_RELATIONS}
+    for rel, matrix in graph.relations.items():
+        if rel in SYMMETRIC_RELATIONS:
+            matrix = (matrix + matrix.T).tocsr()
+        degrees[rel] = np.asarray(matrix.getnnz(axis=1), dtype=np.int32)[users]
+    return degrees
+
+
+def genre_histograms(graph: CSRGraph, users: np.ndarray, item_genres: Optional[Dict[Tuple[str, str], str]] = None
+                     ) -> Tuple[List[str], Dict[str, sparse.csr_matrix]]:
+    """Sorted genre names and, per GENRE_RELATIONS type, a users x genres CSR of target genre counts."""
+    genre_names = sorted(set((item_genres or {}).values()))
+    genre_counts = {}
+    if genre_names:
+        genre_position = {genre: i for i, genre in enumerate(genre_names)}
+        rows, cols = [], []
+        for (label, item_id), genre in item_genres.items():
+            index = graph.index_of(label, item_id)
+            if index is not None:
+                rows.append(index)
+                cols.append(genre_position[genre])
+        one_hot = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                                    shape=(graph.num_nodes, len(genre_names)))
+        for rel in GENRE_RELATIONS:
+            if rel in graph.relations:
+                counts = (graph.relations[rel][users].astype(np.int32) @ one_hot).tocsr()
+                counts.eliminate_zeros()
+            else:
+                counts = sparse.csr_matrix((len(users), len(genre_names)), dtype=np.int32)
+            genre_counts[rel] = counts
+    return genre_names, genre_counts
+
+
+def _top_coattendees(graph: CSRGraph, users: np.ndarray, top_n: int, block_size: int) -> sparse.csr_matrix:
+    """users x users CSR with the `top_n` largest shared-event counts of every user."""
+    n = len(users)
+    attended = graph.relations.get(COATTENDANCE_RELATION)
+    if attended is None or n == 0:
+        return sparse.csr_matrix((n, n), dtype=np.int32)
+    attended = attended[users].astype(np.int32).tocsr()
+    transposed = attended.T.tocsr()
+
+    out_rows, out_cols, out_counts = [], [], []
+    for start in range(0, n, block_size):
+        shared = (attended[start:start + block_size] @ transposed).tocoo()
+        rows = shared.row.astype(np.int64) + start
+        cols = shared.col.astype(np.int64)
+        keep = rows != cols
+        rows, cols, counts = top_k_per_row(rows[keep], cols[keep], shared.data[keep], top_n)
+        out_rows.append(rows)
+        out_cols.append(cols)
+        out_counts.append(counts)
+
+    return sparse.csr_matrix((np.concatenate(out_counts), (np.concatenate(out_rows), np.concatenate(out_cols))),
+                             shape=(n, n), dtype=np.int32)
+
+
+def load_item_genres_from_neo4j(repo: Any, fetch_size: int = 10000) -> Dict[Tuple[str, str], str]:
+    """Stream (label, id) -> genre for every Event/Group node that has a genre property."""
+    query = (
+        "MATCH (n) WHERE (n:Event OR n:Group) AND n.genre IS NOT NULL "
+        "RETURN labels(n)[0] AS label, n.id AS id, n.genre AS genre"
+    )
+    genres = {}
+    for row in repo.stream_query(query, fetch_size=fetch_size):
+        genres[(row["label"], row["id"])] = row["genre"]
+    return genres
+
+
+def get_profile(repo: Any, user_id: str, collection_name: str = PROFILES_COLLECTION) -> Optional[Dict[str, Any]]:
+    """Single indexed lookup of a stored profile in Mongo."""
+    return repo.find_one(collection_name, {"user_id": user_id})
+
+
+async def get_profiles(repo: Any, user_ids: List[str],
+                       collection_name: str = PROFILES_COLLECTION) -> Dict[str, Optional[Dict[str, Any]]]:
+    """get_profile for several users at once on an AsyncMongoDBRepo: the lookups are gathered, not sequential."""
+    documents = await asyncio.gather(*(repo.find_one(collection_name, {"user_id": user_id}) for user_id in user_ids))
+    return dict(zip(user_ids, documents))
+
+
+def activity_queries(user_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """One (Cypher, parameters) per PROFILE_RELATIONS type returning the ids of a user's targets."""
+    queries = []
+    for rel_type, label in PROFILE_RELATIONS.items():
+        arrow = "-" if rel_type in SYMMETRIC_RELATIONS else "->"
+        queries.append((f"MATCH (:User {{id: $user_id}})-[:{rel_type}]{arrow}(t:{label}) RETURN DISTINCT t.id AS id",
+                        {"user_id": user_id}))
+    return queries
+
+
+async def fetch_activity(repo: Any, user_id: str) -> Dict[str, List[Any]]:
+    """
+    A user's target ids per PROFILE_RELATIONS type, read live from Neo4j through an AsyncNeo4jRepo.
+    The four relationship queries are independent, so they run concurrently (execute_many).
+    """
+    results = await repo.execute_many(activity_queries(user_id))
+    return {rel_type: [row["id"] for row in rows or ()] for rel_type, rows in zip(PROFILE_RELATIONS, results)}
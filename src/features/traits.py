@@ -0,0 +1,271 @@
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from logs.metrics import metrics, SCORING_USERS_PER_SEC
+from src.analytics.graph import CSRGraph
+
+from .profile_store import GENRE_RELATIONS, PROFILE_RELATIONS, genre_histograms, profile_users, relation_degrees
+
+logger = logging.getLogger(__name__)
+
+TRAITS = ("openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism")
+TRAITS_COLLECTION = "traits"
+# Rows per model call; bounds the dense (rows x traits) intermediate
+DEFAULT_SCORE_BATCH_SIZE = 8192
+# Chunks handed to each worker process, so a slow chunk does not leave the others idle
+CHUNKS_PER_WORKER = 4
+# Hand-set baseline weights on standardised aggregate features, used until a trained model is supplied
+BASELINE_WEIGHTS = {
+    "openness": {"genre_diversity:ATTENDED": 1.0, "genre_diversity:MEMBER_OF": 0.5, "degree:ATTENDED": 0.5},
+    "conscientiousness": {"degree:MEMBER_OF": 0.8, "degree:ATTENDED": 0.3},
+    "extraversion": {"degree:FRIEND_WITH": 1.0, "degree:ATTENDED": 0.7},
+    "agreeableness": {"degree:NEIGHBOR_WITH": 0.8, "degree:FRIEND_WITH": 0.5},
+    "neuroticism": {"degree:FRIEND_WITH": -0.6, "degree:ATTENDED": -0.4},
+}
+
+
+class TraitFeatures:
+    """
+    users x features CSR matrix (float32) feeding the trait models, rows in `user_ids` order.
+
+    Columns are `degree:<REL>` (log1p of every PROFILE_RELATIONS degree), `genre_diversity:<REL>`
+    (log1p of the distinct genres reached) and `genre_share:<REL>:<genre>` (share of the user's
+    targets with that genre); the genre columns only exist when item genres were given.
+    """
+
+    def __init__(self, user_ids: List[str], names: List[str], matrix: sparse.csr_matrix):
+        self.user_ids = user_ids
+        self.names = names
+        self.matrix = matrix
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+
+def build_trait_features(graph: CSRGraph, item_genres: Optional[Dict[Tuple[str, str], str]] = None) -> TraitFeatures:
+    """Assemble the sparse feature matrix of every user from the relation matrices of a CSRGraph."""
+    users = profile_users(graph)
+    user_ids = [graph.node_ids[i] for i in users]
+    degrees = relation_degrees(graph, users)
+    genre_names, genre_counts = genre_histograms(graph, users, item_genres)
+
+    names = [f"degree:{rel}" for rel in PROFILE_RELATIONS]
+    blocks = [sparse.csr_matrix(np.log1p(np.column_stack([degrees[rel] for rel in PROFILE_RELATIONS])
+                                         .astype(np.float32)))]
+    for rel in GENRE_RELATIONS:
+        if rel not in genre_counts:
+            continue
+        counts = genre_counts[rel].astype(np.float32)
+        totals = np.asarray(counts.sum(axis=1)).ravel()
+        shares = sparse.diags(np.divide(1.0, totals, out=np.zeros_like(totals), where=totals > 0)) @ counts
+        diversity = np.log1p(np.diff(counts.indptr).astype(np.float32))
+        names.append(f"genre_diversity:{rel}")
+        names.extend(f"genre_share:{rel}:{genre}" for genre in genre_names)
+        blocks.append(sparse.csr_matrix(diversity[:, None]))
+        blocks.append(shares.tocsr())
+
+    matrix = sparse.hstack(blocks, format="csr", dtype=np.float32)
+    matrix.eliminate_zeros()
+    return TraitFeatures(user_ids, names, matrix)
+
+
+class LinearTraitModel:
+    """
+    One linear model per trait over standardised features, squashed to 0..1:
+    sigmoid(((X - mean) / scale) @ weights + bias).
+
+    The standardisation is folded into the weights, so scoring a sparse batch is one sparse x dense
+    product and never densifies X. Any other object with `predict(X) -> (rows, len(TRAITS))` (e.g. a
+    fitted scikit-learn multi-output regressor) can be scored the same way, as long as it pickles.
+    """
+
+    def __init__(self, feature_names: Sequence[str], weights: np.ndarray, bias: Optional[np.ndarray] = None,
+                 mean: Optional[np.ndarray] = None, scale: Optional[np.ndarray] = None, name: str = "linear"):
+        self.feature_names = list(feature_names)
+        self.weights = np.asarray(weights, dtype=np.float32).reshape(len(self.feature_names), len(TRAITS))
+        self.bias = np.zeros(len(TRAITS), dtype=np.float32) if bias is None else np.asarray(bias, dtype=np.float32)
+        self.mean = np.zeros(len(self.feature_names), dtype=np.float32) if mean is None else np.asarray(mean, np.float32)
+        self.scale = np.ones(len(self.feature_names), dtype=np.float32) if scale is None else np.asarray(scale, np.float32)
+        self.name = name
+        self._folded = None
+
+    def align(self, names: Sequence[str]) -> "LinearTraitModel":
+        """The same model over the columns `names` (features it does not know get zero weight)."""
+        position = {name: i for i, name in enumerate(self.feature_names)}
+        rows = np.array([position.get(name, -1) for name in names], dtype=np.int64)
+        known = rows >= 0
+
+        def take(values: np.ndarray, fill: float) -> np.ndarray:
+            out = np.full((len(names),) + values.shape[1:], fill, dtype=np.float32)
+            out[known] = values[rows[known]]
+            return out
+
+        return LinearTraitModel(names, take(self.weights, 0.0), self.bias, take(self.mean, 0.0),
+                                take(self.scale, 1.0), self.name)
+
+    def predict(self, X: Any) -> np.ndarray:
+        if self._folded is None:
+            weights = self.weights / self.scale[:, None]
+            self._folded = (weights, self.bias - self.mean @ weights)
+        weights, bias = self._folded
+        logits = np.asarray(X @ weights, dtype=np.float32) + bias
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def save(self, path: str):
+        np.savez(path, feature_names=np.array(self.feature_names, dtype=np.str_), weights=self.weights,
+                 bias=self.bias, mean=self.mean, scale=self.scale, name=np.array(self.name))
+
+    @classmethod
+    def load(cls, path: str) -> "LinearTraitModel":
+        with np.load(path) as saved:
+            return cls(saved["feature_names"].tolist(), saved["weights"], saved["bias"], saved["mean"],
+                       saved["scale"], str(saved["name"]))
+
+
+def baseline_trait_model(features: TraitFeatures) -> LinearTraitModel:
+    """
+    BASELINE_WEIGHTS as a LinearTraitModel, standardised with the mean / std of `features`.
+    A heuristic placeholder that ranks users by activity patterns, not a trained predictor.
+    """
+    matrix = features.matrix
+    mean = np.asarray(matrix.mean(axis=0)).ravel()
+    squares = np.asarray(matrix.multiply(matrix).mean(axis=0)).ravel()
+    scale = np.sqrt(np.maximum(squares - mean ** 2, 0.0))
+    scale[scale == 0] = 1.0
+
+    position = {name: i for i, name in enumerate(features.names)}
+    weights = np.zeros((len(features.names), len(TRAITS)), dtype=np.float32)
+    for column, trait in enumerate(TRAITS):
+        for name, weight in BASELINE_WEIGHTS[trait].items():
+            if name in position:
+                weights[position[name], column] = weight
+    return LinearTraitModel(features.names, weights, mean=mean, scale=scale, name="baseline")
+
+
+_worker_model = None
+
+
+def _init_worker(model: Any):
+    global _worker_model
+    _worker_model = model
+
+
+def _score_rows(model: Any, matrix: sparse.csr_matrix, batch_size: int) -> np.ndarray:
+    scores = np.empty((matrix.shape[0], len(TRAITS)), dtype=np.float32)
+    for start in range(0, matrix.shape[0], batch_size):
+        scores[start:start + batch_size] = model.predict(matrix[start:start + batch_size])
+    return scores
+
+
+def _score_chunk(task: Tuple[sparse.csr_matrix, int]) -> np.ndarray:
+    matrix, batch_size = task
+    return _score_rows(_worker_model, matrix, batch_size)
+
+
+def score_features(features: TraitFeatures, model: Any, batch_size: int = DEFAULT_SCORE_BATCH_SIZE,
+                   workers: int = 1) -> np.ndarray:
+    """
+    (users x TRAITS) float32 scores, `model.predict` called on row mini-batches of `batch_size`.
+
+    With `workers` > 1 the rows are cut into contiguous chunks scored by a process pool; the model
+    is shipped once per worker, and chunks come back in order.
+    """
+    matrix, batch_size = features.matrix, max(1, int(batch_size))
+    if workers <= 1 or matrix.shape[0] <= batch_size:
+        return _score_rows(model, matrix, batch_size)
+
+    chunk_rows = max(batch_size, -(-matrix.shape[0] // (int(workers) * CHUNKS_PER_WORKER)))
+    tasks = [(matrix[start:start + chunk_rows], batch_size) for start in range(0, matrix.shape[0], chunk_rows)]
+    with ProcessPoolExecutor(max_workers=int(workers), initializer=_init_worker, initargs=(model,)) as executor:
+        return np.concatenate(list(executor.map(_score_chunk, tasks)))
+
+
+def write_trait_scores(repo: Any, user_ids: List[str], scores: np.ndarray, model_name: str = "baseline",
+                       collection_name: str = TRAITS_COLLECTION, chunk_size: int = 5000) -> int:
+    """
+    Replace `collection_name` with one {"user_id", "traits", "model"} document per user, inserted
+    `chunk_size` at a time with insert_many (every run rescores all users, so nothing is upserted).
+    The documents go to a staging collection that is renamed over `collection_name` only once every
+    chunk and the user_id index are written, so a failed run leaves the previous scores in place.
+    Returns the count written (0 if the run failed).
+    """
+    staging = f"{collection_name}_staging"
+    # leftovers of an earlier failed run
+    repo.drop_collection(staging)
+    written = 0
+    for start in range(0, len(user_ids), chunk_size):
+        block = scores[start:start + chunk_size].astype(np.float64).round(4).tolist()
+        documents = [{"user_id": user_id, "traits": dict(zip(TRAITS, values)), "model": model_name}
+                     for user_id, values in zip(user_ids[start:start + chunk_size], block)]
+        inserted = repo.insert_many(staging, documents)
+        if inserted is None:
+            logger.error(f"Writing trait scores {start}..{start + len(documents)} failed; "
+                         f"'{collection_name}' is left unchanged.")
+            repo.drop_collection(staging)
+            return 0
+        written += len(inserted)
+    if repo.create_index(staging, [("user_id", 1)], unique=True) is None \
+            or not repo.rename_collection(staging, collection_name):
+        logger.error(f"Replacing '{collection_name}' with the new trait scores failed; it is left unchanged.")
+        repo.drop_collection(staging)
+        return 0
+    logger.info(f"Wrote {written} trait score(s) to '{collection_name}'.")
+    return written
+
+
+def score_traits(graph: CSRGraph, repo: Any = None, item_genres: Optional[Dict[Tuple[str, str], str]] = None,
+                 model: Any = None, batch_size: int = DEFAULT_SCORE_BATCH_SIZE, workers: int = 1,
+                 collection_name: str = TRAITS_COLLECTION) -> Dict[str, Any]:
+    """
+    Score the Big 5 OCEAN traits of every user of `graph` and, with `repo`, write them to MongoDB.
+
+    `model` defaults to the baseline_trait_model; a LinearTraitModel trained on other columns is
+    aligned to this feature matrix first. Returns {"users", "features", "written", per-stage
+    seconds, "users_per_sec" (scoring only), "total_users_per_sec", "scores" (users x TRAITS),
+    "user_ids"}.
+    """
+    started = time.perf_counter()
+    features = build_trait_features(graph, item_genres)
+    build_seconds = time.perf_counter() - started
+
+    if model is None:
+        model = baseline_trait_model(features)
+    elif isinstance(model, LinearTraitModel):
+        model = model.align(features.names)
+    scoring_started = time.perf_counter()
+    scores = score_features(features, model, batch_size, workers)
+    score_seconds = time.perf_counter() - scoring_started
+
+    written, write_started = 0, time.perf_counter()
+    if repo is not None:
+        written = write_trait_scores(repo, features.user_ids, scores, getattr(model, "name", type(model).__name__),
+                                     collection_name)
+    write_seconds = time.perf_counter() - write_started
+
+    seconds = time.perf_counter() - started
+    stats = {
+        "users": len(features), "features": len(features.names), "written": written,
+        "build_seconds": build_seconds, "score_seconds": score_seconds, "write_seconds": write_seconds,
+        "seconds": seconds,
+        "users_per_sec": len(features) / score_seconds if score_seconds else 0.0,
+        "total_users_per_sec": len(features) / seconds if seconds else 0.0,
+        "scores": scores, "user_ids": features.user_ids,
+    }
+    metrics.set(SCORING_USERS_PER_SEC, stats["users_per_sec"], stage="score")
+    metrics.set(SCORING_USERS_PER_SEC, stats["total_users_per_sec"], stage="total")
+    logger.info(
+        f"Scored {len(features)} users on {len(features.names)} features with {workers} worker(s): "
+        f"{stats['users_per_sec']:.0f} users/sec scoring, {stats['total_users_per_sec']:.0f} users/sec overall "
+        f"(features {build_seconds:.2f}s, scoring {score_seconds:.2f}s, writing {write_seconds:.2f}s)."
+    )
+    return stats
+
+
+def get_traits(repo: Any, user_id: str, collection_name: str = TRAITS_COLLECTION) -> Optional[Dict[str, Any]]:
+    """Single indexed lookup of a user's stored trait scores."""
+    return repo.find_one(collection_name, {"user_id": user_id})